@@ -12,6 +12,12 @@ from google.adk.tools import google_search
 from google.genai import types
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 # agent automatically retries if something goes wrong
 retry_config=types.HttpRetryOptions(
     attempts=5,  # Maximum retry attempts
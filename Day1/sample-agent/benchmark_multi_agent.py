@@ -0,0 +1,213 @@
+# Offline benchmark for the four workflows in multi_agent.py.
+# Every Gemini(...) is swapped for FakeGemini (fake_gemini.py), so no API key or network is needed.
+#
+#   python Day1/sample-agent/benchmark_multi_agent.py --runs 20 --concurrency 4 --latency 0.05
+#
+# Results are written as sorted, indented JSON so two runs can be compared with a plain `diff`; by default to
+# benchmark_results.json in the system temp directory (--output to keep them elsewhere).
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from fake_gemini import FakeGeminiBackend, call_tool, current_run
+from multi_agent import (
+    BLOG_POST_TOPIC,
+    PARALLEL_RESEARCH_QUERY,
+    RESEARCH_SUMMARIZE_QUERY,
+    STORY_REFINEMENT_PROMPT,
+    build_best_of_n_story_refinement,
+    build_blog_post_creation,
+    build_iterative_story_refinement,
+    build_parallel_multi_topic_research,
+    build_research_summarize,
+)
+print("✅ Benchmark components imported successfully.")
+
+DEFAULT_OUTPUT = os.path.join(tempfile.gettempdir(), "benchmark_results.json")  # Outside the source tree
+
+# workflow name -> (builder, prompt)
+WORKFLOWS = {
+    "ResearchSummarize": (build_research_summarize, RESEARCH_SUMMARIZE_QUERY),
+    "ResearchSummarizeCompiled": (functools.partial(build_research_summarize, compiled=True), RESEARCH_SUMMARIZE_QUERY),
+    "BlogPostCreation": (build_blog_post_creation, BLOG_POST_TOPIC),
+    "ParallelMultiTopicResearch": (build_parallel_multi_topic_research, PARALLEL_RESEARCH_QUERY),
+    "IterativeStoryRefinement": (build_iterative_story_refinement, STORY_REFINEMENT_PROMPT),
+    # Previous loop exit (RefinerAgent calls exit_loop), kept to measure what the exit predicate saves
+    "IterativeStoryRefinementToolExit": (
+        functools.partial(build_iterative_story_refinement, exit_predicate=False), STORY_REFINEMENT_PROMPT
+    ),
+    "IterativeStoryRefinementBestOfN": (build_best_of_n_story_refinement, STORY_REFINEMENT_PROMPT),
+}
+
+# Canned replies that walk each workflow down its normal path
+CANNED_REPLIES = {
+    "ResearchCoordinator": [
+        call_tool("ResearchAgent", request="latest advancements in quantum computing and their impact on AI"),
+        call_tool("SummarizerAgent", request="Summarize the research findings."),
+        "Here is the final summary of the research.",
+    ],
+    "ResearchCoordinatorAnswer": "Here is the final summary of the research.",
+    "ResearchAgent": "Finding 1 [source A]. Finding 2 [source B]. Finding 3 [source C]. " * 10,
+    "SummarizerAgent": "- Key point one\n- Key point two\n- Key point three",
+    "OutlineAgent": "Headline\nHook\n" + "Section with bullet points\n" * 4 + "Conclusion",
+    "WriterAgent": "Draft paragraph about multi-agent systems. " * 30,
+    "EditorAgent": "Polished paragraph about multi-agent systems. " * 30,
+    "TechResearcher": "AI/ML trend report. " * 25,
+    "HealthResearcher": "Medical breakthrough report. " * 25,
+    "FinanceResearcher": "Fintech trend report. " * 25,
+    "AggregatorAgent": "Executive summary across tech, health and finance. " * 20,
+    "InitialWriterAgent": "The lighthouse keeper found a glowing map. " * 15,
+    "CriticAgent": ["1. Build more tension. 2. Explain the map. 3. Sharpen the ending.", "APPROVED"],
+    "RefinerAgent": [
+        "The lighthouse keeper unfolded the glowing map, and the sea went quiet. " * 15,
+        call_tool("exit_loop"),
+        "Story approved.",
+    ],
+    # Best-of-3 clones: the last candidate is approved in the first round
+    **{f"RefinerAgent_{i}": f"Candidate {i}: the lighthouse keeper followed the glowing map. " * 15 for i in range(3)},
+    **{f"StoryScorerAgent_{i}": "SCORE: 6/10\n1. Build more tension." for i in range(2)},
+    "StoryScorerAgent_2": "SCORE: 9/10\nAPPROVED",
+}
+
+
+def busy_time(calls) -> float:
+    """Wall-clock time during which at least one model call was in flight (overlapping calls counted once)."""
+    total, end = 0.0, None
+    for started, finished in sorted((c.started, c.finished) for c in calls):
+        if end is None or started > end:
+            total += finished - started
+            end = finished
+        elif finished > end:
+            total += finished - end
+            end = finished
+    return total
+
+
+async def run_once(runner: InMemoryRunner, prompt: str, backend: FakeGeminiBackend) -> dict:
+    """Runs one prompt in a fresh session and returns its measurements."""
+    run_id = uuid.uuid4().hex
+    token = current_run.set(run_id)
+    try:
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id="bench_user")
+        message = types.Content(role="user", parts=[types.Part(text=prompt)])
+        started = time.perf_counter()
+        async for _ in runner.run_async(user_id="bench_user", session_id=session.id, new_message=message):
+            pass
+        wall = time.perf_counter() - started
+    finally:
+        current_run.reset(token)
+
+    calls = [c for c in backend.calls if c.run == run_id]
+    model_time = busy_time(calls)
+    return {
+        "wall_clock_s": wall,
+        "model_calls": len(calls),
+        "prompt_tokens": sum(c.prompt_tokens for c in calls),
+        "response_tokens": sum(c.response_tokens for c in calls),
+        "model_time_s": model_time,
+        "orchestration_overhead_s": max(0.0, wall - model_time),
+    }
+
+
+async def benchmark_workflow(name: str, runs: int, concurrency: int, latency, response_tokens=None) -> dict:
+    builder, prompt = WORKFLOWS[name]
+    backend = FakeGeminiBackend(latency=latency, response_tokens=response_tokens, replies=CANNED_REPLIES)
+    runner = InMemoryRunner(agent=builder(model_factory=backend.model))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            return await run_once(runner, prompt, backend)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited() for _ in range(runs)))
+    total_wall = time.perf_counter() - started
+
+    def mean(key):
+        return statistics.fmean(r[key] for r in results)
+
+    walls = sorted(r["wall_clock_s"] for r in results)
+    return {
+        "runs": runs,
+        "total_wall_clock_s": round(total_wall, 4),
+        "runs_per_s": round(runs / total_wall, 2) if total_wall else None,
+        "wall_clock_s": {
+            "mean": round(mean("wall_clock_s"), 4),
+            "p50": round(walls[len(walls) // 2], 4),
+            "max": round(walls[-1], 4),
+        },
+        "model_calls_per_run": round(mean("model_calls"), 2),
+        "prompt_tokens_per_run": round(mean("prompt_tokens"), 1),
+        "response_tokens_per_run": round(mean("response_tokens"), 1),
+        "model_time_s_per_run": round(mean("model_time_s"), 4),
+        "orchestration_overhead_s_per_run": round(mean("orchestration_overhead_s"), 4),
+        "model_calls_by_agent_total": dict(sorted(_count_by_agent(backend.calls).items())),
+    }
+
+
+def _count_by_agent(calls) -> dict:
+    counts = {}
+    for call in calls:
+        counts[call.agent] = counts.get(call.agent, 0) + 1
+    return counts
+
+
+async def main(args):
+    latency = args.latency
+    if args.flash_latency is not None or args.flash_lite_latency is not None:
+        latency = {
+            "gemini-2.5-flash": args.latency if args.flash_latency is None else args.flash_latency,
+            "gemini-2.5-flash-lite": args.latency if args.flash_lite_latency is None else args.flash_lite_latency,
+        }
+
+    report = {
+        "config": {
+            "runs": args.runs,
+            "concurrency": args.concurrency,
+            "latency_s": latency,
+            "response_tokens": args.response_tokens,
+        },
+        "workflows": {},
+    }
+    for name in args.workflows or WORKFLOWS:
+        print(f"\n⏱️  Benchmarking {name} ...")
+        result = await benchmark_workflow(name, args.runs, args.concurrency, latency, args.response_tokens)
+        report["workflows"][name] = result
+        print(
+            f"   {result['wall_clock_s']['mean']:.3f}s/run, {result['model_calls_per_run']} model calls/run, "
+            f"{result['prompt_tokens_per_run']:.0f} prompt + {result['response_tokens_per_run']:.0f} response tokens/run, "
+            f"{result['orchestration_overhead_s_per_run'] * 1000:.1f}ms overhead/run"
+        )
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+    print(f"\n✅ Results saved to: {args.output}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the Day1 multi-agent workflows.")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per workflow")
+    parser.add_argument("--concurrency", type=int, default=1, help="Runs in flight at the same time")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per model call")
+    parser.add_argument("--flash-latency", type=float, default=None, help="Override for gemini-2.5-flash")
+    parser.add_argument("--flash-lite-latency", type=float, default=None, help="Override for gemini-2.5-flash-lite")
+    parser.add_argument("--response-tokens", type=int, default=None, help="Fixed response tokens per call")
+    parser.add_argument("--workflows", nargs="*", choices=list(WORKFLOWS), help="Subset of workflows to run")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,201 @@
+# Best-of-N refinement loop: several candidate drafts per round instead of one.
+#
+# IterativeStoryRefinement improves a single draft serially (critic -> refiner -> critic ...), so reaching a good story
+# costs one full round-trip pair per iteration. BestOfNLoopAgent runs each round as two concurrent fan-outs:
+#
+#   round k:  [Refiner_0 | Refiner_1 | ... | Refiner_N-1]  ->  [Scorer_0 | Scorer_1 | ... | Scorer_N-1]  ->  keep the best
+#
+# The best candidate goes into `current_story` (and its scorer's feedback into `critique` for the next round), and the
+# loop stops as soon as a candidate reaches `score_threshold`. More candidates per round means fewer serial rounds.
+# Wall-clock time and scores of every round are written to state["refinement_rounds"].
+#
+#   python Day1/sample-agent/best_of_n.py   # serial critic/refiner loop vs best-of-3, on the fake model
+
+import logging
+import re
+import time
+from typing import AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent, LoopAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.utils.context_utils import Aclosing
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+SCORE_PATTERN = re.compile(r"SCORE:\s*(\d+(?:\.\d+)?)", re.IGNORECASE)
+MAX_SCORE = 10.0
+
+
+def parse_score(text: Optional[str]) -> tuple[float, str]:
+    """Splits a scorer reply ("SCORE: 8/10" line + feedback) into (score, feedback), the score clamped to 0-10.
+
+    Replies without a "SCORE:" line are unparseable and score 0 (a number in the feedback is not a score).
+    """
+    text = str(text or "")
+    match = SCORE_PATTERN.search(text)
+    if not match:
+        return 0.0, text.strip()
+    score = min(max(float(match.group(1)), 0.0), MAX_SCORE)
+    rest = re.sub(r"^\s*/\s*\d+", "", text[match.end():])  # The "/10" of "SCORE: 8/10"
+    feedback = (text[:match.start()] + rest).strip()
+    return score, feedback
+
+
+def candidate_key(state_key: str, index: int) -> str:
+    return f"{state_key}_candidate_{index}"
+
+
+def score_key(state_key: str, index: int) -> str:
+    return f"{state_key}_score_{index}"
+
+
+class BestOfNLoopAgent(LoopAgent):
+    """LoopAgent whose rounds fan out N candidate writers and N scorers, then keep the best candidate.
+
+    Build it with build_best_of_n_loop(), which clones the writer and scorer N times and wires their state keys.
+    Each round emits one event whose state_delta carries the winning candidate, its feedback and the round metrics.
+    Not resumable: a paused round is rerun from the start.
+    """
+
+    fan_out: int = 3
+    state_key: str = "current_story"
+    """Where the best candidate is kept (and what the writers refine)."""
+    critique_key: Optional[str] = "critique"
+    """Where the best candidate's scorer feedback is kept for the next round (None = not kept)."""
+    score_threshold: Optional[float] = None
+    """Stop when the best score of a round reaches this value."""
+    metrics_key: str = "refinement_rounds"
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        generate, score = self.sub_agents
+        rounds = list(ctx.session.state.get(self.metrics_key) or [])
+        times_looped = 0
+        while not self.max_iterations or times_looped < self.max_iterations:
+            started = time.perf_counter()
+            for stage in (generate, score):
+                async with Aclosing(stage.run_async(ctx)) as agen:
+                    async for event in agen:
+                        yield event
+                        if event.actions.escalate:
+                            return
+
+            state = ctx.session.state
+            scored = [parse_score(state.get(score_key(self.state_key, i))) for i in range(self.fan_out)]
+            best = max(range(self.fan_out), key=lambda i: scored[i][0])
+            best_score, feedback = scored[best]
+            rounds.append({
+                "round": len(rounds) + 1,
+                "wall_clock_s": round(time.perf_counter() - started, 4),
+                "scores": [s for s, _ in scored],
+                "best": best,
+            })
+            delta = {self.state_key: state.get(candidate_key(self.state_key, best)), self.metrics_key: list(rounds)}
+            if self.critique_key:
+                delta[self.critique_key] = feedback
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta=delta),
+            )
+            logger.info("%s round %d: scores %s, kept candidate %d", self.name, len(rounds), rounds[-1]["scores"], best)
+
+            times_looped += 1
+            if self.score_threshold is not None and best_score >= self.score_threshold:
+                return
+
+
+def build_best_of_n_loop(
+    name: str,
+    writer: LlmAgent,
+    scorer: LlmAgent,
+    fan_out: int = 3,
+    max_iterations: int = 2,
+    state_key: str = "current_story",
+    critique_key: Optional[str] = "critique",
+    score_threshold: Optional[float] = 8,
+) -> BestOfNLoopAgent:
+    """Clones `writer` and `scorer` `fan_out` times and puts them in a BestOfNLoopAgent.
+
+    Args:
+        writer: Produces one candidate (its output_key is replaced per clone).
+        scorer: Rates one candidate. Its instruction refers to the candidate as {candidate} and it must answer
+                with a "SCORE: <0-10>" line followed by its feedback.
+        fan_out: Candidates per round.
+        score_threshold: Stop once a candidate scores at least this much (None = always run max_iterations).
+    """
+    if "{candidate}" not in scorer.instruction:
+        raise ValueError(f"{scorer.name}'s instruction must contain the {{candidate}} placeholder")
+    writers = [
+        writer.clone(update={"name": f"{writer.name}_{i}", "output_key": candidate_key(state_key, i)})
+        for i in range(fan_out)
+    ]
+    scorers = [
+        scorer.clone(update={
+            "name": f"{scorer.name}_{i}",
+            "instruction": scorer.instruction.replace("{candidate}", "{" + candidate_key(state_key, i) + "}"),
+            "output_key": score_key(state_key, i),
+        })
+        for i in range(fan_out)
+    ]
+    return BestOfNLoopAgent(
+        name=name,
+        sub_agents=[
+            ParallelAgent(name=f"{name}Candidates", sub_agents=writers),
+            ParallelAgent(name=f"{name}Scores", sub_agents=scorers),
+        ],
+        fan_out=fan_out,
+        max_iterations=max_iterations,
+        state_key=state_key,
+        critique_key=critique_key,
+        score_threshold=score_threshold,
+    )
+
+
+async def compare_with_serial(runs: int = 3, latency: float = 0.2, fan_out: int = 3):
+    """Serial critic/refiner loop vs best-of-N on the fake model, where more candidates make a good one likelier."""
+    from benchmark_multi_agent import CANNED_REPLIES, run_once
+    from fake_gemini import FakeGeminiBackend
+    from google.adk.runners import InMemoryRunner
+    from multi_agent import STORY_REFINEMENT_PROMPT, build_best_of_n_story_refinement, build_iterative_story_refinement
+
+    replies = dict(CANNED_REPLIES)
+    # The serial loop needs one rewrite before approval; in best-of-N one of the candidates is approved in round 1
+    replies["CriticAgent"] = ["1. Build more tension.", "APPROVED"]
+    replies["RefinerAgent"] = "The lighthouse keeper unfolded the glowing map, and the sea went quiet. " * 15
+    for i in range(fan_out):
+        replies[f"RefinerAgent_{i}"] = f"Candidate story {i}. " * 20
+        replies[f"StoryScorerAgent_{i}"] = f"SCORE: {9 if i == fan_out - 1 else 6}/10\n" + ("APPROVED" if i == fan_out - 1 else "1. Build more tension.")
+
+    results = {}
+    for label, builder in (("serial", build_iterative_story_refinement), (f"best_of_{fan_out}", build_best_of_n_story_refinement)):
+        backend = FakeGeminiBackend(latency=latency, replies=replies)
+        kwargs = {"fan_out": fan_out} if label != "serial" else {}
+        runner = InMemoryRunner(agent=builder(backend.model, **kwargs))
+        measurements = [await run_once(runner, STORY_REFINEMENT_PROMPT, backend) for _ in range(runs)]
+        sessions = await runner.session_service.list_sessions(app_name=runner.app_name, user_id="bench_user")
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="bench_user", session_id=sessions.sessions[0].id
+        )
+        results[label] = {
+            "wall_clock_s_per_run": round(sum(m["wall_clock_s"] for m in measurements) / runs, 3),
+            "model_calls_per_run": sum(m["model_calls"] for m in measurements) / runs,
+            "rounds": session.state.get("refinement_rounds"),
+        }
+
+    print(f"\n📊 Story refinement, {latency}s per model call, {runs} runs")
+    for label, r in results.items():
+        print(f"   {label:<10} {r['wall_clock_s_per_run']}s/run, {r['model_calls_per_run']:.0f} model calls/run")
+        for round_metrics in r["rounds"] or []:
+            print(f"      round {round_metrics['round']}: {round_metrics['wall_clock_s']}s, scores {round_metrics['scores']}")
+    return results
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(compare_with_serial())
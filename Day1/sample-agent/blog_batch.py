@@ -0,0 +1,196 @@
+# Batch mode for the BlogPipeline (OutlineAgent -> WriterAgent -> EditorAgent) from multi_agent.py.
+#
+# Running topics one by one costs N x (outline + write + edit). Here every topic gets its own session
+# (so blog_outline / blog_draft / final_blog never leak between topics) and many topics are in flight at once,
+# but each stage only lets `stage_concurrency[stage]` topics through at a time. While topic k is being written,
+# topic k+1 can be outlined and topic k-1 edited, so throughput is set by the slowest stage instead of the sum.
+#
+#   python Day1/sample-agent/blog_batch.py   # compares serial vs pipelined with the fake model (no API key needed)
+
+import asyncio
+import logging
+import time
+from typing import AsyncGenerator, Iterable, Optional
+
+from google.adk.agents import SequentialAgent
+from google.adk.agents.sequential_agent import SequentialAgentState
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.models.google_llm import Gemini
+from google.adk.runners import InMemoryRunner
+from google.adk.utils.context_utils import Aclosing
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+from multi_agent import build_blog_stages
+print("✅ Blog batch components imported successfully.")
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "BlogBatch"
+USER_ID = "batch_user"
+BLOG_STATE_KEYS = ("blog_outline", "blog_draft", "final_blog")  # output_key of each stage
+
+
+class StagedSequentialAgent(SequentialAgent):
+    """SequentialAgent whose sub-agents each admit a limited number of concurrent invocations.
+
+    On its own it behaves exactly like SequentialAgent. The limits only matter when many invocations
+    run at the same time (see run_blog_batch): each stage then works like a station on an assembly line.
+    """
+
+    stage_concurrency: dict[str, int] = {}
+    """Max concurrent runs per sub-agent name. Sub-agents that are not listed are not limited."""
+
+    _gates: dict = PrivateAttr(default_factory=dict)
+
+    def _gate(self, stage: str) -> Optional[asyncio.Semaphore]:
+        limit = self.stage_concurrency.get(stage)
+        if not limit:
+            return None
+        if stage not in self._gates:
+            self._gates[stage] = asyncio.Semaphore(limit)
+        return self._gates[stage]
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        # SequentialAgent._run_async_impl, with each sub-agent run inside its stage's gate
+        if not self.sub_agents:
+            return
+
+        agent_state = self._load_agent_state(ctx, SequentialAgentState)
+        start_index = self._get_start_index(agent_state)
+
+        pause_invocation = False
+        resuming_sub_agent = agent_state is not None
+        for sub_agent in self.sub_agents[start_index:]:
+            if not resuming_sub_agent and ctx.is_resumable:
+                agent_state = SequentialAgentState(current_sub_agent=sub_agent.name)
+                ctx.set_agent_state(self.name, agent_state=agent_state)
+                yield self._create_agent_state_event(ctx)
+
+            gate = self._gate(sub_agent.name)
+            if gate:
+                await gate.acquire()
+            try:
+                async with Aclosing(sub_agent.run_async(ctx)) as agen:
+                    async for event in agen:
+                        yield event
+                        if ctx.should_pause_invocation(event):
+                            pause_invocation = True
+            finally:
+                if gate:
+                    gate.release()
+
+            # A paused invocation gives its slot back and skips the remaining stages until it is resumed
+            if pause_invocation:
+                return
+            resuming_sub_agent = False
+
+        if ctx.is_resumable:
+            ctx.set_agent_state(self.name, end_of_agent=True)
+            yield self._create_agent_state_event(ctx)
+
+
+def build_staged_blog_pipeline(model_factory=Gemini, outline_concurrency: int = 4, writer_concurrency: int = 4, editor_concurrency: int = 4):
+    stages = build_blog_stages(model_factory)
+    return StagedSequentialAgent(
+        name="BlogPipeline",
+        sub_agents=stages,
+        stage_concurrency={
+            stages[0].name: outline_concurrency,
+            stages[1].name: writer_concurrency,
+            stages[2].name: editor_concurrency,
+        },
+    )
+
+
+async def run_blog_batch(
+    topics: Iterable[str],
+    model_factory=Gemini,
+    outline_concurrency: int = 4,
+    writer_concurrency: int = 4,
+    editor_concurrency: int = 4,
+    max_in_flight: Optional[int] = None,
+) -> list[dict]:
+    """Runs the blog pipeline for every topic with the stages pipelined.
+
+    Args:
+        topics: The topics (one user message each).
+        model_factory: Same signature as Gemini(model=..., retry_options=...).
+        outline_concurrency / writer_concurrency / editor_concurrency: Per-stage limits.
+        max_in_flight: How many topics may be inside the pipeline at once.
+                       Defaults to the sum of the stage limits, which is enough to keep every stage busy.
+
+    Returns:
+        One dict per topic, in input order:
+        {"topic", "blog_outline", "blog_draft", "final_blog", "latency_s", "error"}
+    """
+    root_agent = build_staged_blog_pipeline(model_factory, outline_concurrency, writer_concurrency, editor_concurrency)
+    runner = InMemoryRunner(agent=root_agent, app_name=APP_NAME)
+    session_service = runner.session_service
+    topics = list(topics)
+    results: list[Optional[dict]] = [None] * len(topics)
+    pending = iter(enumerate(topics))
+
+    async def run_topic(index: int, topic: str):
+        started = time.perf_counter()
+        result = {"topic": topic, "error": None}
+        session = None
+        try:
+            session = await session_service.create_session(app_name=APP_NAME, user_id=USER_ID)
+            message = types.Content(role="user", parts=[types.Part(text=topic)])
+            async for _ in runner.run_async(user_id=USER_ID, session_id=session.id, new_message=message):
+                pass
+            session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+            for key in BLOG_STATE_KEYS:
+                result[key] = session.state.get(key)
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            # The outputs are copied into the result, so the session is not needed any more
+            if session is not None:
+                try:
+                    await session_service.delete_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+                except Exception as e:  # Cleanup only: the topic's result stands, and the worker goes on
+                    logger.warning("Could not delete the session of topic %r: %r", topic, e)
+        result["latency_s"] = time.perf_counter() - started
+        results[index] = result
+
+    async def worker():
+        for index, topic in pending:  # Shared iterator: each topic is taken by exactly one worker
+            await run_topic(index, topic)
+
+    workers = max_in_flight or (outline_concurrency + writer_concurrency + editor_concurrency)
+    await asyncio.gather(*(worker() for _ in range(min(workers, len(topics)) or 1)))
+    return results
+
+
+async def compare_with_serial(num_topics: int = 24, latency: float = 0.05):
+    """Runs the same topics through the plain SequentialAgent (one at a time) and through run_blog_batch."""
+    from fake_gemini import FakeGeminiBackend
+    from multi_agent import build_blog_post_creation
+
+    topics = [f"Blog post topic #{i}" for i in range(num_topics)]
+
+    backend = FakeGeminiBackend(latency=latency)
+    runner = InMemoryRunner(agent=build_blog_post_creation(backend.model))
+    started = time.perf_counter()
+    for topic in topics:
+        await runner.run_debug(topic, session_id=f"serial-{topic}", quiet=True)
+    serial = time.perf_counter() - started
+
+    backend = FakeGeminiBackend(latency=latency)
+    started = time.perf_counter()
+    results = await run_blog_batch(topics, backend.model, outline_concurrency=1, writer_concurrency=1, editor_concurrency=1)
+    pipelined = time.perf_counter() - started
+
+    failed = sum(1 for r in results if r["error"])
+    print(f"\n📊 {num_topics} topics, {latency}s per model call")
+    print(f"   Serial:    {serial:.2f}s ({num_topics / serial:.1f} topics/s)")
+    print(f"   Pipelined: {pipelined:.2f}s ({num_topics / pipelined:.1f} topics/s), 1 slot per stage, {failed} failed")
+
+
+if __name__ == "__main__":
+    asyncio.run(compare_with_serial())
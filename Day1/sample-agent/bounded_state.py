@@ -0,0 +1,232 @@
+# Size-bounded state placeholders for agent instructions.
+#
+# AggregatorAgent gets {tech_research}, {health_research} and {finance_research} pasted into its instruction verbatim,
+# and WriterAgent / EditorAgent do the same with {blog_outline} / {blog_draft}. A chatty upstream agent makes every
+# downstream prompt (and its latency) grow without limit. PlaceholderBudgets caps each placeholder, in characters or
+# estimated tokens, with one of three policies:
+#   "truncate"    keep the beginning, drop the rest
+#   "head_tail"   keep the beginning and the end, drop the middle (conclusions usually live at the end)
+#   "extractive"  keep the highest-scoring sentences (word-frequency scoring, no model call), in their original order
+#
+#   budgets = PlaceholderBudgets({"tech_research": Budget(max_tokens=150, policy="extractive")})
+#   Agent(..., instruction=budgets.instruction("Combine these findings: {tech_research} ..."))
+#   ...
+#   print(budgets.metrics())   # tokens saved per policy and per placeholder
+#
+#   python Day1/sample-agent/bounded_state.py   # chatty researchers with and without budgets, on the fake model
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.utils.instructions_utils import inject_session_state
+
+CHARS_PER_TOKEN = 4  # Same rough estimate as fake_gemini.py
+POLICIES = ("truncate", "head_tail", "extractive")
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was were will with".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)  # Rounded up
+
+
+@dataclass
+class Budget:
+    """Size cap for one placeholder. If both limits are given, the smaller one wins."""
+    max_chars: Optional[int] = None
+    max_tokens: Optional[int] = None
+    policy: str = "head_tail"
+
+    def __post_init__(self):
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown policy {self.policy!r}, expected one of {POLICIES}")
+        if self.max_chars is None and self.max_tokens is None:
+            raise ValueError("Budget needs max_chars or max_tokens")
+
+    @property
+    def char_limit(self) -> int:
+        limits = [self.max_chars, self.max_tokens * CHARS_PER_TOKEN if self.max_tokens is not None else None]
+        return min(limit for limit in limits if limit is not None)
+
+
+def truncate(text: str, limit: int) -> str:
+    marker = " …[truncated]"
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit - len(marker))].rstrip() + marker
+
+
+def head_tail(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    marker = "\n…[{} chars omitted]…\n"
+    keep = max(0, limit - len(marker.format(len(text))))
+    head, tail = text[:keep - keep // 2], text[len(text) - keep // 2:] if keep // 2 else ""
+    return head.rstrip() + marker.format(len(text) - len(head) - len(tail)) + tail.lstrip()
+
+
+def extractive_summary(text: str, limit: int) -> str:
+    """Keeps the sentences with the most frequent content words until `limit` chars, in their original order."""
+    if len(text) <= limit:
+        return text
+    sentences = [s.strip() for s in SENTENCE_SPLIT.split(text) if s.strip()]
+    frequencies = Counter(w for w in WORD.findall(text.lower()) if w not in STOPWORDS)
+
+    def score(index: int, sentence: str) -> float:
+        words = [w for w in WORD.findall(sentence.lower()) if w not in STOPWORDS]
+        if not words:
+            return 0.0
+        # Average frequency, so long sentences are not favoured; the first sentence usually carries the topic
+        return sum(frequencies[w] for w in set(words)) / len(set(words)) + (1.0 if index == 0 else 0.0)
+
+    ranked = sorted(enumerate(sentences), key=lambda item: score(*item), reverse=True)
+    chosen, used, seen = [], 0, set()
+    for index, sentence in ranked:
+        if sentence in seen:  # Repeated sentences add no information
+            continue
+        cost = len(sentence) + 1
+        if used + cost > limit:
+            continue
+        chosen.append(index)
+        seen.add(sentence)
+        used += cost
+    if not chosen:
+        return truncate(text, limit)
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+APPLY = {"truncate": truncate, "head_tail": head_tail, "extractive": extractive_summary}
+
+
+@dataclass
+class InjectionStats:
+    injections: int = 0
+    bounded: int = 0  # Injections where the value was over budget
+    original_tokens: int = 0
+    injected_tokens: int = 0
+
+    def add(self, original: str, injected: str):
+        self.injections += 1
+        self.bounded += 0 if original == injected else 1
+        self.original_tokens += estimate_tokens(original)
+        self.injected_tokens += estimate_tokens(injected)
+
+    def as_dict(self) -> dict:
+        return {**self.__dict__, "tokens_saved": self.original_tokens - self.injected_tokens}
+
+
+@dataclass
+class PlaceholderBudgets:
+    """Per-placeholder budgets, shared by every instruction built with `instruction()`.
+
+    Args:
+        budgets: {state_key: Budget}. Placeholders without a budget are injected as usual.
+    """
+    budgets: dict = field(default_factory=dict)
+    _by_policy: dict = field(default_factory=dict, init=False, repr=False)
+    _by_key: dict = field(default_factory=dict, init=False, repr=False)
+
+    def bound(self, key: str, value) -> str:
+        """Applies the budget of `key` to a state value and records the savings."""
+        text = str(value)
+        budget = self.budgets.get(key)
+        if budget is None:
+            return text
+        bounded = APPLY[budget.policy](text, budget.char_limit)
+        self._by_policy.setdefault(budget.policy, InjectionStats()).add(text, bounded)
+        self._by_key.setdefault(key, InjectionStats()).add(text, bounded)
+        return bounded
+
+    def instruction(self, template: str):
+        """Returns an instruction provider for `template` with the budgeted placeholders bounded.
+
+        Budgeted placeholders can be required ({key}) or optional ({key?}, empty when the key is not in state).
+        The other placeholders ({key}, {key?}, {artifact.name}) are filled in by ADK's inject_session_state,
+        exactly as they would be for a plain string instruction.
+        """
+        placeholders = [(key, optional) for key in self.budgets for optional in (False, True)
+                        if "{" + key + ("?" if optional else "") + "}" in template]
+
+        async def provider(context: ReadonlyContext) -> str:
+            # Swap budgeted placeholders for markers first, so braces inside state values are never re-parsed
+            markers = {(key, optional): f"\x00{key}{'?' if optional else ''}\x00" for key, optional in placeholders}
+            text = template
+            for (key, optional), marker in markers.items():
+                text = text.replace("{" + key + ("?" if optional else "") + "}", marker)
+            text = await inject_session_state(text, context)
+            for (key, optional), marker in markers.items():
+                if key in context.state:
+                    value = self.bound(key, context.state[key])
+                elif optional:
+                    value = ""
+                else:
+                    raise KeyError(f"Context variable not found: `{key}`.")
+                text = text.replace(marker, value)
+            return text
+
+        return provider
+
+    def metrics(self) -> dict:
+        """Injections and estimated tokens saved, per policy and per placeholder."""
+        return {
+            "by_policy": {policy: s.as_dict() for policy, s in sorted(self._by_policy.items())},
+            "by_placeholder": {key: s.as_dict() for key, s in sorted(self._by_key.items())},
+        }
+
+
+def bounded_instruction(template: str, budgets: Optional[PlaceholderBudgets]):
+    """`template` itself when there are no budgets (plain ADK injection), else a bounded instruction provider."""
+    return budgets.instruction(template) if budgets else template
+
+
+def default_budgets() -> PlaceholderBudgets:
+    """Budgets for the placeholders used in multi_agent.py, sized well above what the instructions ask for
+    (100-word research reports, a 200-300 word draft), so they only kick in when an agent rambles."""
+    return PlaceholderBudgets({
+        "tech_research": Budget(max_tokens=250, policy="extractive"),
+        "health_research": Budget(max_tokens=250, policy="extractive"),
+        "finance_research": Budget(max_tokens=250, policy="extractive"),
+        "blog_outline": Budget(max_tokens=400, policy="head_tail"),
+        "blog_draft": Budget(max_tokens=800, policy="head_tail"),
+    })
+
+
+async def compare_policies(latency: float = 0.01):
+    """Runs ParallelMultiTopicResearch with very chatty researchers, without budgets and with each policy."""
+    from benchmark_multi_agent import CANNED_REPLIES
+    from fake_gemini import FakeGeminiBackend
+    from google.adk.runners import InMemoryRunner
+    from multi_agent import PARALLEL_RESEARCH_QUERY, build_parallel_multi_topic_research
+
+    chatty = dict(CANNED_REPLIES)
+    for agent, topic in (("TechResearcher", "AI"), ("HealthResearcher", "medicine"), ("FinanceResearcher", "fintech")):
+        chatty[agent] = " ".join(
+            f"Development {i} in {topic} is driven by company {i % 5} and matters for {topic} adoption." for i in range(120)
+        )
+
+    print(f"\n📊 AggregatorAgent prompt with ~{estimate_tokens(chatty['TechResearcher'])} tokens per research report")
+    for policy in (None,) + POLICIES:
+        budgets = None
+        if policy:
+            budgets = PlaceholderBudgets({
+                key: Budget(max_tokens=250, policy=policy) for key in ("tech_research", "health_research", "finance_research")
+            })
+        backend = FakeGeminiBackend(latency=latency, replies=chatty)
+        runner = InMemoryRunner(agent=build_parallel_multi_topic_research(backend.model, placeholder_budgets=budgets))
+        await runner.run_debug(PARALLEL_RESEARCH_QUERY, quiet=True)
+        aggregator = next(c for c in backend.calls if c.agent == "AggregatorAgent")
+        saved = budgets.metrics()["by_policy"][policy]["tokens_saved"] if budgets else 0
+        print(f"   {policy or 'no budget':<11} aggregator prompt {aggregator.prompt_tokens:>6} tokens, {saved} saved in the instruction")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(compare_policies())
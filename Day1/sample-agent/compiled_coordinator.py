@@ -0,0 +1,96 @@
+# "Compiled" mode for AgentTool-based coordinators.
+#
+# ResearchCoordinator's instruction already fixes the order ("you MUST call ResearchAgent ... then SummarizerAgent"),
+# yet the coordinator model still spends a turn deciding each call and one more to answer:
+#   LLM-driven: Coordinator -> ResearchAgent -> Coordinator -> SummarizerAgent -> Coordinator   (5 model calls)
+# compile_coordinator() turns that into a static plan that runs the wrapped agents directly in the same session
+# (their output_key state flows from one step to the next) and only uses the coordinator's model for the answer:
+#   Compiled:   ResearchAgent -> SummarizerAgent -> CoordinatorAnswer                          (3 model calls)
+#
+#   python Day1/sample-agent/compiled_coordinator.py   # compares both paths with the fake model
+
+import asyncio
+from typing import Optional
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.tools import AgentTool
+
+DEFAULT_FINAL_INSTRUCTION = """You are {name}. The workflow steps have already been run for the user's request and their results are in the conversation above.
+Present the final result clearly to the user as your response."""
+
+
+def compile_coordinator(
+    coordinator: LlmAgent,
+    steps: Optional[list[str]] = None,
+    final_instruction: Optional[str] = None,
+    final_answer: bool = True,
+) -> SequentialAgent:
+    """Turns a coordinator that calls AgentTools in a fixed order into a SequentialAgent.
+
+    Args:
+        coordinator: The LlmAgent whose `tools` are AgentTool(...) wrappers.
+        steps: Names of the wrapped agents in the order to run them (default: the order of `tools`).
+        final_instruction: Instruction for the final answer turn, which runs on the coordinator's model.
+                           State placeholders such as {final_summary} can be used.
+        final_answer: If False, the last step's output is the answer and the coordinator model is not called at all.
+
+    Returns:
+        A SequentialAgent with the coordinator's name that can replace it as the root agent.
+    """
+    agent_tools = {tool.agent.name: tool for tool in coordinator.tools if isinstance(tool, AgentTool)}
+    steps = steps or list(agent_tools)
+    missing = [name for name in steps if name not in agent_tools]
+    if missing:
+        raise ValueError(f"{coordinator.name} has no AgentTool for: {', '.join(missing)}")
+    if len(agent_tools) != len(coordinator.tools):
+        # Plain tools would need the coordinator model to decide when to call them, which is what we are removing
+        raise ValueError(f"{coordinator.name} has tools that are not AgentTools and cannot be compiled")
+
+    plan = [agent_tools[name].agent for name in steps]
+    if final_answer:
+        plan.append(
+            LlmAgent(
+                name=f"{coordinator.name}Answer",
+                model=coordinator.model,
+                description=coordinator.description,
+                instruction=final_instruction or DEFAULT_FINAL_INSTRUCTION.format(name=coordinator.name),
+                output_key=coordinator.output_key,
+            )
+        )
+    return SequentialAgent(name=coordinator.name, description=coordinator.description, sub_agents=plan)
+
+
+async def compare_with_llm_driven(runs: int = 5, latency: float = 0.05):
+    """Runs ResearchSummarize both ways on the fake model and checks they end in the same state."""
+    from benchmark_multi_agent import CANNED_REPLIES, run_once
+    from fake_gemini import FakeGeminiBackend
+    from google.adk.runners import InMemoryRunner
+    from multi_agent import RESEARCH_SUMMARIZE_QUERY, build_research_summarize
+
+    results = {}
+    for compiled in (False, True):
+        backend = FakeGeminiBackend(latency=latency, replies=CANNED_REPLIES)
+        runner = InMemoryRunner(agent=build_research_summarize(backend.model, compiled=compiled))
+        measurements = [await run_once(runner, RESEARCH_SUMMARIZE_QUERY, backend) for _ in range(runs)]
+        sessions = await runner.session_service.list_sessions(app_name=runner.app_name, user_id="bench_user")
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="bench_user", session_id=sessions.sessions[0].id
+        )
+        results["compiled" if compiled else "llm_driven"] = {
+            "model_calls_per_run": sum(m["model_calls"] for m in measurements) / runs,
+            "wall_clock_s_per_run": sum(m["wall_clock_s"] for m in measurements) / runs,
+            "state_keys": sorted(k for k in session.state if not k.startswith("_")),
+        }
+
+    llm, compiled = results["llm_driven"], results["compiled"]
+    print(f"\n📊 ResearchSummarize over {runs} runs")
+    for name, r in results.items():
+        print(f"   {name:<11} {r['model_calls_per_run']:.1f} model calls/run, {r['wall_clock_s_per_run']:.3f}s/run, state: {r['state_keys']}")
+    assert compiled["model_calls_per_run"] < llm["model_calls_per_run"], "compiled plan should need fewer model calls"
+    assert set(llm["state_keys"]) <= set(compiled["state_keys"]), "compiled plan should produce the same state"
+    print("✅ Compiled plan matches the LLM-driven path with fewer model calls.")
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(compare_with_llm_driven())
@@ -0,0 +1,161 @@
+# A local stand-in for Gemini so the multi-agent workflows can be run (and benchmarked) without an API key.
+# Usage: build the agents with `model_factory=backend.model` instead of the default Gemini class.
+#
+#   backend = FakeGeminiBackend(latency={"gemini-2.5-flash": 0.2}, replies={"CriticAgent": ["Fix the ending.", "APPROVED"]})
+#   root_agent = build_blog_post_creation(model_factory=backend.model)
+
+import asyncio
+import contextvars
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+# ADK's identity processor puts this line into every LlmAgent's system instruction
+AGENT_NAME_PATTERN = re.compile(r'Your internal name is "([^"]+)"')
+
+CHARS_PER_TOKEN = 4  # Rough estimate used when no fixed token count is configured
+
+# Lets concurrent runs tag their model calls (asyncio tasks inherit the context, so ParallelAgent branches do too)
+current_run = contextvars.ContextVar("current_run", default=None)
+
+# A reply can be plain text, a ready-made Content (e.g. a function call) or a callable that builds either from the request
+Reply = Union[str, types.Content, Callable[[LlmRequest], Union[str, types.Content]]]
+
+
+def call_tool(name: str, **args) -> types.Content:
+    """Canned reply that makes the model call a tool (FunctionTool, AgentTool, ...)."""
+    return types.Content(role="model", parts=[types.Part(function_call=types.FunctionCall(name=name, args=args))])
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN) if text else 0
+
+
+def agent_name_of(llm_request: LlmRequest) -> str:
+    """Finds the name of the agent that sent the request (from its system instruction)."""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    match = AGENT_NAME_PATTERN.search(str(instruction or ""))
+    return match.group(1) if match else "unknown"
+
+
+def own_turn_of(llm_request: LlmRequest) -> int:
+    """How many times this agent already answered in the conversation it is sending.
+
+    Other agents' outputs reach the model as user content ("For context: ..."), so counting
+    the model-role contents gives a per-conversation turn index that is safe under concurrency.
+    """
+    return sum(1 for content in llm_request.contents if content.role == "model")
+
+
+def request_text(llm_request: LlmRequest) -> str:
+    """Everything that would be sent to the model: instruction, contents and tool declarations."""
+    chunks = [str(llm_request.config.system_instruction or "")] if llm_request.config else []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                chunks.append(part.text)
+            if part.function_call:
+                chunks.append(f"{part.function_call.name}({part.function_call.args})")
+            if part.function_response:
+                chunks.append(f"{part.function_response.name} -> {part.function_response.response}")
+            if part.executable_code:
+                chunks.append(part.executable_code.code or "")
+            if part.code_execution_result:
+                chunks.append(part.code_execution_result.output or "")
+    for tool in (llm_request.config.tools or []) if llm_request.config else []:
+        for declaration in getattr(tool, "function_declarations", None) or []:
+            chunks.append(f"{declaration.name}: {declaration.description}")
+    return "\n".join(chunks)
+
+
+@dataclass
+class ModelCall:
+    """One simulated model round-trip, as seen by the benchmark."""
+    run: Optional[str]
+    agent: str
+    model: str
+    prompt_tokens: int
+    response_tokens: int
+    started: float
+    finished: float
+
+
+@dataclass
+class FakeGeminiBackend:
+    """Shared configuration and call log for every FakeGemini instance created through `model()`.
+
+    Args:
+        latency: Seconds per call, either one number or a {model_name: seconds} mapping.
+        response_tokens: Fixed number of response tokens per call (None = estimate from the reply text).
+        replies: {agent_name: reply or list of replies}. A list is indexed by the agent's own turn
+                 in the conversation; the last entry repeats.
+        default_reply: Used for agents without an entry in `replies`.
+    """
+    latency: Union[float, dict] = 0.0
+    response_tokens: Optional[int] = None
+    replies: dict = field(default_factory=dict)
+    default_reply: Reply = "Canned reply from {agent}."
+    calls: list = field(default_factory=list)
+
+    def model(self, model: str, retry_options: Optional[types.HttpRetryOptions] = None, **kwargs) -> "FakeGemini":
+        """Drop-in for Gemini(model=..., retry_options=...)."""
+        return FakeGemini(model=model, backend=self)
+
+    def latency_for(self, model: str) -> float:
+        if isinstance(self.latency, dict):
+            return self.latency.get(model, 0.0)
+        return self.latency
+
+    def reply_for(self, agent: str, llm_request: LlmRequest) -> types.Content:
+        reply = self.replies.get(agent, self.default_reply)
+        if isinstance(reply, list):
+            reply = reply[min(own_turn_of(llm_request), len(reply) - 1)]
+        if callable(reply):
+            reply = reply(llm_request)
+        if isinstance(reply, str):
+            reply = types.Content(role="model", parts=[types.Part(text=reply.format(agent=agent))])
+        return reply
+
+    def reset(self):
+        self.calls.clear()
+
+
+class FakeGemini(BaseLlm):
+    """BaseLlm that answers from the backend's canned replies after a simulated delay."""
+
+    backend: FakeGeminiBackend
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        started = time.perf_counter()
+        agent = agent_name_of(llm_request)
+        content = self.backend.reply_for(agent, llm_request)
+
+        await asyncio.sleep(self.backend.latency_for(self.model))
+
+        prompt_tokens = estimate_tokens(request_text(llm_request))
+        response_tokens = self.backend.response_tokens
+        if response_tokens is None:
+            # Generated code is billed as output too
+            response_tokens = estimate_tokens("".join(
+                (part.text or "") + (part.executable_code.code if part.executable_code else "") for part in content.parts
+            ))
+        self.backend.calls.append(
+            ModelCall(current_run.get(), agent, self.model, prompt_tokens, response_tokens, started, time.perf_counter())
+        )
+
+        yield LlmResponse(
+            content=content,
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=response_tokens,
+                total_token_count=prompt_tokens + response_tokens,
+            ),
+        )
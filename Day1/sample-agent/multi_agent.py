@@ -9,6 +9,18 @@ from google.adk.tools import AgentTool, FunctionTool, google_search
 from google.genai import types
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
+from best_of_n import build_best_of_n_loop
+from bounded_state import bounded_instruction, default_budgets
+from compiled_coordinator import compile_coordinator
+from predicate_loop import PredicateLoopAgent, state_equals
+from rate_limit_scheduler import ModelScheduler
+
 # agent automatically retries if something goes wrong
 retry_config=types.HttpRetryOptions(
     attempts=5,  # Maximum retry attempts
@@ -17,14 +29,22 @@ retry_config=types.HttpRetryOptions(
     http_status_codes=[429, 500, 503, 504] # Retry on these HTTP errors
 )
 
-async def ResearchSummarize():
-        
+# Prompts used by the example runs below (and by benchmark_multi_agent.py)
+RESEARCH_SUMMARIZE_QUERY = "What are the latest advancements in quantum computing and what do they mean for AI?"
+BLOG_POST_TOPIC = "Write a blog post about the benefits of multi-agent systems for software developers"
+PARALLEL_RESEARCH_QUERY = "Run the daily executive briefing on Tech, Health, and Finance"
+STORY_REFINEMENT_PROMPT = "Write a short horror story about a lighthouse keeper who discovers a mysterious, glowing map"
+
+
+# Every build_* function takes a `model_factory` with the same signature as Gemini(model=..., retry_options=...),
+# so the same agent graph can be wired to a stand-in model (see fake_gemini.py) without touching the agents.
+def build_research_summarize(model_factory=Gemini, compiled=False):
     """Example: Research and Summarization system."""
     # Uses a root_agent and makes a sequential call to agents as mentioned in its instructions. (not reliable since the LLM decides to when use the tool)
 
     research_agent = Agent(
         name="ResearchAgent",
-        model=Gemini(
+        model=model_factory(
             model='gemini-2.5-flash',
             retry_options=retry_config
         ),
@@ -36,7 +56,7 @@ async def ResearchSummarize():
 
     summarizer_agent = Agent(
         name="SummarizerAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -48,7 +68,7 @@ async def ResearchSummarize():
     
     root_agent = Agent(
         name="ResearchCoordinator",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -61,16 +81,32 @@ async def ResearchSummarize():
         tools=[AgentTool(research_agent), AgentTool(summarizer_agent)],
     )
     print("✅ ResearchCordinator_agent created.")
+
+    if compiled:
+        # The step order is fixed by the instruction, so run the wrapped agents directly and only use the
+        # coordinator's model for the final answer (see compiled_coordinator.py)
+        root_agent = compile_coordinator(
+            root_agent,
+            steps=["ResearchAgent", "SummarizerAgent"],
+            final_instruction="""You are a research coordinator. The research and summary steps have already been run.
+            Summary: {final_summary}
+
+            Present the final summary clearly to the user as your response.""",
+        )
+        print("✅ ResearchCoordinator compiled into a static plan.")
+    return root_agent
+
+
+async def ResearchSummarize(compiled=False):
+    root_agent = build_research_summarize(compiled=compiled)
     
     runner = InMemoryRunner(agent=root_agent)
     print("✅ Runner created.")
     
-    response = await runner.run_debug(
-        "What are the latest advancements in quantum computing and what do they mean for AI?"
-    )    
+    response = await runner.run_debug(RESEARCH_SUMMARIZE_QUERY)
     
 
-async def BlogPostCreation():
+def build_blog_stages(model_factory=Gemini, placeholder_budgets=None):
     
     """Let's build a system with three specialized agents:
         Outline Agent - Creates a blog outline for a given topic
@@ -82,7 +118,7 @@ async def BlogPostCreation():
     # Outline Agent: Creates the initial blog post outline.
     outline_agent = Agent(
         name="OutlineAgent",
-        model=Gemini(
+        model=model_factory(
             model='gemini-2.5-flash',
             retry_options=retry_config
         ),
@@ -98,13 +134,13 @@ async def BlogPostCreation():
     # Writer Agent: Writes the full blog post based on the outline from the previous agent.
     writer_agent = Agent(
         name="WriterAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
         # The `{blog_outline}` placeholder automatically injects the state value from the previous agent's output.
-        instruction="""Following this outline strictly: {blog_outline}
-        Write a brief, 200 to 300-word blog post with an engaging and informative tone.""",
+        instruction=bounded_instruction("""Following this outline strictly: {blog_outline}
+        Write a brief, 200 to 300-word blog post with an engaging and informative tone.""", placeholder_budgets),
         output_key="blog_draft",  # The result of this agent will be stored with this key.
     )
     print("✅ writer_agent created.")
@@ -112,31 +148,39 @@ async def BlogPostCreation():
     # Editor Agent: Edits and polishes the draft from the writer agent.
     editor_agent = Agent(
         name="EditorAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
         # This agent receives the `{blog_draft}` from the writer agent's output.
-        instruction="""Edit this draft: {blog_draft}
-        Your task is to polish the text by fixing any grammatical errors, improving the flow and sentence structure, and enhancing overall clarity.""",
+        instruction=bounded_instruction("""Edit this draft: {blog_draft}
+        Your task is to polish the text by fixing any grammatical errors, improving the flow and sentence structure, and enhancing overall clarity.""", placeholder_budgets),
         output_key="final_blog",  # This is the final output of the entire pipeline.
     )
     print("✅ editor_agent created.")
-    
+    return [outline_agent, writer_agent, editor_agent]
+
+
+def build_blog_post_creation(model_factory=Gemini, placeholder_budgets=None):
     # All the agents will have to execute sequentially after one and another
     root_agent = SequentialAgent(
         name="BlogPipeline",
-        sub_agents=[outline_agent, writer_agent, editor_agent],
+        sub_agents=build_blog_stages(model_factory, placeholder_budgets),
     )
     print("✅ Sequential Agent created.")
+    return root_agent
+
+
+async def BlogPostCreation():
+    budgets = default_budgets()  # Caps {blog_outline} / {blog_draft} if an upstream agent rambles
+    root_agent = build_blog_post_creation(placeholder_budgets=budgets)
     
     runner = InMemoryRunner(agent=root_agent)
-    response = await runner.run_debug(
-        "Write a blog post about the benefits of multi-agent systems for software developers"
-    )
+    response = await runner.run_debug(BLOG_POST_TOPIC)
+    print(f"📊 Placeholder budgets: {budgets.metrics()['by_policy']}")
 
 
-async def ParallelMultiTopicResearch():
+def build_parallel_multi_topic_research(model_factory=Gemini, placeholder_budgets=None):
     """Let's build a system with four agents:
         Tech Researcher - Researches AI/ML news and trends
         Health Researcher - Researches recent medical news and trends
@@ -148,7 +192,7 @@ async def ParallelMultiTopicResearch():
     # Tech Researcher: Focuses on AI and ML trends.
     tech_researcher = Agent(
         name="TechResearcher",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -161,7 +205,7 @@ async def ParallelMultiTopicResearch():
     # Health Researcher: Focuses on medical breakthroughs.
     health_researcher = Agent(
         name="HealthResearcher",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -174,7 +218,7 @@ async def ParallelMultiTopicResearch():
     # Finance Researcher: Focuses on fintech trends.
     finance_researcher = Agent(
         name="FinanceResearcher",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -187,12 +231,13 @@ async def ParallelMultiTopicResearch():
     # The AggregatorAgent runs *after* the parallel step to synthesize the results.
     aggregator_agent = Agent(
         name="AggregatorAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
         # It uses placeholders to inject the outputs from the parallel agents, which are now in the session state.
-        instruction="""Combine these three research findings into a single executive summary:
+        # With placeholder_budgets, each one is capped so a chatty researcher cannot blow up this prompt (see bounded_state.py).
+        instruction=bounded_instruction("""Combine these three research findings into a single executive summary:
 
         **Technology Trends:**
         {tech_research}
@@ -203,7 +248,7 @@ async def ParallelMultiTopicResearch():
         **Finance Innovations:**
         {finance_research}
         
-        Your summary should highlight common themes, surprising connections, and the most important key takeaways from all three reports. The final summary should be around 200 words.""",
+        Your summary should highlight common themes, surprising connections, and the most important key takeaways from all three reports. The final summary should be around 200 words.""", placeholder_budgets),
         output_key="executive_summary",  # This will be the final output of the entire system.
     )
     print("✅ aggregator_agent created.")
@@ -221,14 +266,23 @@ async def ParallelMultiTopicResearch():
         sub_agents=[parallel_research_team, aggregator_agent],
     )
     print("✅ Parallel and Sequential Agents created.")
+    return root_agent
+
+
+async def ParallelMultiTopicResearch():
+    # All parallel branches share one scheduler, so they queue for the per-model RPM budget instead of
+    # hitting 429s together and falling into the exp_base=7 retry backoff (see rate_limit_scheduler.py)
+    scheduler = ModelScheduler(max_concurrency=3)
+    budgets = default_budgets()
+    root_agent = build_parallel_multi_topic_research(model_factory=scheduler.model_factory(), placeholder_budgets=budgets)
         
     runner = InMemoryRunner(agent=root_agent)
-    response = await runner.run_debug(
-        "Run the daily executive briefing on Tech, Health, and Finance"
-    )
+    response = await runner.run_debug(PARALLEL_RESEARCH_QUERY)
+    print(f"📊 Scheduler metrics: {scheduler.metrics()}")
+    print(f"📊 Placeholder budgets: {budgets.metrics()['by_policy']}")
    
    
-async def IterativeStoryRefinement():
+def build_iterative_story_refinement(model_factory=Gemini, exit_predicate=True):
     """Let's build a system with two agents:
         Writer Agent - Writes a draft of a short story
         Critic Agent - Reviews and critiques the short story to suggest improvements"""
@@ -236,7 +290,7 @@ async def IterativeStoryRefinement():
     # This agent runs ONCE at the beginning to create the first draft.
     initial_writer_agent = Agent(
         name="InitialWriterAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -249,7 +303,7 @@ async def IterativeStoryRefinement():
     # This agent's only job is to provide feedback or the approval signal. It has no tools.
     critic_agent = Agent(
         name="CriticAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
@@ -263,59 +317,157 @@ async def IterativeStoryRefinement():
     )
     print("✅ critic_agent created.")
     
-    # This is the function that the RefinerAgent will call to exit the loop.
-    def exit_loop():
-        """Called ONLY when the critique is 'APPROVED'. Returning a termination sentinel so an outer loop (LoopAgent) can decide to stop iterating if it inspects tool output.
-
-        If the underlying LoopAgent implementation does not automatically stop, you can instead replace the LoopAgent usage with a manual loop that checks for this flag.
-        """
-        return {
-            "status": "approved",
-            "message": "Story approved. Exiting refinement loop.",
-            "terminate_loop": True  # Sentinel flag for early stopping
-        }
-    print("✅ exit_loop function created.")
+    if exit_predicate:
+        # The loop itself checks the critique after every sub-agent, so "APPROVED" ends it right after the
+        # CriticAgent turn. The RefinerAgent only ever rewrites and does not need the exit_loop tool (no extra LLM call).
+        refiner_agent = Agent(
+            name="RefinerAgent",
+            model=model_factory(
+                model="gemini-2.5-flash-lite",
+                retry_options=retry_config
+            ),
+            instruction="""You are a story refiner. You have a story draft and critique.
+
+            Story Draft: {current_story}
+            Critique: {critique}
+
+            Your task: rewrite the story draft incorporating the feedback. Output only the story text.""",
+            output_key="current_story",  # It overwrites the story with the new, refined version.
+        )
+        print("✅ refiner_agent created.")
+
+        # Critic -> Refiner, stopping as soon as state['critique'].strip() == 'APPROVED'
+        story_refinement_loop = PredicateLoopAgent(
+            name="StoryRefinementLoop",
+            sub_agents=[critic_agent, refiner_agent],
+            max_iterations=2,  # Prevents infinite loops
+            exit_when=state_equals("critique", "APPROVED"),
+        )
+    else:
+        # This is the function that the RefinerAgent will call to exit the loop.
+        def exit_loop():
+            """Called ONLY when the critique is 'APPROVED'. Returning a termination sentinel so an outer loop (LoopAgent) can decide to stop iterating if it inspects tool output.
+
+            If the underlying LoopAgent implementation does not automatically stop, you can instead replace the LoopAgent usage with a manual loop that checks for this flag.
+            """
+            return {
+                "status": "approved",
+                "message": "Story approved. Exiting refinement loop.",
+                "terminate_loop": True  # Sentinel flag for early stopping
+            }
+        print("✅ exit_loop function created.")
+        
+        # This agent refines the story based on critique OR calls the exit_loop function.
+        refiner_agent = Agent(
+            name="RefinerAgent",
+            model=model_factory(
+                model="gemini-2.5-flash-lite",
+                retry_options=retry_config
+            ),
+            instruction="""You are a story refiner. You have a story draft and critique.
+
+            Story Draft: {current_story}
+            Critique: {critique}
+
+            Your task:
+            - If the critique is EXACTLY "APPROVED" and not previously terminated, CALL the `exit_loop` function and do NOTHING else.
+            - Otherwise, rewrite the story draft incorporating the feedback.
+
+            IMPORTANT: Never modify an already approved story. Only call the tool once. If state already contains a prior approval (e.g., terminate_loop=True), do not call the tool again and simply return the existing story unchanged.""",
+            output_key="current_story",  # It overwrites the story with the new, refined version.
+            tools=[FunctionTool(exit_loop)]  # The tool is now correctly initialized with the function reference.
+        )
+        print("✅ refiner_agent created.")
+    
+        # The LoopAgent contains the agents that will run repeatedly: Critic -> Refiner.
+        story_refinement_loop = LoopAgent(
+            name="StoryRefinementLoop",
+            sub_agents=[critic_agent, refiner_agent],
+            max_iterations=2,  # Prevents infinite loops
+        )
+    
+    # The root agent is a SequentialAgent that defines the overall workflow: Initial Write -> Refinement Loop.
+    root_agent = SequentialAgent(
+        name="StoryPipeline",
+        sub_agents=[initial_writer_agent, story_refinement_loop],
+    )
+    print("✅ Loop and Sequential Agents created.")
+    return root_agent
+
+
+def build_best_of_n_story_refinement(model_factory=Gemini, fan_out=3):
+    """Same story pipeline, but every refinement round writes `fan_out` candidates at once and keeps the best one.
+        Refiner Agent (x fan_out) - Rewrites the current story, all candidates in parallel
+        Scorer Agent (x fan_out) - Rates each candidate and gives feedback, all in parallel"""
     
-    # This agent refines the story based on critique OR calls the exit_loop function.
+    initial_writer_agent = Agent(
+        name="InitialWriterAgent",
+        model=model_factory(
+            model="gemini-2.5-flash-lite",
+            retry_options=retry_config
+        ),
+        instruction="""Based on the user's prompt, write the first draft of a short story (around 100-150 words).
+        Output only the story text, with no introduction or explanation.""",
+        output_key="current_story",  # Stores the first draft in the state.
+    )
+    print("✅ initial_writer_agent created.")
+    
+    # Every clone of this agent writes its own candidate; {critique?} is empty in the first round.
     refiner_agent = Agent(
         name="RefinerAgent",
-        model=Gemini(
+        model=model_factory(
             model="gemini-2.5-flash-lite",
             retry_options=retry_config
         ),
-        instruction="""You are a story refiner. You have a story draft and critique.
+        instruction="""You are a story refiner. You have a story draft and, possibly, a critique.
 
         Story Draft: {current_story}
-        Critique: {critique}
+        Critique: {critique?}
 
-        Your task:
-        - If the critique is EXACTLY "APPROVED" and not previously terminated, CALL the `exit_loop` function and do NOTHING else.
-        - Otherwise, rewrite the story draft incorporating the feedback.
-
-        IMPORTANT: Never modify an already approved story. Only call the tool once. If state already contains a prior approval (e.g., terminate_loop=True), do not call the tool again and simply return the existing story unchanged.""",
-        output_key="current_story",  # It overwrites the story with the new, refined version.
-        tools=[FunctionTool(exit_loop)]  # The tool is now correctly initialized with the function reference.
+        Your task: rewrite the story draft, improving plot, characters and pacing and addressing the critique if there is one. Output only the story text.""",
+        output_key="current_story",  # Replaced by one candidate key per clone.
     )
     print("✅ refiner_agent created.")
     
-    # The LoopAgent contains the agents that will run repeatedly: Critic -> Refiner.
-    story_refinement_loop = LoopAgent(
+    # Replaces the critic: a numeric score lets the loop compare candidates, the feedback feeds the next round.
+    scorer_agent = Agent(
+        name="StoryScorerAgent",
+        model=model_factory(
+            model="gemini-2.5-flash-lite",
+            retry_options=retry_config
+        ),
+        instruction="""You are a constructive story critic. Review the story provided below.
+        Story: {candidate}
+        
+        Evaluate the story's plot, characters, and pacing. Start your answer with a line "SCORE: <0-10>/10".
+        - If the story is well-written and complete, follow it with the exact phrase: "APPROVED"
+        - Otherwise, follow it with 2-3 specific, actionable suggestions for improvement.""",
+    )
+    print("✅ scorer_agent created.")
+    
+    # Candidates -> scores -> keep the best in current_story, stopping once one scores 8/10 or more
+    story_refinement_loop = build_best_of_n_loop(
         name="StoryRefinementLoop",
-        sub_agents=[critic_agent, refiner_agent],
+        writer=refiner_agent,
+        scorer=scorer_agent,
+        fan_out=fan_out,
         max_iterations=2,  # Prevents infinite loops
+        score_threshold=8,
     )
     
-    # The root agent is a SequentialAgent that defines the overall workflow: Initial Write -> Refinement Loop.
     root_agent = SequentialAgent(
         name="StoryPipeline",
         sub_agents=[initial_writer_agent, story_refinement_loop],
     )
-    print("✅ Loop and Sequential Agents created.")
+    print("✅ Best-of-N Loop and Sequential Agents created.")
+    return root_agent
+
+
+async def IterativeStoryRefinement():
+    root_agent = build_iterative_story_refinement()
     
     runner = InMemoryRunner(agent=root_agent)
-    response = await runner.run_debug(
-        "Write a short horror story about a lighthouse keeper who discovers a mysterious, glowing map"
-    )
+    response = await runner.run_debug(STORY_REFINEMENT_PROMPT)
         
 
 if __name__ == "__main__":
@@ -0,0 +1,75 @@
+# LoopAgent with a declarative exit condition on session state.
+#
+# The plain LoopAgent only stops when a sub-agent escalates (or max_iterations is hit), so the story loop needs
+# RefinerAgent to spend one more LLM round-trip calling `exit_loop` after CriticAgent already wrote "APPROVED".
+# PredicateLoopAgent checks `exit_when(state)` after every sub-agent instead, so approval costs no model call:
+#
+#   LoopAgent(...)  ->  PredicateLoopAgent(..., exit_when=state_equals("critique", "APPROVED"))
+
+import logging
+from typing import AsyncGenerator, Callable, Mapping, Optional
+
+from google.adk.agents import LoopAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.utils.context_utils import Aclosing
+from typing_extensions import override
+
+logger = logging.getLogger(__name__)
+
+StatePredicate = Callable[[Mapping], bool]
+
+
+def state_equals(key: str, value: str, strip: bool = True) -> StatePredicate:
+    """Predicate: stop when state[key] == value (whitespace-stripped by default)."""
+    def predicate(state: Mapping) -> bool:
+        current = state.get(key)
+        if current is None:
+            return False
+        if strip and isinstance(current, str):
+            current = current.strip()
+        return current == value
+    predicate.__name__ = f"state[{key!r}] == {value!r}"
+    return predicate
+
+
+class PredicateLoopAgent(LoopAgent):
+    """A LoopAgent that also stops as soon as `exit_when(session.state)` is true after any sub-agent.
+
+    Escalation and max_iterations keep working as in LoopAgent. Resumable apps (ResumabilityConfig)
+    use the plain LoopAgent behaviour, because the predicate is not part of the saved loop state.
+    """
+
+    exit_when: Optional[StatePredicate] = None
+    """Checked against the session state after each sub-agent finishes."""
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if ctx.is_resumable or self.exit_when is None:
+            async for event in super()._run_async_impl(ctx):
+                yield event
+            return
+
+        if not self.sub_agents:
+            return
+
+        times_looped = 0
+        while not self.max_iterations or times_looped < self.max_iterations:
+            for sub_agent in self.sub_agents:
+                escalated = False
+                # Aclosing: the sub-agent's generator is closed when the loop returns early, as in LoopAgent
+                async with Aclosing(sub_agent.run_async(ctx)) as agen:
+                    async for event in agen:
+                        yield event
+                        if event.actions.escalate:
+                            escalated = True
+                if escalated:
+                    return
+                # The runner has applied the sub-agent's state_delta by now
+                if self.exit_when(ctx.session.state):
+                    logger.info(
+                        "%s: exit predicate %s met after %s (iteration %d)",
+                        self.name, getattr(self.exit_when, "__name__", "exit_when"), sub_agent.name, times_looped + 1,
+                    )
+                    return
+            times_looped += 1
@@ -0,0 +1,194 @@
+# Rate-limit-aware scheduling for ParallelAgent fan-out.
+#
+# ParallelResearchTeam starts every researcher at once. Under quota pressure they all hit 429 together and
+# retry_config (exp_base=7) backs them off for 7s, 49s, 343s... Instead, every model call goes through one shared
+# ModelScheduler: a token bucket per model name (requests per minute + burst) and a global concurrency cap.
+# Branches that would exceed the budget wait in a FIFO queue instead of colliding at the API.
+#
+#   scheduler = ModelScheduler(limits={"gemini-2.5-flash-lite": RateLimit(rpm=15, burst=3)}, max_concurrency=4)
+#   root_agent = build_parallel_multi_topic_research(model_factory=scheduler.model_factory())
+#   ...
+#   print(scheduler.metrics())
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+# Free-tier style budgets for the models used in this repo (requests per minute)
+DEFAULT_LIMITS = {
+    "gemini-2.5-flash-lite": {"rpm": 15, "burst": 3},
+    "gemini-2.5-flash": {"rpm": 10, "burst": 2},
+}
+
+
+@dataclass
+class RateLimit:
+    """Token-bucket budget for one model: `rpm` requests per minute, at most `burst` back to back."""
+    rpm: float
+    burst: int = 1
+
+
+class TokenBucket:
+    def __init__(self, limit: RateLimit):
+        self.rate = limit.rpm / 60.0  # tokens per second
+        self.capacity = max(1, limit.burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+@dataclass
+class ModelQueueMetrics:
+    admitted: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_wait_s": round(self.total_wait_s / self.admitted, 4) if self.admitted else 0.0,
+            "max_wait_s": round(self.max_wait_s, 4),
+            "total_wait_s": round(self.total_wait_s, 4),
+        }
+
+
+@dataclass
+class ModelScheduler:
+    """Admission control shared by every model call made through `model_factory()`.
+
+    Args:
+        limits: {model_name: RateLimit or {"rpm": ..., "burst": ...}}. Models without an entry are only
+                subject to the concurrency cap.
+        max_concurrency: Max model calls in flight across all models (None = no cap).
+    """
+    limits: dict = field(default_factory=lambda: dict(DEFAULT_LIMITS))
+    max_concurrency: Optional[int] = 4
+    _buckets: dict = field(default_factory=dict, init=False, repr=False)
+    _locks: dict = field(default_factory=dict, init=False, repr=False)
+    _slots: Optional[asyncio.Semaphore] = field(default=None, init=False, repr=False)
+    _metrics: dict = field(default_factory=dict, init=False, repr=False)
+
+    def _bucket(self, model: str) -> Optional[TokenBucket]:
+        if model not in self._buckets:
+            limit = self.limits.get(model)
+            if isinstance(limit, dict):
+                limit = RateLimit(**limit)
+            self._buckets[model] = TokenBucket(limit) if limit else None
+        return self._buckets[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str):
+        """Waits (FIFO per model) for a token, then for a concurrency slot, and holds the slot until the call ends.
+
+        A call takes a slot only once its model has a token ready, so a throttled model never holds slots that calls
+        to other models could use. The token is spent only once the slot is held: callers queued on the slot have not
+        spent tokens, so slots freed at the same moment cannot release a burst above the model's rate.
+        """
+        metrics = self._metrics.setdefault(model, ModelQueueMetrics())
+        lock = self._locks.setdefault(model, asyncio.Lock())
+        if self.max_concurrency and self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.monotonic()
+        metrics.queue_depth += 1
+        metrics.max_queue_depth = max(metrics.max_queue_depth, metrics.queue_depth)
+        slot_taken = False
+        try:
+            bucket = self._bucket(model)
+            async with lock:  # One waiter per model at a time keeps the queue in arrival order
+                while bucket and (delay := bucket.wait_time()) > 0:
+                    await asyncio.sleep(delay)
+                if self._slots:
+                    await self._slots.acquire()
+                    slot_taken = True
+                if bucket:
+                    bucket.take()  # Still there: only the lock holder takes this model's tokens
+        except BaseException:
+            if slot_taken:
+                self._slots.release()
+            raise
+        finally:
+            metrics.queue_depth -= 1
+        waited = time.monotonic() - queued_at
+        metrics.admitted += 1
+        metrics.total_wait_s += waited
+        metrics.max_wait_s = max(metrics.max_wait_s, waited)
+
+        try:
+            yield
+        finally:
+            if slot_taken:
+                self._slots.release()
+
+    def model_factory(self, base_factory=Gemini):
+        """Returns a drop-in for Gemini(model=..., retry_options=...) whose calls go through this scheduler."""
+        def factory(model: str, **kwargs) -> "ScheduledLlm":
+            return ScheduledLlm(model=model, inner=base_factory(model=model, **kwargs), scheduler=self)
+        return factory
+
+    def metrics(self) -> dict:
+        """Queue depth and wait-time metrics per model name."""
+        return {model: m.as_dict() for model, m in sorted(self._metrics.items())}
+
+
+class ScheduledLlm(BaseLlm):
+    """Wraps another model so that every call is admitted by a ModelScheduler first."""
+
+    inner: BaseLlm
+    scheduler: ModelScheduler
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async with self.scheduler.slot(self.model):
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+
+
+async def demo(runs: int = 3, latency: float = 0.2):
+    """Runs the parallel research workflow with the fake model under a tight budget and prints the queue metrics."""
+    from google.adk.runners import InMemoryRunner
+    from fake_gemini import FakeGeminiBackend
+    from multi_agent import PARALLEL_RESEARCH_QUERY, build_parallel_multi_topic_research
+
+    backend = FakeGeminiBackend(latency=latency)
+    scheduler = ModelScheduler(limits={"gemini-2.5-flash-lite": RateLimit(rpm=120, burst=2)}, max_concurrency=2)
+    runner = InMemoryRunner(agent=build_parallel_multi_topic_research(scheduler.model_factory(backend.model)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        runner.run_debug(PARALLEL_RESEARCH_QUERY, session_id=f"run-{i}", quiet=True) for i in range(runs)
+    ))
+    print(f"\n📊 {runs} concurrent runs finished in {time.perf_counter() - started:.2f}s")
+    for model, metrics in scheduler.metrics().items():
+        print(f"   {model}: {metrics}")
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
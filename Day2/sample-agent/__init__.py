@@ -1,12 +1,8 @@
 # from . import agent
 
-import requests
-# Fetch latest USD conversion rates and print the conversion_rates object
-response = requests.get(
-	"https://v6.exchangerate-api.com/v6/0582a90af241c7eb38b0c9a6/latest/USD",
-    timeout=10
-)
-
-response.raise_for_status()
-data = response.json()
-print(data["conversion_rates"])
\ No newline at end of file
+import os, sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from rate_cache import RATE_CACHE
+# Fetch latest USD conversion rates and print the conversion_rates object.
+# Goes through the shared rate cache, so get_exchange_rate("USD", ...) in the same process reuses this download.
+print(RATE_CACHE.get("USD"))
@@ -11,24 +11,22 @@ from google.adk.code_executors import BuiltInCodeExecutor
 from google.genai import types
 print("✅ ADK components imported successfully.")
 
-def show_python_code_and_result(response):
-    for i in range(len(response)):
-        # Check if the response contains a valid function call result from the code executor
-        if(
-            (response[i].content.parts)
-            and (response[i].content.parts[0])
-            and (response[i].content.parts[0].function_response)
-            and (response[i].content.parts[0].function_response.response)
-        ):
-            response_code = response[i].content.parts[0].function_response.response
-            if "result" in response_code and response_code["result"] != "```":
-                if "tool_code" in response_code["result"]:
-                    print(
-                        "Generated Python Code >> ",
-                        response_code["result"].replace("tool_code", ""),
-                    )
-                else:
-                    print("Generated Python Response >> ", response_code["result"])
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.event_pipeline import CodeResult, EventPipeline
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))  # This folder, so the package __init__ shares the same cache
+from rate_cache import RATE_CACHE
+from fee_schedule import FEE_TABLE, payment_method_error
+
+def show_python_code_and_result(result: CodeResult):
+    # Called by the event pipeline as soon as the code executor's reply arrives, instead of scanning the event list
+    if result.code:
+        print("Generated Python Code >> ", result.code)
+    else:
+        print("Generated Python Response >> ", result.output)
 print("✅ Helper functions defined.")
 
 
@@ -56,20 +54,14 @@ def get_fee_for_payment_method(method: str) -> dict:
         Success: {"status": "success", "fee_percentage": 0.02}
         Error: {"status": "error", "error_message": "Payment method not found"}
     """
-    # This simulates looking up a company's internal fee structure.
-    fee_database = {
-        "platinum credit card": 0.02,  # 2%
-        "gold debit card": 0.035,  # 3.5%
-        "bank transfer": 0.01,  # 1%
-    }
-
-    fee = fee_database.get(method.lower())
-    if fee is not None:
-        return {"status": "success", "fee_percentage": fee}
+    # This simulates looking up a company's internal fee structure (fee_schedule.py, shared with the bulk converter).
+    fee_percentage = FEE_TABLE.get(method)
+    if fee_percentage is not None:
+        return {"status": "success", "fee_percentage": fee_percentage}
     else:
         return {
             "status": "error",
-            "error_message": f"Payment method '{method}' not found",
+            "error_message": payment_method_error(method),
         }
 print("✅ Fee lookup function created")
 
@@ -94,16 +86,10 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
     base = base_currency.upper()
     target = target_currency.upper()
 
-    # Initialize empty database so later lookup doesn't fail if request errors
-    rate_database = {}
+    # The whole conversion_rates table for the base currency is cached (TTL, stale-while-revalidate, one fetch
+    # shared by concurrent callers), so most calls never touch the network. See rate_cache.py.
     try:
-        response = requests.get(
-            f"https://v6.exchangerate-api.com/v6/0582a90af241c7eb38b0c9a6/latest/{base}", timeout=10
-        )
-        response.raise_for_status()
-        print("Request successful!")
-        data = response.json()
-        rate_database = data.get("conversion_rates", {})
+        rate_database = RATE_CACHE.get(base)
     except requests.exceptions.HTTPError as e:
         return {
             "status": "error",
@@ -137,64 +123,101 @@ def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
     return {"status": "success", "rate": rate}
 print("✅ Exchange rate function created")
 
+from async_rates import get_exchange_rate as get_exchange_rate_async  # Same tool name, result and RATE_CACHE, non-blocking
+get_exchange_rate_async.__doc__ = get_exchange_rate.__doc__  # The tool description the model sees
 
-async def CurrencyExchangeSystem():
-    """Currency Exchange System that uses and LLM Agent with tools."""
-    
-    # This is an Agent Tool that will generate a python code for accurate conversions, and execute that code using BuiltInCodeExecutor(), uses stdio to show the output
-    calculation_agent = LlmAgent(
-        name="CalculationAgent",
-        model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-        instruction="""You are a specialized calculator that ONLY responds with Python code. You are forbidden from providing any text, explanations, or conversational responses.
-    
-        Your task is to take a request for a calculation and translate it into a single block of Python code that calculates the answer.
+
+from calculator import calculate_conversion  # Local Decimal arithmetic, no model call
+from bulk_convert import convert_many  # Many conversions in one call, one rate table, vectorized
+print("✅ Calculation tools imported")
+
+CURRENCY_QUERY = "Convert 1,250 USD to INR using a Bank Transfer. Show me the precise calculation."
+
+
+def build_currency_agent(model_factory=Gemini, local_calculator=True):
+    """Currency agent with custom function tools.
+
+    local_calculator=True: the final amount comes from the calculate_conversion tool (Decimal arithmetic, in-process).
+    local_calculator=False: the previous path, where a CalculationAgent writes Python that BuiltInCodeExecutor runs.
+    """
+    if local_calculator:
+        calculation_tools = [FunctionTool(calculate_conversion)]
+        calculation_step = """4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself. You must use the calculate_conversion() tool
+                with the amount, the fee from step 1 and the rate from step 2."""
+    else:
+        # This is an Agent Tool that will generate a python code for accurate conversions, and execute that code using BuiltInCodeExecutor(), uses stdio to show the output
+        calculation_agent = LlmAgent(
+            name="CalculationAgent",
+            model=model_factory(model="gemini-2.5-flash-lite", retry_options=retry_config),
+            instruction="""You are a specialized calculator that ONLY responds with Python code. You are forbidden from providing any text, explanations, or conversational responses.
         
-        **RULES:**
-        1.  Your output MUST be ONLY a Python code block.
-        2.  Do NOT write any text before or after the code block.
-        3.  The Python code MUST calculate the result.
-        4.  The Python code MUST print the final result to stdout.
-        5.  You are PROHIBITED from performing the calculation yourself. Your only job is to generate the code that will perform the calculation.
-    
-        Failure to follow these rules will result in an error.
-        """,
-        code_executor=BuiltInCodeExecutor()  # Use the built-in Code Executor Tool. This gives the agent code execution capabilities !IMPORTANT
-    )
-    
+            Your task is to take a request for a calculation and translate it into a single block of Python code that calculates the answer.
+            
+            **RULES:**
+            1.  Your output MUST be ONLY a Python code block.
+            2.  Do NOT write any text before or after the code block.
+            3.  The Python code MUST calculate the result.
+            4.  The Python code MUST print the final result to stdout.
+            5.  You are PROHIBITED from performing the calculation yourself. Your only job is to generate the code that will perform the calculation.
+        
+            Failure to follow these rules will result in an error.
+            """,
+            code_executor=BuiltInCodeExecutor()  # Use the built-in Code Executor Tool. This gives the agent code execution capabilities !IMPORTANT
+        )
+        calculation_tools = [AgentTool(calculation_agent)]
+        calculation_step = """4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself. You must use the calculation_agent tool to generate Python code that calculates the final converted amount. This 
+                code will use the fee information from step 1 and the exchange rate from step 2."""
+
     # Currency agent with custom function tools
     currency_agent = LlmAgent(
         name="currency_agent",
-        model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
-        instruction="""You are a smart currency conversion assistant. You must strictly follow these steps and use the available tools.
+        model=model_factory(model="gemini-2.5-flash-lite", retry_options=retry_config),
+        instruction=f"""You are a smart currency conversion assistant. You must strictly follow these steps and use the available tools.
             For any currency conversion request:
 
             1. Get Transaction Fee: Use the get_fee_for_payment_method() tool to determine the transaction fee.
             2. Get Exchange Rate: Use the get_exchange_rate() tool to get the currency conversion rate.
             3. Error Check: After each tool call, you must check the "status" field in the response. If the status is "error", you must stop and clearly explain the issue to the user.
-            4. Calculate Final Amount (CRITICAL): You are strictly prohibited from performing any arithmetic calculations yourself. You must use the calculation_agent tool to generate Python code that calculates the final converted amount. This 
-                code will use the fee information from step 1 and the exchange rate from step 2.
+            {calculation_step}
             5. Provide Detailed Breakdown: In your summary, you must:
                 * State the final converted amount.
                 * Explain how the result was calculated, including:
                     * The fee percentage and the fee amount in the original currency.
                     * The amount remaining after deducting the fee.
                     * The exchange rate applied.
+
+            For several conversions in one request, call the convert_many() tool once with all of them instead of steps 1, 2 and 4,
+            then give the same breakdown for each conversion.
                 """,
-        tools=[FunctionTool(get_fee_for_payment_method), FunctionTool(get_exchange_rate), AgentTool(calculation_agent)]
+        # The async get_exchange_rate (async_rates.py) waits for the rate API without blocking other sessions
+        tools=[FunctionTool(get_fee_for_payment_method), FunctionTool(get_exchange_rate_async), *calculation_tools,
+               FunctionTool(convert_many)]
     )
+    return currency_agent
+
+
+async def CurrencyExchangeSystem(local_calculator=True):
+    """Currency Exchange System that uses and LLM Agent with tools."""
+    currency_agent = build_currency_agent(local_calculator=local_calculator)
 
     print("✅ Currency agent created with custom function tools")
     print("🔧 Available tools:")
     print("  • get_fee_for_payment_method - Looks up company fee structure")
     print("  • get_exchange_rate - Gets current exchange rates")
-    print("  • Agent Tool (calculation specialist)")
+    print("  • convert_many - Converts many amounts at once (cross-rate matrix)")
+    if local_calculator:
+        print("  • calculate_conversion - Exact local arithmetic with a fee/net/rate breakdown")
+    else:
+        print("  • Agent Tool (calculation specialist)")
     
-    # Test the currency agent
+    # Test the currency agent, handling each event as it arrives
     currency_runner = InMemoryRunner(agent=currency_agent)
-    response = await currency_runner.run_debug(
-        "Convert 1,250 USD to INR using a Bank Transfer. Show me the precise calculation."
-    )
-    show_python_code_and_result(response)
+    pipeline = EventPipeline(code_tools=["CalculationAgent"])
+    pipeline.on_code_result(show_python_code_and_result)  # Only the code executor path produces code results
+    pipeline.on_final_text(lambda reply: print(f"{reply.author} > {reply.text}"))
+    session = await currency_runner.session_service.create_session(app_name=currency_runner.app_name, user_id="user")
+    print(f"\nUser > {CURRENCY_QUERY}")
+    await pipeline.run(currency_runner, user_id="user", session_id=session.id, new_message=CURRENCY_QUERY)
     # print(response)
     
 
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 
+import asyncio
 import uuid
 load_dotenv()
 
@@ -9,7 +10,6 @@ from google.adk.models.google_llm import Gemini
 from google.adk.runners import Runner, InMemoryRunner
 from google.adk.sessions import InMemorySessionService
 
-from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
 from google.adk.tools.tool_context import ToolContext
 from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
 from mcp import StdioServerParameters
@@ -18,6 +18,15 @@ from google.adk.apps.app import App, ResumabilityConfig
 from google.adk.tools.function_tool import FunctionTool
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.event_pipeline import EventPipeline
+from adk_utils.image_sink import ImageSink
+from adk_utils.mcp_pool import PooledMcpToolset
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 
 retry_config = types.HttpRetryOptions(
     attempts=5,  # Maximum retry attempts
@@ -27,7 +36,9 @@ retry_config = types.HttpRetryOptions(
 )
 
 # MCP integration with Everything Server
-mcp_image_server = McpToolset(
+# The server process comes from a shared, warm pool (adk_utils/mcp_pool.py): npx and Node start once per process,
+# not once per toolset, and the tool list is fetched once instead of on every model turn
+mcp_image_server = PooledMcpToolset(
     connection_params=StdioConnectionParams(
         server_params=StdioServerParameters(
             command="npx",  # Run MCP server via npx
@@ -35,10 +46,10 @@ mcp_image_server = McpToolset(
                 "-y",  # Argument for npx to auto-confirm install
                 "@modelcontextprotocol/server-everything",
             ],
-            tool_filter=["getTinyImage"],
         ),
         timeout=30,
-    )
+    ),
+    tool_filter=["getTinyImage"],
 )
 print("✅ MCP Tool created")
 
@@ -51,37 +62,28 @@ image_agent = LlmAgent(
     tools=[mcp_image_server],
 )
 
+# Images are decoded and written on a worker thread, named by content hash (the same image is stored once), and
+# listed in generated_images/manifest.jsonl
+image_sink = ImageSink(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "generated_images"),
+    on_stored=lambda stored: print(f"{'Already saved' if stored.duplicate else 'Saved image to'}: {stored.path}"),
+)
+
+
 async def main():
     runner = InMemoryRunner(agent=image_agent)
 
-    response = await runner.run_debug("Provide a sample tiny image", verbose=True)
-
-    from IPython.display import display, Image as IPImage
-    import base64
-
-    for event in response:
-        if event.content and event.content.parts:
-            for part in event.content.parts:
-                if hasattr(part, "function_response") and part.function_response:
-                    for item in part.function_response.response.get("content", []):
-                        if item.get("type") == "image":
-                            # Decode the base64 image bytes
-                            img_bytes = base64.b64decode(item["data"])
-                            # Try inline display (works in Jupyter/IPython environments)
-                            try:
-                                display(IPImage(data=img_bytes))
-                            except Exception:
-                                pass
-                            # Persist image to disk so it can be opened normally
-                            import os, datetime
-                            out_dir = os.path.join(os.path.dirname(__file__), "generated_images")
-                            os.makedirs(out_dir, exist_ok=True)
-                            file_name = f"image_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
-                            file_path = os.path.join(out_dir, file_name)
-                            with open(file_path, "wb") as f:
-                                f.write(img_bytes)
-                            print(f"Saved image to: {file_path}")
-                            
-import asyncio
+    pipeline = EventPipeline()
+    pipeline.on_image(image_sink.handler)  # Returns once the image is queued
+    pipeline.on_final_text(lambda reply: print(f"{reply.author} > {reply.text}"))
+
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id="user")
+    try:
+        await pipeline.run(runner, user_id="user", session_id=session.id, new_message="Provide a sample tiny image")
+    finally:
+        await runner.close()  # Closes the toolsets: the last one holding the pool stops its server processes
+        image_sink.close()  # Write whatever is still queued
+
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
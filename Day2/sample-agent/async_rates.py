@@ -0,0 +1,42 @@
+# Non-blocking exchange-rate tool.
+#
+# ADK calls a plain `def` tool directly on the event loop thread, so get_exchange_rate's blocking requests.get
+# (timeout=10) freezes every other session of the InMemoryRunner until the upstream answers. This `async def` version
+# reads the same RATE_CACHE as the sync tool (rate_cache.py: same tables, TTLs and stats) through get_async(), which
+# fetches with a pooled, keep-alive httpx.AsyncClient:
+#   - no TCP/TLS handshake per call, separate connect and read timeouts
+#   - concurrent upstream requests capped with a semaphore
+#
+#   FunctionTool(get_exchange_rate)   # same name, arguments and result shape as the sync tool
+#
+#   python Day2/sample-agent/benchmark_rates.py   # event-loop latency, sync vs async, against a local stand-in
+
+import httpx
+
+import rate_cache
+
+
+# No docstring here: agent_tools.py gives this function the sync tool's docstring, so the model sees one description
+async def get_exchange_rate(base_currency: str, target_currency: str) -> dict:
+    base = base_currency.upper()
+    target = target_currency.upper()
+    try:
+        rate_database = await rate_cache.RATE_CACHE.get_async(base)
+    except httpx.HTTPStatusError as e:
+        return {
+            "status": "error",
+            "error_message": f"HTTP Error fetching rates: {e}",
+        }
+    except httpx.HTTPError as e:
+        return {
+            "status": "error",
+            "error_message": f"Network Error fetching rates: {type(e).__name__}: {e}",
+        }
+
+    rate = rate_database.get(target)
+    if rate is None:
+        return {
+            "status": "error",
+            "error_message": f"Unsupported currency pair or unavailable rate: {base_currency}/{target_currency}",
+        }
+    return {"status": "success", "rate": rate}
@@ -0,0 +1,90 @@
+# Per-conversion cost of the two calculation paths of CurrencyExchangeSystem (agent_tools.py):
+#   code executor: AgentTool(CalculationAgent) -> one more LLM call writing Python, run by BuiltInCodeExecutor
+#   local:         calculate_conversion tool    -> Decimal arithmetic in-process, no model call
+#
+# The models are the fake Gemini from Day1/sample-agent/fake_gemini.py (canned tool calls, fixed latency per call) and
+# the exchange rate comes from the local rate stand-in, so no API key or network is needed.
+#
+#   python Day2/sample-agent/benchmark_calculator.py --conversions 10 --latency 0.3
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Day1", "sample-agent"))  # fake_gemini
+from fake_gemini import FakeGeminiBackend, call_tool
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from agent_tools import CURRENCY_QUERY, build_currency_agent
+from local_rate_server import LocalRateServer, rates_for
+print("✅ Benchmark components imported successfully.")
+
+FEE, RATE = 0.01, rates_for("USD")["INR"]
+FINAL_ANSWER = "1,250 USD is 103,430.25 INR: a 1% fee of 12.50 USD leaves 1,237.50 USD, converted at 83.58."
+CODE = f"amount = 1250\nfee = amount * {FEE}\nprint((amount - fee) * {RATE})"
+
+
+def canned_replies(local_calculator: bool) -> dict:
+    if local_calculator:
+        calculation = call_tool("calculate_conversion", amount=1250, fee_percentage=FEE, rate=RATE)
+    else:
+        calculation = call_tool("CalculationAgent", request=f"Calculate (1250 - 1250 * {FEE}) * {RATE}")
+    return {
+        "currency_agent": [
+            call_tool("get_fee_for_payment_method", method="bank transfer"),
+            call_tool("get_exchange_rate", base_currency="USD", target_currency="INR"),
+            calculation,
+            FINAL_ANSWER,
+        ],
+        # What the code executor returns: the generated code and its output
+        "CalculationAgent": types.Content(role="model", parts=[
+            types.Part(executable_code=types.ExecutableCode(language="PYTHON", code=CODE)),
+            types.Part(code_execution_result=types.CodeExecutionResult(outcome="OUTCOME_OK", output="103430.25\n")),
+            types.Part(text="103430.25"),
+        ]),
+    }
+
+
+async def benchmark(conversions: int, latency: float) -> dict:
+    report = {}
+    with LocalRateServer() as server:
+        os.environ["EXCHANGE_RATE_API_URL"] = server.url
+        for label, local_calculator in (("code executor", False), ("local", True)):
+            backend = FakeGeminiBackend(latency=latency, replies=canned_replies(local_calculator))
+            runner = InMemoryRunner(agent=build_currency_agent(backend.model, local_calculator=local_calculator))
+            started = time.perf_counter()
+            for i in range(conversions):
+                await runner.run_debug(CURRENCY_QUERY, session_id=f"conversion-{i}", quiet=True)
+            elapsed = time.perf_counter() - started
+            report[label] = {
+                "latency_s_per_conversion": round(elapsed / conversions, 3),
+                "model_calls_per_conversion": len(backend.calls) / conversions,
+                "prompt_tokens_per_conversion": sum(c.prompt_tokens for c in backend.calls) // conversions,
+                "response_tokens_per_conversion": sum(c.response_tokens for c in backend.calls) // conversions,
+            }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversions", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per fake model call")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args.conversions, args.latency))
+    print(f"\n📊 {args.conversions} conversions, {args.latency}s per model call")
+    for label, r in report.items():
+        print(f"   {label:<14} {r}")
+    before, after = report["code executor"], report["local"]
+    saved = before["prompt_tokens_per_conversion"] + before["response_tokens_per_conversion"] \
+        - after["prompt_tokens_per_conversion"] - after["response_tokens_per_conversion"]
+    print(f"   Saved per conversion: {before['latency_s_per_conversion'] - after['latency_s_per_conversion']:.3f}s, "
+          f"{before['model_calls_per_conversion'] - after['model_calls_per_conversion']:.0f} model call(s), "
+          + (f"{saved} tokens" if saved >= 0 else f"{-saved} extra tokens (the tool declaration is sent on every turn)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Event-loop latency under concurrent conversions: sync get_exchange_rate vs the async version (async_rates.py).
+#
+# A probe task sleeps 5ms in a loop and records how late it wakes up; that lateness is what every other session
+# of the runner experiences. Both tools run with caching off (ttl=0: every call goes upstream, although the async
+# tool still shares one request between concurrent callers of the same base) and on (the defaults), against a local
+# stand-in for the rate API with a fixed upstream delay. No API key or network is needed.
+#
+#   python Day2/sample-agent/benchmark_rates.py --conversions 100 --upstream-latency 0.05
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import agent_tools
+import async_rates
+import rate_cache
+from local_rate_server import USD_RATES, LocalRateServer
+from rate_cache import AsyncRateFetcher, RateTableCache
+print("✅ Benchmark components imported successfully.")
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+
+async def run_conversions(tool, conversions: int) -> dict:
+    bases = sorted(USD_RATES)
+    pairs = [(bases[i % len(bases)], bases[(i + 1) % len(bases)]) for i in range(conversions)]
+
+    async def convert(base: str, target: str) -> dict:
+        result = tool(base, target)  # ADK also calls a plain `def` tool directly on the loop thread
+        return await result if asyncio.iscoroutine(result) else result
+
+    lags, stop = [], asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)  # Let the probe take a baseline sample
+    started = time.perf_counter()
+    results = await asyncio.gather(*(convert(base, target) for base, target in pairs))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return {
+        "wall_clock_s": round(elapsed, 3),
+        "loop_lag_max_ms": round(max(lags) * 1000, 1),
+        "loop_lag_mean_ms": round(statistics.mean(lags) * 1000, 2),
+        "errors": sum(1 for r in results if r["status"] != "success"),
+    }
+
+
+async def benchmark(conversions: int, upstream_latency: float, max_concurrency: int) -> dict:
+    # The first async request of a process imports httpcore's async backend; keep that one-off cost out of the runs
+    with LocalRateServer() as server:
+        os.environ["EXCHANGE_RATE_API_URL"] = server.url
+        warm_up = AsyncRateFetcher()
+        await warm_up("USD")
+        await warm_up.aclose()
+
+    report = {}
+    for cached in (False, True):
+        ttl = {"ttl": 600, "stale_ttl": 3600} if cached else {"ttl": 0, "stale_ttl": 0}
+        for name in ("sync", "async"):
+            with LocalRateServer(latency=upstream_latency) as server:
+                os.environ["EXCHANGE_RATE_API_URL"] = server.url
+                cache = RateTableCache(afetch=AsyncRateFetcher(max_concurrency=max_concurrency), **ttl)
+                agent_tools.RATE_CACHE = rate_cache.RATE_CACHE = cache
+                tool = agent_tools.get_exchange_rate if name == "sync" else async_rates.get_exchange_rate
+                label = f"{name}, {'cached' if cached else 'uncached'}"
+                report[label] = {**await run_conversions(tool, conversions), **server.stats()}
+                report[label].pop("requests_by_base")
+                await cache.aclose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversions", type=int, default=100)
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Seconds the stand-in takes per request")
+    parser.add_argument("--max-concurrency", type=int, default=10, help="Async client's cap on upstream requests")
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args.conversions, args.upstream_latency, args.max_concurrency))
+    print(f"\n📊 {args.conversions} concurrent conversions, {args.upstream_latency}s upstream latency")
+    for label, r in report.items():
+        print(f"   {label:<16} {r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# Bulk currency conversion with a precomputed cross-rate matrix.
+#
+# get_exchange_rate answers one pair per call and fetches one rate table per base currency. For batches of thousands
+# of (amount, from, to, payment method) rows this module fetches a single table (USD by default) and triangulates
+# every cross rate from it:
+#
+#   rates[i, j] = table[codes[j]] / table[codes[i]]     # 1 unit of codes[i] in codes[j]
+#
+# Then a whole batch is converted in one vectorized NumPy pass, deducting the fee of each row's payment method
+# (looked up in FEE_TABLE, like get_fee_for_payment_method does):
+#
+#   matrix = CrossRateMatrix("USD", RATE_CACHE.get("USD"))
+#   result = convert_arrays([1250, 99.5], ["USD", "EUR"], ["INR", "JPY"], ["bank transfer", "gold debit card"], matrix)
+#   result["converted_amount"]  # -> array([103430.25, 16261.03])
+#
+# convert_many() is the agent tool over the same code. Amounts are float64 and rounded half-up to cents at the end;
+# use calculate_conversion (calculator.py) when a single conversion must be exact to the last digit.
+#
+#   python Day2/sample-agent/bulk_convert.py   # 10,000 rows: per-row tool calls vs one vectorized pass
+
+from typing import Optional, Sequence
+
+import httpx
+import numpy as np
+
+import rate_cache
+from fee_schedule import FEE_SCHEDULE, FEE_TABLE, payment_method_error  # Also puts the repo root on sys.path, for adk_utils
+from adk_utils.lookup_table import LookupTable
+
+TRIANGULATION_BASE = "USD"
+
+
+class CrossRateMatrix:
+    """All cross rates between the currencies of one conversion_rates table, triangulated through its base."""
+
+    def __init__(self, base: str, table: dict):
+        self.base = base.upper()
+        usable = {code.upper(): rate for code, rate in table.items() if rate and rate > 0}
+        self.codes = sorted(usable)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        per_base = np.array([usable[code] for code in self.codes], dtype=np.float64)
+        self.rates = per_base[np.newaxis, :] / per_base[:, np.newaxis]
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        i, j = self.index.get(from_currency.upper()), self.index.get(to_currency.upper())
+        if i is None or j is None:
+            return None
+        return float(self.rates[i, j])
+
+    def indices(self, codes: Sequence[str]) -> np.ndarray:
+        """Row/column index of every code (-1 where the currency is not in the table)."""
+        return _lookup(codes, self.index, str.upper)
+
+
+def _lookup(values: Sequence[str], index: dict, normalize) -> np.ndarray:
+    # A batch repeats the same few codes/methods, so only the distinct values go through Python
+    uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    positions = np.array([index.get(normalize(value), -1) for value in uniques.tolist()], dtype=np.intp)
+    return positions[inverse.reshape(-1)]
+
+
+def fee_percentages(methods: Sequence[str], table: LookupTable = FEE_TABLE) -> np.ndarray:
+    """Fee fraction of every payment method, matched as get_fee_for_payment_method matches it (NaN where unknown)."""
+    uniques, inverse = np.unique(np.asarray(methods, dtype=str), return_inverse=True)
+    fees = np.array([table.get(value, np.nan) for value in uniques.tolist()], dtype=np.float64)
+    return fees[inverse.reshape(-1)]
+
+
+def round_half_up(values: np.ndarray, decimals: int = 2) -> np.ndarray:
+    scale = 10.0 ** decimals
+    return np.floor(values * scale + 0.5) / scale
+
+
+def convert_arrays(
+    amounts: Sequence[float],
+    from_currencies: Sequence[str],
+    to_currencies: Sequence[str],
+    payment_methods: Sequence[str],
+    matrix: CrossRateMatrix,
+    fee_table: LookupTable = FEE_TABLE,
+    decimals: int = 2,
+) -> dict:
+    """Converts a batch in one vectorized pass: fee = amount * fee_percentage, converted = (amount - fee) * rate.
+
+    Returns a dict of equally long arrays: fee_percentage, fee_amount, net_amount, rate, converted_amount, and `ok`
+    (False for rows with an unknown currency or payment method or a non-positive amount; their values are NaN).
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    if not len(amounts) == len(from_currencies) == len(to_currencies) == len(payment_methods):
+        raise ValueError("amounts, from_currencies, to_currencies and payment_methods must have the same length")
+
+    from_index, to_index = matrix.indices(from_currencies), matrix.indices(to_currencies)
+    fees = fee_percentages(payment_methods, fee_table)
+    ok = (from_index >= 0) & (to_index >= 0) & ~np.isnan(fees) & (amounts > 0)
+
+    rates = np.where(ok, matrix.rates[from_index, to_index], np.nan)
+    fee_amounts = np.where(ok, amounts * fees, np.nan)
+    net_amounts = amounts - fee_amounts
+    return {
+        "fee_percentage": fees,
+        "fee_amount": round_half_up(fee_amounts, decimals),
+        "net_amount": round_half_up(net_amounts, decimals),
+        "rate": rates,
+        "converted_amount": round_half_up(net_amounts * rates, decimals),
+        "ok": ok,
+    }
+
+
+def row_error(amount: float, from_currency: str, to_currency: str, method: str, matrix: CrossRateMatrix) -> str:
+    if from_currency.upper() not in matrix.index or to_currency.upper() not in matrix.index:
+        return f"Unsupported currency pair or unavailable rate: {from_currency}/{to_currency}"
+    if method not in FEE_TABLE:
+        return payment_method_error(method)
+    return "Amount must be positive"
+
+
+_matrices: dict[str, tuple[dict, CrossRateMatrix]] = {}  # base -> (table it was built from, matrix)
+
+
+def matrix_for(base: str, table: dict) -> CrossRateMatrix:
+    """The matrix of `table`, rebuilt only when the rate cache hands out a new table for `base`."""
+    cached = _matrices.get(base)
+    if cached is None or cached[0] is not table:
+        cached = _matrices[base] = (table, CrossRateMatrix(base, table))
+    return cached[1]
+
+
+async def convert_many(
+    amounts: list[float], from_currencies: list[str], to_currencies: list[str], payment_methods: list[str]
+) -> dict:
+    """Converts several amounts at once, each after deducting its payment method's fee.
+
+    Args:
+        amounts: Amounts in their source currencies.
+        from_currencies: ISO 4217 codes to convert from, one per amount.
+        to_currencies: ISO 4217 codes to convert to, one per amount.
+        payment_methods: Payment method of every amount (e.g., "bank transfer").
+
+    Returns:
+        {"status": "success", "conversions": [...]}: per amount its fee_percentage, fee_amount, net_amount, rate and
+        converted_amount, or an error_message.
+    """
+    # This docstring is sent to the model on every turn as the tool description, so it is kept short
+    try:
+        table = await rate_cache.RATE_CACHE.get_async(TRIANGULATION_BASE)
+    except httpx.HTTPError as e:
+        return {"status": "error", "error_message": f"Error fetching rates: {type(e).__name__}: {e}"}
+    matrix = matrix_for(TRIANGULATION_BASE, table)
+    try:
+        result = convert_arrays(amounts, from_currencies, to_currencies, payment_methods, matrix)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+
+    conversions = []
+    for i, (amount, source, target, method) in enumerate(zip(amounts, from_currencies, to_currencies, payment_methods)):
+        row = {"amount": amount, "from_currency": source, "to_currency": target}
+        if result["ok"][i]:
+            row.update({key: float(result[key][i]) for key in ("fee_percentage", "fee_amount", "net_amount", "rate", "converted_amount")})
+        else:
+            row["error_message"] = row_error(amount, source, target, method, matrix)
+        conversions.append(row)
+    return {"status": "success", "conversions": conversions}
+
+
+def demo(rows: int = 10_000):
+    """Converts `rows` random rows per row (the three agent tools) and in one vectorized pass, then compares."""
+    import os
+    import random
+    import time
+
+    from calculator import calculate_conversion
+    from local_rate_server import USD_RATES, LocalRateServer
+    from rate_cache import RateTableCache
+
+    with LocalRateServer() as server:
+        os.environ["EXCHANGE_RATE_API_URL"] = server.url
+        cache = RateTableCache()
+        rng = random.Random(7)
+        codes, methods = sorted(USD_RATES), sorted(FEE_SCHEDULE)
+        batch = [
+            (round(rng.uniform(1, 50_000), 2), rng.choice(codes), rng.choice(codes), rng.choice(methods))
+            for _ in range(rows)
+        ]
+        amounts, sources, targets, payment_methods = (list(column) for column in zip(*batch))
+
+        # Per row: what the agent does today, with every rate table already cached
+        started = time.perf_counter()
+        per_row = []
+        for amount, source, target, method in batch:
+            fee = FEE_TABLE.get(method)
+            rate = cache.get(source)[target]
+            per_row.append(float(calculate_conversion(amount, fee, rate)["converted_amount"]))
+        per_row_s = time.perf_counter() - started
+        fetches_per_row = server.stats()["requests"]
+
+        started = time.perf_counter()
+        matrix = CrossRateMatrix(TRIANGULATION_BASE, cache.get(TRIANGULATION_BASE))
+        built_s = time.perf_counter() - started
+        result = convert_arrays(amounts, sources, targets, payment_methods, matrix)
+        vectorized_s = time.perf_counter() - started
+
+    # Triangulated and direct rates are both rounded to 6 digits by the API, so results may differ by a few cents
+    difference = np.abs(result["converted_amount"] - np.array(per_row))
+    print(f"\n📊 {rows} conversions across {len(codes)} currencies and {len(methods)} payment methods")
+    print(f"   per row (cached tables + calculate_conversion): {per_row_s:.3f}s, {fetches_per_row} rate table fetch(es)")
+    print(f"   vectorized (matrix {built_s * 1000:.2f}ms + one pass):     {vectorized_s:.3f}s, 1 rate table")
+    print(f"   speed-up: {per_row_s / vectorized_s:.0f}x, max difference {difference.max():.2f}, "
+          f"median relative difference {np.median(difference / np.maximum(np.array(per_row), 1)):.2e}")
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,168 @@
+# One tool call for a whole approved image order.
+#
+# After generate_images approves an order, the bulk-image notebook used to tell the model to "call getTinyImage
+# multiple times (once for each image)": a 20-image order cost about 20 sequential LLM turns, each one re-sending the
+# conversation (with every base64 image so far). make_image_batch_tool() builds a generate_image_batch(num_images,
+# prompt) tool that:
+#   - checks the order was approved (generate_images records the approved count in state["approved_images"]) and
+#     spends only the images actually generated, so failed ones can be retried without a new approval
+#   - runs the N MCP calls concurrently, at most `max_concurrency` at a time, on the shared server pool (mcp_pool.py)
+#   - stores the images through an ImageSink (content-addressed files) and returns only references, so the model
+#     takes one turn and never sees the base64 data; identical images share one file, and are reported as
+#     "deduplicated" with their count of distinct images
+#
+#   generate_image_batch = make_image_batch_tool(mcp_image_server, "getTinyImage", image_sink)
+#   tools=[FunctionTool(func=generate_images), FunctionTool(func=generate_image_batch)]
+#
+#   python Day2/sample-agent/bulk_images.py   # 20 images: one LLM turn per image vs one fan-out call (fake model)
+
+import asyncio
+import logging
+import os
+import sys
+import time
+
+from google.adk.tools.tool_context import ToolContext
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils.image_sink import ImageSink
+from adk_utils.mcp_pool import PooledMcpToolset
+
+logger = logging.getLogger(__name__)
+
+APPROVED_KEY = "approved_images"  # Set by generate_images, spent by generate_image_batch
+MAX_IMAGES = 50
+
+
+def approve_images(tool_context: ToolContext, num_images: int):
+    """Records an approved order, so generate_image_batch may generate up to `num_images` images."""
+    tool_context.state[APPROVED_KEY] = num_images
+
+
+def make_image_batch_tool(
+    toolset: PooledMcpToolset,
+    tool_name: str,
+    sink: ImageSink,
+    max_concurrency: int = 4,
+    require_approval: bool = True,
+):
+    """Builds the generate_image_batch tool over `tool_name` of the toolset's MCP server.
+
+    The prompt is passed only if the MCP tool declares a `prompt` argument (server-everything's getTinyImage takes none).
+    """
+
+    async def generate_image_batch(num_images: int, prompt: str, tool_context: ToolContext) -> dict:
+        """Generates all images of an approved order in one call.
+
+        Args:
+            num_images: How many images to generate (the approved number).
+            prompt: What the images should show.
+
+        Returns:
+            {"status": "success", "generated": 3, "distinct": 2, "images": [{"image_id": ..., "path": ...,
+            "deduplicated": false}]} or an error. Deduplicated images are the same file as another image.
+        """
+        # This docstring is sent to the model on every turn as the tool description, so it is kept short
+        if not 1 <= num_images <= MAX_IMAGES:
+            return {"status": "error", "error_message": f"num_images must be between 1 and {MAX_IMAGES}"}
+        approved = tool_context.state.get(APPROVED_KEY, 0) if require_approval else num_images
+        if num_images > approved:
+            return {"status": "error", "error_message": f"Only {approved} image(s) approved; call generate_images first"}
+
+        pool = toolset.pool()
+        declared = next((t for t in (await pool.tools()).tools if t.name == tool_name), None)
+        if declared is None:
+            return {"status": "error", "error_message": f"The MCP server has no {tool_name} tool"}
+        arguments = {"prompt": prompt} if "prompt" in (declared.inputSchema or {}).get("properties", {}) else {}
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def one_image(index: int) -> dict:
+            async with slots:
+                result = await pool.call_tool(tool_name, dict(arguments))
+            if result.isError:
+                raise RuntimeError(" ".join(getattr(c, "text", "") for c in result.content) or "MCP tool error")
+            image = next((c for c in result.content if c.type == "image"), None)
+            if image is None:
+                raise RuntimeError("The MCP tool returned no image")
+            stored = await asyncio.wrap_future(await sink.aput(image.data, image.mimeType, tool=tool_name, prompt=prompt))
+            return {"index": index, "image_id": stored.sha256[:16], "path": stored.path, "mime_type": stored.mime_type,
+                    "deduplicated": stored.duplicate}
+
+        results = await asyncio.gather(*(one_image(i) for i in range(num_images)), return_exceptions=True)
+        images = [r for r in results if isinstance(r, dict)]
+        errors = [f"image {i}: {r}" for i, r in enumerate(results) if isinstance(r, BaseException)]
+        if require_approval:
+            tool_context.state[APPROVED_KEY] = approved - len(images)  # Only the generated images are spent
+        if not images:
+            return {"status": "error", "error_message": "; ".join(errors[:3])}
+        response = {
+            "status": "success", "generated": len(images), "distinct": len({image["image_id"] for image in images}),
+            "images": images,
+        }
+        deduplicated = sum(image["deduplicated"] for image in images)
+        if deduplicated:
+            response["deduplicated"] = f"{deduplicated} image(s) identical to one already stored, sharing its file"
+        if errors:
+            response["failed"] = errors
+        return response
+
+    return generate_image_batch
+
+
+async def compare_with_per_image_turns(num_images: int = 20, model_latency: float = 0.3, image_latency: float = 0.2):
+    """Fake model + local MCP stand-in: the model calling getTinyImage once per turn vs one generate_image_batch."""
+    import tempfile
+
+    from google.adk.agents import LlmAgent
+    from google.adk.runners import InMemoryRunner
+    from google.adk.tools.function_tool import FunctionTool
+    from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+    from mcp import StdioServerParameters
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "Day1", "sample-agent"))
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "adk_utils"))
+    from fake_gemini import FakeGeminiBackend, call_tool
+    from local_mcp_server import LOCAL_MCP_SERVER
+    from adk_utils import mcp_pool
+
+    server = StdioConnectionParams(
+        server_params=StdioServerParameters(
+            command=sys.executable, args=[LOCAL_MCP_SERVER, "--latency", str(image_latency)]
+        ),
+        timeout=30,
+    )
+    # The stand-in serves one call at a time per process, like a busy image server; 4 processes serve 4 at once
+    toolset = PooledMcpToolset(connection_params=server, tool_filter=["getTinyImage"], size=4, spares=0)
+    await mcp_pool.warm_up(toolset)
+    sink = ImageSink(tempfile.mkdtemp(prefix="bulk_images_"))
+    generate_image_batch = make_image_batch_tool(toolset, "getTinyImage", sink, max_concurrency=4, require_approval=False)
+
+    per_turn = [call_tool("getTinyImage", prompt="a cat") for _ in range(num_images)] + ["Here are your images."]
+    fan_out = [call_tool("generate_image_batch", num_images=num_images, prompt="a cat"), "Here are your images."]
+    report = {}
+    for label, replies, tools in (
+        ("one turn per image", per_turn, [toolset]),
+        ("generate_image_batch", fan_out, [toolset, FunctionTool(generate_image_batch)]),
+    ):
+        backend = FakeGeminiBackend(latency=model_latency, replies={"image_agent": replies})
+        agent = LlmAgent(name="image_agent", model=backend.model("gemini-2.5-flash-lite"), instruction="Generate images.", tools=tools)
+        runner = InMemoryRunner(agent=agent)
+        started = time.perf_counter()
+        await runner.run_debug(f"Provide {num_images} tiny images of a cat", quiet=True)
+        report[label] = {
+            "wall_clock_s": round(time.perf_counter() - started, 2),
+            "model_calls": len(backend.calls),
+            "prompt_tokens": sum(c.prompt_tokens for c in backend.calls),
+        }
+
+    print(f"\n📊 {num_images} images, {model_latency}s per model call, {image_latency}s per MCP image call")
+    for label, r in report.items():
+        print(f"   {label:<22} {r}")
+    print(f"   Pool: {toolset.pool().metrics()}")
+    await mcp_pool.close_all()
+    sink.close()
+    return report
+
+
+if __name__ == "__main__":
+    asyncio.run(compare_with_per_image_turns())
@@ -0,0 +1,147 @@
+# Local, deterministic calculation tools for the currency agent.
+#
+# CurrencyExchangeSystem used to send every calculation to AgentTool(calculation_agent): one more LLM call to write
+# Python, BuiltInCodeExecutor to run it, and show_python_code_and_result to dig the number back out of the events.
+# These tools do the same arithmetic in-process with Decimal precision and return a structured result:
+#
+#   calculate_conversion(amount=1250, fee_percentage=0.01, rate=83.58)
+#   -> {"status": "success", "fee_amount": "12.50", "net_amount": "1237.50", "rate": "83.58",
+#       "converted_amount": "103430.25", "expression": "(1250 - 1250 * 0.01) * 83.58"}
+#
+#   calculate("(1250 - 1250 * 0.01) * 83.58")   # any restricted arithmetic expression
+#
+# Only number literals, + - * / // % **, unary +/- and parentheses are accepted; names, calls and attributes are not.
+
+import ast
+import operator
+from decimal import Decimal, DivisionByZero, InvalidOperation, Overflow, ROUND_HALF_UP, localcontext
+from typing import Union
+
+PRECISION = 28  # Significant digits for intermediate results
+MAX_EXPONENT = 100  # Keeps `10 ** 10 ** 10` from eating the machine
+MAX_EXPRESSION_LENGTH = 500
+
+OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def to_decimal(value: Union[str, int, float, Decimal]) -> Decimal:
+    """Decimal from user/model input; floats go through str() so 0.1 stays 0.1. Thousands separators are dropped."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(str(value).replace(",", "").replace("_", "").strip())
+
+
+def evaluate(expression: str) -> Decimal:
+    """Evaluates a restricted arithmetic expression with Decimal arithmetic. Raises ValueError if it is not allowed."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    source = expression.replace(",", "")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Not an arithmetic expression: {e.msg}") from None
+
+    def visit(node: ast.AST) -> Decimal:
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return Decimal(node.value)
+        if isinstance(node, ast.Constant) and type(node.value) is float:
+            # The literal as written: node.value is a float and has already lost the digits past ~16
+            return Decimal(ast.get_source_segment(source, node).replace("_", ""))
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            left, right = visit(node.left), visit(node.right)
+            if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+                raise ValueError(f"Exponent {right} is larger than {MAX_EXPONENT}")
+            return OPERATORS[type(node.op)](left, right)
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            return UNARY_OPERATORS[type(node.op)](visit(node.operand))
+        raise ValueError(f"Not allowed in a calculation: {ast.unparse(node)}")
+
+    with localcontext() as context:
+        context.prec = PRECISION
+        context.traps[DivisionByZero] = True
+        try:
+            return visit(tree)
+        except (DivisionByZero, ZeroDivisionError):
+            raise ValueError("Division by zero") from None
+        except InvalidOperation:
+            raise ValueError("Invalid arithmetic operation") from None
+        except Overflow:
+            raise ValueError("Result is too large") from None
+
+
+def quantize(value: Decimal, places: int = 2) -> str:
+    """Rounds half-up to `places` decimals (currency style) and returns it as a string, so no float noise reaches the model."""
+    return str(value.quantize(Decimal(1).scaleb(-places), rounding=ROUND_HALF_UP))
+
+
+def calculate(expression: str) -> dict:
+    """Evaluates an arithmetic expression exactly, without writing or running code.
+
+    Args:
+        expression: Numbers, + - * / // % ** and parentheses only, e.g. "(1250 - 1250 * 0.01) * 83.58".
+
+    Returns:
+        Dictionary with status and result.
+        Success: {"status": "success", "expression": "2 * 3", "result": "6"}
+        Error: {"status": "error", "error_message": "Not allowed in a calculation: x"}
+    """
+    try:
+        result = evaluate(expression)
+    except ValueError as e:
+        return {"status": "error", "error_message": str(e)}
+    return {"status": "success", "expression": expression, "result": str(result.normalize())}
+
+
+def calculate_conversion(amount: float, fee_percentage: float, rate: float, decimals: int = 2) -> dict:
+    """Converts an amount after deducting the transaction fee; returns fee_amount, net_amount, rate and converted_amount.
+
+    Args:
+        amount: The amount in the source currency (e.g., 1250).
+        fee_percentage: From get_fee_for_payment_method(), as a fraction (e.g., 0.01).
+        rate: From get_exchange_rate() (e.g., 83.58).
+        decimals: Decimal places of the money amounts.
+    """
+    # This docstring is sent to the model on every turn as the tool description, so it is kept short
+    try:
+        amount_d, fee_d, rate_d = to_decimal(amount), to_decimal(fee_percentage), to_decimal(rate)
+    except InvalidOperation:
+        return {"status": "error", "error_message": f"Not a number: {amount!r}, {fee_percentage!r} or {rate!r}"}
+    if not (amount_d.is_finite() and fee_d.is_finite() and rate_d.is_finite()):
+        return {"status": "error", "error_message": f"Not a finite number: {amount!r}, {fee_percentage!r} or {rate!r}"}
+    if amount_d <= 0:
+        return {"status": "error", "error_message": "Amount must be positive"}
+    if not 0 <= fee_d < 1:
+        return {"status": "error", "error_message": "fee_percentage must be a fraction between 0 and 1 (e.g., 0.01 for 1%)"}
+    if rate_d <= 0:
+        return {"status": "error", "error_message": "Rate must be positive"}
+
+    with localcontext() as context:
+        context.prec = PRECISION
+        fee_amount = amount_d * fee_d
+        net_amount = amount_d - fee_amount
+        converted = net_amount * rate_d
+        try:
+            fee_text, net_text, converted_text = (quantize(v, decimals) for v in (fee_amount, net_amount, converted))
+        except (InvalidOperation, Overflow):  # More digits than PRECISION at `decimals` places
+            return {"status": "error", "error_message": f"Amounts are too large for {PRECISION} significant digits"}
+    return {
+        "status": "success",
+        "fee_amount": fee_text,
+        "net_amount": net_text,
+        "rate": str(rate_d),
+        "converted_amount": converted_text,
+        "expression": f"({amount_d} - {amount_d} * {fee_d}) * {rate_d}",  # Shown to the model; not evaluated
+    }
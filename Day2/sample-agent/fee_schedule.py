@@ -0,0 +1,24 @@
+# The company's internal transaction fees, by payment method (lower case), as a fraction of the amount.
+# Shared by get_fee_for_payment_method (agent_tools.py) and the bulk converter (bulk_convert.py), which both look
+# methods up through FEE_TABLE, so "Bank-Transfer" is accepted (or rejected) by both.
+
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils.lookup_table import LookupTable
+
+FEE_SCHEDULE = {
+    "platinum credit card": 0.02,  # 2%
+    "gold debit card": 0.035,  # 3.5%
+    "bank transfer": 0.01,  # 1%
+}
+
+FEE_TABLE = LookupTable(FEE_SCHEDULE)  # Built once; matches "Bank-Transfer", suggests "platinum credit card" for "platnum credit card"
+
+
+def payment_method_error(method: str) -> str:
+    """Error message for a method that is not in FEE_TABLE (only exact matches get a fee)."""
+    match = FEE_TABLE.lookup(method)
+    if match:
+        # A misspelling: the model confirms the method instead of being handed a fee for a method nobody named
+        return f"No payment method named '{method}'. Did you mean '{match.key}'?"
+    return FEE_TABLE.not_found(method, "payment method")
@@ -0,0 +1,109 @@
+# Local HTTP stand-in for the exchangerate-api.com "latest" endpoint, for trying the rate tools without the network.
+#
+# GET {url}/latest/{BASE} returns {"result": "success", "base_code": BASE, "conversion_rates": {...}} built from a fixed
+# USD table by triangulation. Every request is counted (per base), and an optional delay simulates a slow upstream.
+#
+#   with LocalRateServer(latency=0.2) as server:
+#       os.environ["EXCHANGE_RATE_API_URL"] = server.url
+#       ...
+#       print(server.stats())
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# A snapshot of real USD rates, enough to cover the examples in this repo
+USD_RATES = {
+    "USD": 1.0, "EUR": 0.93, "GBP": 0.79, "INR": 83.58, "JPY": 157.5, "CNY": 7.24, "AUD": 1.51,
+    "CAD": 1.37, "CHF": 0.9, "SGD": 1.35, "AED": 3.6725, "BRL": 5.12, "MXN": 17.1, "ZAR": 18.4,
+}
+
+
+def rates_for(base: str) -> Optional[dict]:
+    if base not in USD_RATES:
+        return None
+    return {code: round(rate / USD_RATES[base], 6) for code, rate in USD_RATES.items()}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so pooled clients can reuse connections
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) < 2 or parts[-2] != "latest":
+            self._reply(404, {"result": "error", "error-type": "unknown-path"})
+            return
+        base = parts[-1].upper()
+        with self.server.lock:
+            self.server.requests[base] += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        rates = rates_for(base)
+        if rates is None:
+            self._reply(404, {"result": "error", "error-type": "unsupported-code"})
+            return
+        self._reply(200, {"result": "success", "base_code": base, "conversion_rates": rates})
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # The default backlog of 5 drops connects under fan-out
+
+
+class LocalRateServer:
+    """Threaded HTTP server on 127.0.0.1 (random port) serving /latest/{BASE}."""
+
+    def __init__(self, latency: float = 0.0):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.lock = threading.Lock()
+        self._server.latency = latency
+        self._server.requests = Counter()
+        self._server.connections = 0
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_latency(self, seconds: float):
+        self._server.latency = seconds
+
+    def start(self) -> "LocalRateServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        return {
+            "requests": sum(self._server.requests.values()),
+            "requests_by_base": dict(self._server.requests),
+            "connections_accepted": self._server.connections,
+        }
+
+    def __enter__(self) -> "LocalRateServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
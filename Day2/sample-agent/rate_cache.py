@@ -0,0 +1,304 @@
+# Exchange-rate table cache shared by get_exchange_rate and the package import.
+#
+# The API returns the whole `conversion_rates` table for a base currency, yet get_exchange_rate downloaded it on every
+# tool call to read a single entry. RateTableCache keeps one table per base currency:
+#   - fresh for `ttl` seconds: served from memory
+#   - then stale for up to `stale_ttl` more seconds: still served immediately, while one background refresh runs
+#     (stale-while-revalidate), so callers never wait for a refresh
+#   - missing or too old: fetched, with single-flight deduplication, so 200 concurrent conversions from USD cause
+#     one HTTP request and 199 callers wait for its result
+# get() is for threads and plain `def` tools; `await get_async()` is for async tools (async_rates.py, bulk_convert.py):
+# it fetches with a pooled, keep-alive httpx.AsyncClient (AsyncRateFetcher) instead of blocking the event loop.
+# Both read and fill the same tables, TTLs (EXCHANGE_RATE_TTL / EXCHANGE_RATE_STALE_TTL) and stats.
+#
+#   python Day2/sample-agent/rate_cache.py   # 200 concurrent lookups against a local HTTP stand-in
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import requests
+
+# exchangerate-api.com endpoint used by the Day 2 samples (override to point at a local stand-in)
+DEFAULT_API_URL = "https://v6.exchangerate-api.com/v6/0582a90af241c7eb38b0c9a6"
+
+# Loading the CA bundle takes tens of milliseconds of CPU; do it once at import instead of on the event loop
+SSL_CONTEXT = httpx.create_ssl_context()
+
+
+def api_url() -> str:
+    return os.getenv("EXCHANGE_RATE_API_URL", DEFAULT_API_URL).rstrip("/")
+
+
+def fetch_rate_table(base: str, timeout: float = 10) -> dict:
+    """Downloads the conversion_rates table for one base currency (raises requests exceptions)."""
+    response = requests.get(f"{api_url()}/latest/{base}", timeout=timeout)
+    response.raise_for_status()
+    print("Request successful!")
+    return response.json().get("conversion_rates", {})
+
+
+@dataclass
+class RateCacheStats:
+    hits: int = 0  # Fresh table served from memory
+    stale_hits: int = 0  # Stale table served while a refresh runs
+    misses: int = 0  # Caller had to wait for a fetch (its own or a coalesced one)
+    coalesced: int = 0  # Misses that waited for another caller's fetch instead of fetching
+    fetches: int = 0  # HTTP fetches made for misses
+    refreshes: int = 0  # Background refreshes started
+    fetch_errors: int = 0
+    refresh_errors: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {**self.__dict__, "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0}
+
+
+class AsyncRateFetcher:
+    """Async fetch of a conversion_rates table: one pooled, keep-alive httpx.AsyncClient per event loop.
+
+    Args:
+        max_concurrency: Max upstream requests in flight (per event loop).
+        max_connections: Size of the keep-alive pool.
+        connect_timeout / read_timeout: Seconds.
+    """
+
+    def __init__(self, max_concurrency: int = 10, max_connections: int = 10, connect_timeout: float = 3.0,
+                 read_timeout: float = 10.0):
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        # httpx clients and semaphores belong to one event loop, so each loop gets its own
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple]" = weakref.WeakKeyDictionary()
+
+    async def __call__(self, base: str) -> dict:
+        """Downloads the conversion_rates table for one base currency (raises httpx exceptions)."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._loops:
+            self._loops[loop] = (
+                httpx.AsyncClient(limits=self.limits, timeout=self.timeout, verify=SSL_CONTEXT),
+                asyncio.Semaphore(self.max_concurrency),
+            )
+        client, slots = self._loops[loop]
+        async with slots:
+            response = await client.get(f"{api_url()}/latest/{base}")
+        response.raise_for_status()
+        return response.json().get("conversion_rates", {})
+
+    async def aclose(self):
+        """Closes the connections of the current event loop."""
+        client, _ = self._loops.pop(asyncio.get_running_loop(), (None, None))
+        if client is not None:
+            await client.aclose()
+
+
+class _Flight:
+    """One fetch in progress; later callers wait on `done` and share its result."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.table: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+
+
+class RateTableCache:
+    """TTL + stale-while-revalidate + single-flight cache of conversion_rates tables, keyed by base currency.
+
+    Thread-safe: tool calls may come from the event loop thread or from worker threads.
+    Threads share fetches with threads, and tasks with tasks of the same event loop (a sync caller on the loop thread
+    cannot wait for a task without blocking it); every fetch fills the one table cache.
+
+    Args:
+        fetch: Blocking fetch used by get().
+        afetch: Async fetch used by get_async() (None = run `fetch` in a worker thread).
+        ttl / stale_ttl: Seconds a table is fresh, then served stale while it is refreshed.
+    """
+
+    def __init__(self, fetch: Callable[[str], dict] = fetch_rate_table,
+                 afetch: Optional[Callable[[str], Awaitable[dict]]] = None, ttl: float = 600, stale_ttl: float = 3600):
+        self.fetch = fetch
+        self.afetch = afetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.stats = RateCacheStats()
+        self._tables: dict[str, tuple[float, dict]] = {}  # base -> (fetched_at, table)
+        self._flights: dict[str, _Flight] = {}
+        self._async_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+        self._refreshing: set[str] = set()
+        self._refresh_tasks: set[asyncio.Task] = set()  # The event loop only keeps weak references to tasks
+        self._lock = threading.Lock()
+
+    def _cached(self, base: str, start_refresh: Callable[[str], None]) -> Optional[dict]:
+        """A fresh or stale table (starting a refresh of a stale one), or None on a miss. Holds the lock."""
+        entry = self._tables.get(base)
+        age = time.monotonic() - entry[0] if entry else None
+        if entry and age <= self.ttl:
+            self.stats.hits += 1
+            return entry[1]
+        if entry and age <= self.ttl + self.stale_ttl:
+            self.stats.stale_hits += 1
+            if base not in self._refreshing:
+                self._refreshing.add(base)
+                self.stats.refreshes += 1
+                start_refresh(base)
+            return entry[1]
+        self.stats.misses += 1
+        return None
+
+    def _store(self, base: str, table: dict):
+        with self._lock:
+            self._tables[base] = (time.monotonic(), table)
+
+    def get(self, base: str) -> dict:
+        """The conversion_rates table for `base`. Raises whatever `fetch` raises if there is nothing usable cached."""
+        base = base.upper()
+        with self._lock:
+            table = self._cached(base, lambda b: threading.Thread(target=self._refresh, args=(b,), daemon=True).start())
+            if table is not None:
+                return table
+            flight = self._flights.get(base)
+            leader = flight is None
+            if leader:
+                flight = self._flights[base] = _Flight()
+                self.stats.fetches += 1
+            else:
+                self.stats.coalesced += 1
+
+        if leader:
+            try:
+                flight.table = self.fetch(base)
+                self._store(base, flight.table)
+            except BaseException as e:
+                flight.error = e
+                with self._lock:
+                    self.stats.fetch_errors += 1
+            finally:
+                with self._lock:
+                    del self._flights[base]
+                flight.done.set()
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.table
+
+    async def get_async(self, base: str) -> dict:
+        """get() for async callers: waits for a fetch without blocking the event loop."""
+        base = base.upper()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            table = self._cached(base, lambda b: self._start_refresh_task(loop, b))
+            if table is not None:
+                return table
+            flights = self._async_flights.setdefault(loop, {})
+            flight = flights.get(base)
+            if flight is None:
+                self.stats.fetches += 1
+                flight = flights[base] = loop.create_task(self._fetch_miss(base))
+                flight.add_done_callback(lambda _: flights.pop(base, None))
+            else:
+                self.stats.coalesced += 1
+        return await asyncio.shield(flight)  # One caller being cancelled must not cancel the shared fetch
+
+    async def _afetch(self, base: str) -> dict:
+        if self.afetch is None:
+            return await asyncio.to_thread(self.fetch, base)
+        return await self.afetch(base)
+
+    async def _fetch_miss(self, base: str) -> dict:
+        try:
+            table = await self._afetch(base)
+        except Exception:
+            with self._lock:
+                self.stats.fetch_errors += 1
+            raise
+        self._store(base, table)
+        return table
+
+    def _start_refresh_task(self, loop: asyncio.AbstractEventLoop, base: str):
+        task = loop.create_task(self._refresh_async(base))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    def _refresh(self, base: str):
+        try:
+            self._store(base, self.fetch(base))
+        except Exception:
+            with self._lock:
+                self.stats.refresh_errors += 1  # Keep serving the stale table until it expires
+        finally:
+            with self._lock:
+                self._refreshing.discard(base)
+
+    async def _refresh_async(self, base: str):
+        try:
+            self._store(base, await self._afetch(base))
+        except Exception:
+            with self._lock:
+                self.stats.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(base)
+
+    def invalidate(self, base: Optional[str] = None):
+        with self._lock:
+            if base is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(base.upper(), None)
+
+    def metrics(self) -> dict:
+        return self.stats.as_dict()
+
+    async def aclose(self):
+        """Closes the async fetcher's connections of the current event loop."""
+        if hasattr(self.afetch, "aclose"):
+            await self.afetch.aclose()
+
+
+# Shared by both get_exchange_rate tools (agent_tools.py, async_rates.py), convert_many and the package __init__
+RATE_CACHE = RateTableCache(
+    afetch=AsyncRateFetcher(),
+    ttl=float(os.getenv("EXCHANGE_RATE_TTL", "600")),
+    stale_ttl=float(os.getenv("EXCHANGE_RATE_STALE_TTL", "3600")),
+)
+
+
+def demo(concurrent: int = 200, latency: float = 0.2):
+    """`concurrent` threads ask for the USD table at once, then again after the TTL has passed."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from local_rate_server import LocalRateServer
+
+    with LocalRateServer(latency=latency) as server:
+        os.environ["EXCHANGE_RATE_API_URL"] = server.url
+        cache = RateTableCache(ttl=0.5, stale_ttl=5)
+
+        with ThreadPoolExecutor(max_workers=concurrent) as pool:
+            started = time.perf_counter()
+            list(pool.map(lambda _: cache.get("USD")["INR"], range(concurrent)))
+            cold = time.perf_counter() - started
+            print(f"\n📊 {concurrent} concurrent cold lookups: {cold:.3f}s, {server.stats()['requests']} HTTP request(s)")
+
+            started = time.perf_counter()
+            list(pool.map(lambda _: cache.get("USD")["EUR"], range(concurrent)))
+            print(f"   {concurrent} warm lookups: {time.perf_counter() - started:.4f}s")
+
+            time.sleep(0.6)  # Past the TTL: stale tables are served while one refresh runs
+            started = time.perf_counter()
+            list(pool.map(lambda _: cache.get("USD")["JPY"], range(concurrent)))
+            print(f"   {concurrent} stale lookups: {time.perf_counter() - started:.4f}s (refresh in background)")
+            time.sleep(latency * 2)
+
+        print(f"   Server: {server.stats()}")
+        print(f"   Cache:  {cache.metrics()}")
+
+
+if __name__ == "__main__":
+    demo()
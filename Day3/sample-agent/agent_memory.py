@@ -19,6 +19,14 @@ from google.genai import types
 # from adk_imports import *
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.session_cache import get_or_create_session
+from adk_utils.session_window import is_database_backed, stream_events
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 # Types of MemoryService -> InMemoryMemoryService (Stores raw events, Keyword matching retrieval), VertexAiMemoryBankService (Intelligently consolidates before storing i.e. store summary of events, Retrieval Semantic search via embeddings)
 
 retry_config = types.HttpRetryOptions(
@@ -37,15 +45,10 @@ async def run_session(runner_instance: Runner, user_queries: list[str] | str, se
     """Helper function to run queries in a session and display responses."""
     print(f"\n### Session: {session_id}")
 
-    # Create or retrieve session
-    try:
-        session = await session_service.create_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
-    except:
-        session = await session_service.get_session(
-            app_name=APP_NAME, user_id=USER_ID, session_id=session_id
-        )
+    # Retrieve the session, or create it if it does not exist yet (one call, no exception for existing sessions)
+    session = await get_or_create_session(
+        session_service, app_name=APP_NAME, user_id=USER_ID, session_id=session_id
+    )
 
     # Convert single query to list
     if isinstance(user_queries, str):
@@ -64,6 +67,22 @@ async def run_session(runner_instance: Runner, user_queries: list[str] | str, se
                 text = event.content.parts[0].text
                 if text and text != "None":
                     print(f"Agent > {text}")
+
+
+def print_event(event):
+    text = event.content.parts[0].text if event.content and event.content.parts else "(empty)"
+    print(f"  {event.content.role if event.content else event.author}: {text}...")
+
+
+async def print_session_events(session_service, session):
+    """Prints the events of the session already loaded; a database-backed service is read a page at a time instead."""
+    print("📝 Session contains:")
+    if not is_database_backed(session_service):  # InMemorySessionService: session.events are already in memory
+        for event in session.events:
+            print_event(event)
+        return
+    async for event in stream_events(session_service, app_name=session.app_name, user_id=session.user_id, session_id=session.id):
+        print_event(event)
 print("✅ Helper functions defined.")
 
 async def MemorySavingAgent():
@@ -102,10 +121,7 @@ async def MemorySavingAgent():
     
     session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id='conversation-01')
     
-    print("📝 Session contains:")
-    for event in session.events:
-        text = event.content.parts[0].text if event.content and event.content.parts else "(empty)"
-        print(f"  {event.content.role}: {text}...")
+    await print_session_events(session_service, session)
 
     # This is the key method! (manual)
     await memory_service.add_session_to_memory(session=session) 
@@ -162,10 +178,7 @@ async def MemorySearchingAgent():
     
     session = await session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id="birthday-session-01")
     
-    print("📝 Session contains:")
-    for event in session.events:
-        text = event.content.parts[0].text if event.content and event.content.parts else "(empty)"
-        print(f"  {event.content.role}: {text}...")
+    await print_session_events(session_service, session)
     
     # For the events to be accesed by all the sessions using the memory, Call add_session_to_memory() and pass the session object
     
@@ -1,5 +1,4 @@
 import asyncio
-import sqlite3
 from typing import Any, Dict
 from dotenv import load_dotenv
 load_dotenv()
@@ -16,6 +15,16 @@ from google.genai import types
 # from adk_imports import *
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.session_cache import CachedSessionService, get_or_create_session
+from adk_utils.session_db import migrate, query_events
+from adk_utils.session_window import open_window
+from adk_utils.sqlite_sessions import FastSqliteSessionService, GroupCommitPlugin
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 retry_config = types.HttpRetryOptions(
     attempts=5,  # Maximum retry attempts
     exp_base=7,  # Delay multiplier
@@ -35,15 +44,10 @@ async def run_session(runner_instance: Runner, user_queries: list[str] | str = N
 
     # Get app name from the Runner
     app_name = runner_instance.app_name
-    # Attempt to create a new session or retrieve an existing one
-    try:
-        session = await session_service.create_session(
-            app_name=app_name, user_id=USER_ID, session_id=session_name
-        )
-    except:
-        session = await session_service.get_session(
-            app_name=app_name, user_id=USER_ID, session_id=session_name
-        )
+    # Retrieve the session, or create it if it does not exist yet (one call, no exception for existing sessions)
+    session = await get_or_create_session(
+        session_service, app_name=app_name, user_id=USER_ID, session_id=session_name
+    )
 
     # Process queries if provided
     if user_queries:
@@ -139,10 +143,18 @@ async def PersistentAgent():
     # Step 2: Switch to DatabaseSessionService
     # SQLite database will be created automatically
     db_url = "sqlite:///Day3/sample-agent/my_agent_data.db"  # Local SQLite file
-    session_service = DatabaseSessionService(db_url=db_url) # CHANGED !IMPORTANT
+    # DatabaseSessionService(db_url=db_url) with WAL, pooled connections and group-committed events (same tables)
+    database = FastSqliteSessionService(db_url) # CHANGED !IMPORTANT
+    # Keep the sessions in use in memory: repeat turns skip the database reads, new events are still written through
+    session_service = CachedSessionService(database)
 
     # Step 3: Create a new runner with persistent storage
-    runner = Runner(agent=chatbot_agent, app_name=APP_NAME, session_service=session_service)
+    runner = Runner(
+        agent=chatbot_agent,
+        app_name=APP_NAME,
+        session_service=session_service,
+        plugins=[GroupCommitPlugin(database)],  # Commits each turn's events in one transaction when it ends
+    )
 
     print("✅ Upgraded to persistent sessions!")
     print(f"   - Database: my_agent_data.db")
@@ -179,17 +191,23 @@ async def PersistentAgent():
         "test-db-session-02", # Changed session name, does not know this one
         session_service
     )
+    await database.close()  # Commits the events still buffered
     
 
-def check_data_in_db(db_name):
-    with sqlite3.connect(f"Day3/sample-agent/{db_name}") as connection:
-        cursor = connection.cursor()
-        result = cursor.execute(
-            "select app_name, session_id, author, content from events"
-        )
-        print([_[0] for _ in result.description])
-        for each in result.fetchall():
-            print(each)
+def check_data_in_db(db_name, **filters):
+    # Streams the events (optionally filtered: app_name, user_id, author, since, until) in chunks of 500 rows,
+    # instead of fetching the whole table at once
+    columns = ("app_name", "session_id", "author", "content")
+    print(list(columns))
+    for chunk in query_events(f"Day3/sample-agent/{db_name}", columns=columns, chunk_size=500, **filters):
+        for each in chunk:
+            print(tuple(each.values()))
+
+
+def migrate_db(db_name):
+    # Adds the indexes (and the columns newer ADK versions expect) to a session database; safe to run again
+    applied = migrate(f"Day3/sample-agent/{db_name}")
+    print(f"✅ {db_name}: {applied or 'already up to date'}")
 
 
 # context compaction
@@ -201,6 +219,10 @@ async def PersistentAgentWithContextCompaction():
         description="A text chatbot with persistent memory",
     )
     
+    db_url = "sqlite:///Day3/sample-agent/research_agent_data.db"  # Local SQLite file
+    database = FastSqliteSessionService(db_url)  # WAL, pooled connections, group-committed events
+    session_service = CachedSessionService(database)  # Hot sessions kept in memory
+
     # Re-define our app with Events Compaction enabled
     research_app_compacting = App(
         name="research_app_compacting",
@@ -210,11 +232,9 @@ async def PersistentAgentWithContextCompaction():
             compaction_interval=3,  # Trigger compaction every 3 invocations
             overlap_size=1,  # Keep 1 previous turn for context
         ),
+        plugins=[GroupCommitPlugin(database)],  # Commits each invocation's events in one transaction when it ends
     )
 
-    db_url = "sqlite:///Day3/sample-agent/research_agent_data.db"  # Local SQLite file
-    session_service = DatabaseSessionService(db_url=db_url)
-
     # Create a new runner for our upgraded app
     research_runner_compacting = Runner(
         app=research_app_compacting, session_service=session_service
@@ -257,30 +277,29 @@ async def PersistentAgentWithContextCompaction():
     # )
     
     async def checkForCompactionEvent():
-        # Get the final session state
-        final_session = await session_service.get_session(
+        # Open a window on the final session: its latest compaction summary and last events, not the whole history
+        window = await open_window(
+            session_service,
             app_name=research_runner_compacting.app_name,
             user_id=USER_ID,
             session_id="compaction_demo",
+            last_n=5,
         )
 
         print("--- Searching for Compaction Summary Event ---")
-        found_summary = False
-        for event in final_session.events:
-            # Compaction events have a 'compaction' attribute
-            if event.actions and event.actions.compaction:
-                print("\n✅ SUCCESS! Found the Compaction Event:")
-                print(f"  Author: {event.author}")
-                print(f"\n Compacted information: {event}")
-                found_summary = True
-                break
-
-        if not found_summary:
+        # Compaction events have a 'compaction' attribute; the window holds the latest one
+        if window and window.summary:
+            print("\n✅ SUCCESS! Found the Compaction Event:")
+            print(f"  Author: {window.summary.author}")
+            print(f"\n Compacted information: {window.summary}")
+            print(f"\n Events after the summary: {len(window.context_events()) - 1}")
+        else:
             print(
                 "\n❌ No compaction event found. Try increasing the number of turns in the demo."
             )
 
     await checkForCompactionEvent()
+    await database.close()
 
 # Creating custom tools for Session state management (transferable characteristic across sessions, here username and user_country)
 # Define scope levels for state keys (following best practices)
@@ -374,7 +393,9 @@ async def AgentWithSessionStateTools():
 if __name__ == "__main__":
     # asyncio.run(InMemoryAgent())
     # asyncio.run(PersistentAgent())
+    # migrate_db("my_agent_data.db")
     # check_data_in_db("my_agent_data.db")  
+    # check_data_in_db("my_agent_data.db", author="user")  
     # check_data_in_db("research_agent_data.db")  
     # asyncio.run(PersistentAgentWithContextCompaction())
     asyncio.run(AgentWithSessionStateTools())
\ No newline at end of file
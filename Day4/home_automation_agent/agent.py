@@ -9,6 +9,13 @@ from google.adk.models.google_llm import Gemini
 
 from google.genai import types
 
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.lookup_table import LookupTable
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 # Configure Model Retry on errors
 retry_config = types.HttpRetryOptions(
     attempts=5,  # Maximum retry attempts
@@ -17,6 +24,12 @@ retry_config = types.HttpRetryOptions(
     http_status_codes=[429, 500, 503, 504],  # Retry on these HTTP errors
 )
 
+# The statuses a device accepts, indexed once at import: "on", " Off ", "turn on" or "switch-off" are understood too
+DEVICE_STATUSES = LookupTable(
+    {"ON": "ON", "OFF": "OFF"},
+    aliases={"turn on": "ON", "switch on": "ON", "turn off": "OFF", "switch off": "OFF"},
+)
+
 def set_device_status(location: str, device_id: str, status: str) -> dict:
     """Sets the status of a smart home device.
 
@@ -29,9 +42,12 @@ def set_device_status(location: str, device_id: str, status: str) -> dict:
         A dictionary confirming the action.
     """
     print(f"Tool Call: Setting {device_id} in {location} to {status}")
+    match = DEVICE_STATUSES.lookup(status)
+    if not match:
+        return {"success": False, "message": f"Unknown status '{status}'. Use ON or OFF."}
     return {
         "success": True,
-        "message": f"Successfully set the {device_id} in {location} to {status.lower()}."
+        "message": f"Successfully set the {device_id} in {location} to {match.value.lower()}."
     }
 
 # This agent has DELIBERATE FLAWS that we'll discover through evaluation!
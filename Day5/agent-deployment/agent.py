@@ -9,6 +9,19 @@ vertexai.init(
     location=os.environ["GOOGLE_CLOUD_LOCATION"],
 )
 
+# Mock weather database with structured responses, built once at import; keys are normalized city names
+WEATHER_DATA = {
+    "san francisco": {"status": "success", "report": "The weather in San Francisco is sunny with a temperature of 72°F (22°C)."},
+    "new york": {"status": "success", "report": "The weather in New York is cloudy with a temperature of 65°F (18°C)."},
+    "london": {"status": "success", "report": "The weather in London is rainy with a temperature of 58°F (14°C)."},
+    "tokyo": {"status": "success", "report": "The weather in Tokyo is clear with a temperature of 70°F (21°C)."},
+    "paris": {"status": "success", "report": "The weather in Paris is partly cloudy with a temperature of 68°F (20°C)."}
+}
+
+def normalize_city(city: str) -> str:
+    """Lower case, hyphens as spaces, single spaces: "New-York" -> "new york"."""
+    return " ".join(city.lower().replace("-", " ").replace("_", " ").split())
+
 def get_weather(city: str) -> dict:
     """
     Returns weather information for a given city.
@@ -23,20 +36,11 @@ def get_weather(city: str) -> dict:
     Returns:
         dict: Dictionary with status and weather report or error message
     """
-    # Mock weather database with structured responses
-    weather_data = {
-        "san francisco": {"status": "success", "report": "The weather in San Francisco is sunny with a temperature of 72°F (22°C)."},
-        "new york": {"status": "success", "report": "The weather in New York is cloudy with a temperature of 65°F (18°C)."},
-        "london": {"status": "success", "report": "The weather in London is rainy with a temperature of 58°F (14°C)."},
-        "tokyo": {"status": "success", "report": "The weather in Tokyo is clear with a temperature of 70°F (21°C)."},
-        "paris": {"status": "success", "report": "The weather in Paris is partly cloudy with a temperature of 68°F (20°C)."}
-    }
-
-    city_lower = city.lower()
-    if city_lower in weather_data:
-        return weather_data[city_lower]
+    city_key = normalize_city(city)
+    if city_key in WEATHER_DATA:
+        return WEATHER_DATA[city_key]
     else:
-        available_cities = ", ".join([c.title() for c in weather_data.keys()])
+        available_cities = ", ".join([c.title() for c in WEATHER_DATA.keys()])
         return {
             "status": "error",
             "error_message": f"Weather information for '{city}' is not available. Try: {available_cities}"
@@ -0,0 +1,12 @@
+# The vendor's product catalog, by product name (lower case).
+# Used by get_product_info (product_catalog_server.py); in production this would be the vendor's product database.
+
+PRODUCT_CATALOG = {
+    "iphone 15 pro": "iPhone 15 Pro, $999, Low Stock (8 units), 128GB, Titanium finish",
+    "samsung galaxy s24": "Samsung Galaxy S24, $799, In Stock (31 units), 256GB, Phantom Black",
+    "dell xps 15": 'Dell XPS 15, $1,299, In Stock (45 units), 15.6" display, 16GB RAM, 512GB SSD',
+    "macbook pro 14": 'MacBook Pro 14", $1,999, In Stock (22 units), M3 Pro chip, 18GB RAM, 512GB SSD',
+    "sony wh-1000xm5": "Sony WH-1000XM5 Headphones, $399, In Stock (67 units), Noise-canceling, 30hr battery",
+    "ipad air": 'iPad Air, $599, In Stock (28 units), 10.9" display, 64GB',
+    "lg ultrawide 34": 'LG UltraWide 34" Monitor, $499, Out of Stock, Expected: Next week',
+}
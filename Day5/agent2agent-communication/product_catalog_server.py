@@ -7,6 +7,13 @@ from google.adk.models.google_llm import Gemini
 from google.genai import types
 print("✅ ADK components imported successfully.")
 
+import os, sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))  # Repo root, for adk_utils
+from adk_utils import llm_cache, model_pool
+from adk_utils.lookup_table import LookupTable
+llm_cache.enable_from_env()  # Opt-in response cache shared by every Gemini instance: ADK_LLM_CACHE=1 in .env
+model_pool.enable_from_env()  # Opt-in shared HTTP connection pool and retry budget for every Gemini instance: ADK_MODEL_POOL=1 in .env
+
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -19,6 +26,12 @@ retry_config = types.HttpRetryOptions(
 
 # Define a product catalog lookup tool
 # In a real system, this would query the vendor's product database
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))  # This folder, for product_catalog
+from product_catalog import PRODUCT_CATALOG
+
+# Built once at import: "iphone15 pro" or "Samsung Galaxy S-24" find their product, "iphne 15 pro" gets a suggestion
+PRODUCT_TABLE = LookupTable(PRODUCT_CATALOG)
+
 def get_product_info(product_name: str) -> str:
     """Get product information for a given product.
 
@@ -28,24 +41,14 @@ def get_product_info(product_name: str) -> str:
     Returns:
         Product information as a string
     """
-    # Mock product catalog - in production, this would query a real database
-    product_catalog = {
-        "iphone 15 pro": "iPhone 15 Pro, $999, Low Stock (8 units), 128GB, Titanium finish",
-        "samsung galaxy s24": "Samsung Galaxy S24, $799, In Stock (31 units), 256GB, Phantom Black",
-        "dell xps 15": 'Dell XPS 15, $1,299, In Stock (45 units), 15.6" display, 16GB RAM, 512GB SSD',
-        "macbook pro 14": 'MacBook Pro 14", $1,999, In Stock (22 units), M3 Pro chip, 18GB RAM, 512GB SSD',
-        "sony wh-1000xm5": "Sony WH-1000XM5 Headphones, $399, In Stock (67 units), Noise-canceling, 30hr battery",
-        "ipad air": 'iPad Air, $599, In Stock (28 units), 10.9" display, 64GB',
-        "lg ultrawide 34": 'LG UltraWide 34" Monitor, $499, Out of Stock, Expected: Next week',
-    }
-
-    product_lower = product_name.lower().strip()
-
-    if product_lower in product_catalog:
-        return f"Product: {product_catalog[product_lower]}"
+    match = PRODUCT_TABLE.lookup(product_name)
+    if match.exact:
+        return f"Product: {match.value}"
+    elif match:  # A misspelling: ask, rather than answer for a product nobody named
+        return f"Sorry, I don't have information for {product_name}. Did you mean: {match.key.title()}?"
     else:
-        available = ", ".join([p.title() for p in product_catalog.keys()])
-        return f"Sorry, I don't have information for {product_name}. Available products: {available}"
+        suggestions = ", ".join(p.title() for p in (match.suggestions or PRODUCT_TABLE))
+        return f"Sorry, I don't have information for {product_name}. Did you mean: {suggestions}?"
 
 
 # Create the Product Catalog Agent
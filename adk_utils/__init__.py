@@ -0,0 +1,2 @@
+# Helpers shared by the sample agents of every day (Day1 ... Day5).
+# The sample folders are run as plain scripts, so they add the repo root to sys.path before importing this package.
@@ -0,0 +1,348 @@
+# Durable index of the tool approvals that are waiting for a human decision.
+#
+# Finding the paused invocations used to mean scanning every event of a run (check_for_approval in the bulk-image
+# notebook) and approving them one run_async call at a time. Here:
+#   - ApprovalRecorderPlugin records each adk_request_confirmation call as it is emitted: approval id -> invocation
+#     id, app/user/session, tool, hint and payload
+#   - ApprovalStore keeps them in SQLite (survives restarts, indexed by status and by invocation) and the pending ones
+#     in a dict as well, so a lookup by approval id is one hash probe
+#   - resolve_approvals() applies many decisions at once: the approvals of one invocation go back in one message,
+#     the invocations of different sessions are resumed concurrently (those of one session one after another)
+#
+#   approval_store = ApprovalStore("approvals.sqlite3")
+#   app = App(..., resumability_config=ResumabilityConfig(is_resumable=True),
+#             plugins=[ApprovalRecorderPlugin(approval_store)])
+#   ...
+#   await resolve_approvals(runner, approval_store, {a.approval_id: True for a in approval_store.pending()})
+#
+# Resuming after a restart also needs the sessions to be durable (DatabaseSessionService); with
+# InMemorySessionService only the index survives.
+#
+#   python adk_utils/approval_store.py   # 200 paused orders resumed one by one vs in bulk (fake model)
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # Repo root, when run as a script
+from adk_utils.event_pipeline import REQUEST_CONFIRMATION, ApprovalRequest, EventPipeline, payloads
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+APPROVED = "approved"  # Decision delivered and the invocation resumed
+REJECTED = "rejected"
+FAILED = "failed"  # The resume raised; the approval can be resolved again
+
+
+@dataclass
+class PendingApproval:
+    approval_id: str
+    invocation_id: str
+    app_name: str
+    user_id: str
+    session_id: str
+    tool_name: Optional[str]
+    hint: Optional[str]
+    payload: Any
+    created_at: float
+    status: str = PENDING
+    error: Optional[str] = None
+
+    def response_part(self, approved: bool) -> types.Part:
+        return types.Part(function_response=types.FunctionResponse(
+            id=self.approval_id, name=REQUEST_CONFIRMATION, response={"confirmed": approved},
+        ))
+
+
+_COLUMNS = "approval_id, invocation_id, app_name, user_id, session_id, tool_name, hint, payload, created_at, status, error"
+
+
+def _from_row(row) -> PendingApproval:
+    values = list(row)
+    values[7] = json.loads(values[7]) if values[7] is not None else None
+    return PendingApproval(*values)
+
+
+class ApprovalStore:
+    """SQLite table of approvals, plus an in-memory hash index of the pending ones."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """create table if not exists approvals (
+                approval_id text primary key,
+                invocation_id text not null,
+                app_name text not null,
+                user_id text not null,
+                session_id text not null,
+                tool_name text,
+                hint text,
+                payload text,
+                created_at real not null,
+                status text not null,
+                error text,
+                decided_at real
+            )"""
+        )
+        self._db.execute("create index if not exists approvals_status on approvals (status, app_name, user_id, created_at)")
+        self._db.execute("create index if not exists approvals_invocation on approvals (invocation_id)")
+        self._db.commit()
+        rows = self._db.execute(f"select {_COLUMNS} from approvals where status in (?, ?)", (PENDING, FAILED))
+        self._open = {approval.approval_id: approval for approval in map(_from_row, rows)}  # Pending or failed
+
+    def add(self, approval: PendingApproval):
+        with self._lock:
+            self._db.execute(
+                f"insert or ignore into approvals ({_COLUMNS}) values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (approval.approval_id, approval.invocation_id, approval.app_name, approval.user_id, approval.session_id,
+                 approval.tool_name, approval.hint, json.dumps(approval.payload), approval.created_at, approval.status,
+                 approval.error),
+            )
+            self._db.commit()
+            if approval.status in (PENDING, FAILED):
+                self._open.setdefault(approval.approval_id, approval)
+
+    def get(self, approval_id: str) -> Optional[PendingApproval]:
+        """The approval with this id: open ones from memory, resolved ones from disk."""
+        approval = self._open.get(approval_id)
+        if approval is not None:
+            return approval
+        with self._lock:
+            row = self._db.execute(f"select {_COLUMNS} from approvals where approval_id = ?", (approval_id,)).fetchone()
+        return _from_row(row) if row else None
+
+    def pending(self, app_name: Optional[str] = None, user_id: Optional[str] = None,
+                include_failed: bool = True) -> list[PendingApproval]:
+        """Open approvals, oldest first, optionally of one app / user."""
+        statuses = (PENDING, FAILED) if include_failed else (PENDING,)
+        return sorted(
+            (a for a in self._open.values()
+             if a.status in statuses and app_name in (None, a.app_name) and user_id in (None, a.user_id)),
+            key=lambda a: a.created_at,
+        )
+
+    def mark(self, approval_ids: Iterable[str], status: str, error: Optional[str] = None):
+        """Sets the status of several approvals in one transaction."""
+        approval_ids = list(approval_ids)
+        with self._lock:
+            self._db.executemany(
+                "update approvals set status = ?, error = ?, decided_at = ? where approval_id = ?",
+                [(status, error, time.time(), approval_id) for approval_id in approval_ids],
+            )
+            self._db.commit()
+            for approval_id in approval_ids:
+                approval = self._open.get(approval_id)
+                if status not in (PENDING, FAILED):
+                    self._open.pop(approval_id, None)
+                elif approval is not None:
+                    approval.status, approval.error = status, error
+                else:  # Reopened, e.g. a resume that failed after the decision was recorded
+                    row = self._db.execute(f"select {_COLUMNS} from approvals where approval_id = ?", (approval_id,)).fetchone()
+                    if row:
+                        self._open[approval_id] = _from_row(row)
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._db.execute("select count(*) from approvals").fetchone()[0]
+            return self._db.execute("select count(*) from approvals where status = ?", (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ApprovalRecorderPlugin(BasePlugin):
+    """Records every approval request of the app in `store`, and the decisions users send back."""
+
+    def __init__(self, store: ApprovalStore, name: str = "approval_recorder"):
+        super().__init__(name=name)
+        self.store = store
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        session = invocation_context.session
+        for payload in payloads(event):
+            if isinstance(payload, ApprovalRequest):
+                self.store.add(PendingApproval(
+                    approval_id=payload.approval_id, invocation_id=payload.invocation_id,
+                    app_name=session.app_name, user_id=session.user_id, session_id=session.id,
+                    tool_name=payload.tool_name, hint=payload.hint, payload=payload.payload, created_at=event.timestamp,
+                ))
+        return None
+
+    async def on_user_message_callback(self, *, invocation_context: InvocationContext,
+                                       user_message: types.Content) -> Optional[types.Content]:
+        # Decisions sent without resolve_approvals (e.g. ApprovalRequest.response) are recorded too
+        decisions = defaultdict(list)
+        for part in user_message.parts or []:
+            response = part.function_response
+            if response and response.name == REQUEST_CONFIRMATION and isinstance(response.response, dict):
+                decisions[APPROVED if response.response.get("confirmed") else REJECTED].append(response.id)
+        for status, approval_ids in decisions.items():
+            self.store.mark(approval_ids, status)
+        return None
+
+
+async def resolve_approvals(
+    runner,
+    store: ApprovalStore,
+    decisions: Mapping[str, bool],
+    concurrency: int = 16,
+    pipeline: Optional[EventPipeline] = None,
+) -> dict[str, str]:
+    """Applies {approval_id: approved} decisions and resumes the paused invocations.
+
+    Returns the new status of each approval id ("approved", "rejected", "failed", or "unknown" / "already <status>"
+    for ids that were not open). Events of the resumed runs go through `pipeline` if given.
+    """
+    outcome: dict[str, str] = {}
+    sessions: dict[tuple, dict[str, list]] = defaultdict(lambda: defaultdict(list))  # session -> invocation -> approvals
+    for approval_id, approved in decisions.items():
+        approval = store.get(approval_id)
+        if approval is None or approval.app_name != runner.app_name:
+            outcome[approval_id] = "unknown"
+        elif approval.status not in (PENDING, FAILED):
+            outcome[approval_id] = f"already {approval.status}"
+        else:
+            sessions[(approval.user_id, approval.session_id)][approval.invocation_id].append((approval, approved))
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def resume(user_id: str, session_id: str, invocation_id: str, items: list):
+        message = types.Content(role="user", parts=[approval.response_part(approved) for approval, approved in items])
+        try:
+            if pipeline is not None:
+                await pipeline.run(runner, user_id=user_id, session_id=session_id, new_message=message,
+                                   invocation_id=invocation_id)
+            else:
+                async for _ in runner.run_async(user_id=user_id, session_id=session_id, new_message=message,
+                                                invocation_id=invocation_id):
+                    pass
+        except Exception as e:
+            logger.warning("Resuming invocation %s failed: %r", invocation_id, e)
+            store.mark([approval.approval_id for approval, _ in items], FAILED, error=repr(e))
+            for approval, _ in items:
+                outcome[approval.approval_id] = FAILED
+            return
+        for status in (APPROVED, REJECTED):
+            approval_ids = [approval.approval_id for approval, approved in items if approved == (status == APPROVED)]
+            store.mark(approval_ids, status)
+            outcome.update(dict.fromkeys(approval_ids, status))
+
+    async def resume_session(user_id: str, session_id: str, invocations: dict):
+        # One invocation at a time per session: they append to the same event list
+        async with slots:
+            for invocation_id, items in invocations.items():
+                await resume(user_id, session_id, invocation_id, items)
+
+    await asyncio.gather(*(resume_session(user_id, session_id, invocations)
+                           for (user_id, session_id), invocations in sessions.items()))
+    return outcome
+
+
+async def resolve_all(runner, store: ApprovalStore, approved: bool, user_id: Optional[str] = None, **kwargs) -> dict[str, str]:
+    """Approves (or rejects) every open approval of the runner's app, optionally of one user."""
+    decisions = {a.approval_id: approved for a in store.pending(app_name=runner.app_name, user_id=user_id)}
+    return await resolve_approvals(runner, store, decisions, **kwargs)
+
+
+async def demo(orders: int = 200, model_latency: float = 0.2, concurrency: int = 32):
+    """Fake model: `orders` sessions paused on an approval, found and resumed one by one vs from the store in bulk."""
+    import tempfile
+
+    from google.adk.agents import LlmAgent
+    from google.adk.apps.app import App, ResumabilityConfig
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.adk.tools.function_tool import FunctionTool
+    from google.adk.tools.tool_context import ToolContext
+
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Day1", "sample-agent"))
+    from fake_gemini import FakeGeminiBackend, call_tool
+
+    def place_order(num_images: int, tool_context: ToolContext) -> dict:
+        """Places an image order; asks for approval."""
+        if not tool_context.tool_confirmation:
+            tool_context.request_confirmation(hint=f"Approve {num_images} images?", payload={"num_images": num_images})
+            return {"status": "pending"}
+        return {"status": "approved" if tool_context.tool_confirmation.confirmed else "rejected"}
+
+    async def paused_orders(store: ApprovalStore):
+        backend = FakeGeminiBackend(
+            latency=model_latency, replies={"order_agent": [call_tool("place_order", num_images=3), "Order handled."]}
+        )
+        agent = LlmAgent(name="order_agent", model=backend.model("gemini-2.5-flash-lite"), instruction="Take orders.",
+                         tools=[FunctionTool(place_order)])
+        app = App(name="orders", root_agent=agent, resumability_config=ResumabilityConfig(is_resumable=True),
+                  plugins=[ApprovalRecorderPlugin(store)])
+        session_service = InMemorySessionService()
+        runner = Runner(app=app, session_service=session_service)
+        pipeline = EventPipeline()
+
+        async def start(i: int):
+            session = await session_service.create_session(app_name="orders", user_id=f"user_{i % 10}")
+            await pipeline.run(runner, user_id=session.user_id, session_id=session.id, new_message="3 images please")
+            return session
+
+        sessions = await asyncio.gather(*(start(i) for i in range(orders)))
+        return runner, session_service, sessions
+
+    report = {}
+
+    # Before: scan every event of every session for the approval request, then resume one at a time
+    runner, session_service, sessions = await paused_orders(ApprovalStore())
+    started = time.perf_counter()
+    found = []
+    for session in sessions:
+        stored = await session_service.get_session(app_name="orders", user_id=session.user_id, session_id=session.id)
+        for event in stored.events:
+            found += [(stored, p) for p in payloads(event) if isinstance(p, ApprovalRequest)]
+    scan = time.perf_counter() - started
+    for session, approval in found:
+        async for _ in runner.run_async(user_id=session.user_id, session_id=session.id,
+                                        new_message=approval.response(True), invocation_id=approval.invocation_id):
+            pass
+    report["scan + one by one"] = {"found": len(found), "find_s": round(scan, 4),
+                                   "total_s": round(time.perf_counter() - started, 2)}
+
+    # After: the plugin indexed the approvals as they were emitted; resolve them all at once
+    path = os.path.join(tempfile.mkdtemp(prefix="approvals_"), "approvals.sqlite3")
+    store = ApprovalStore(path)
+    runner, _, _ = await paused_orders(store)
+    started = time.perf_counter()
+    pending = store.pending(app_name="orders")
+    find = time.perf_counter() - started
+    outcome = await resolve_approvals(runner, store, {a.approval_id: True for a in pending}, concurrency=concurrency)
+    report["store + resolve_approvals"] = {"found": len(pending), "find_s": round(find, 4),
+                                           "total_s": round(time.perf_counter() - started, 2)}
+
+    print(f"\n📊 {orders} orders paused for approval, {model_latency}s per model call")
+    for label, r in report.items():
+        print(f"   {label:<26} {r}")
+    print(f"   Statuses: { {s: store.count(s) for s in (PENDING, APPROVED, REJECTED, FAILED)} }, "
+          f"all approved: {set(outcome.values()) == {APPROVED}}")
+    store.close()
+    reopened = ApprovalStore(path)
+    print(f"   Reopened {path}: {reopened.count()} approvals, {len(reopened.pending())} open")
+    reopened.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
@@ -0,0 +1,209 @@
+# Concurrent batch API for InMemoryRunner / Runner.
+#
+# run_debug, run_session (Day3) and call_agent_async (adk-docs-python-example) all send one prompt at a time.
+# run_batch sends many: every prompt gets its own session, at most `concurrency` invocations run at once, and results
+# are streamed back in completion order with their latency, token usage and error status.
+#
+# Backpressure: prompts are pulled from the iterable only when a worker is free, and a finished result waits in a
+# queue of size `concurrency` until the caller takes it. A 100k-prompt generator therefore never has more than
+# `concurrency` invocations (plus `concurrency` finished results) in memory, and a slow consumer slows the batch down.
+#
+#   from adk_utils.batch_runner import run_batch
+#   async for result in run_batch(runner, prompts, concurrency=8):
+#       print(result.index, result.latency_s, result.total_tokens, result.error or result.text)
+#
+#   python adk_utils/batch_runner.py   # serial vs concurrent against a local HTTP stand-in (no API key needed)
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Iterable, Optional, Union
+
+from google.adk.runners import Runner
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class BatchResult:
+    index: int  # Position of the prompt in the input
+    prompt: str
+    session_id: Optional[str] = None
+    text: Optional[str] = None  # Final response text
+    latency_s: float = 0.0
+    prompt_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
+    model_calls: int = 0
+    error: Optional[str] = None
+    cleanup_error: Optional[str] = None  # Deleting the session failed (the result itself is unaffected)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BatchStats:
+    """Filled in while run_batch runs (pass one in to watch a batch from outside)."""
+    started: int = 0
+    completed: int = 0
+    failed: int = 0
+    cleanup_failed: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+
+
+def _as_content(prompt: Union[str, types.Content]) -> types.Content:
+    if isinstance(prompt, types.Content):
+        return prompt
+    return types.Content(role="user", parts=[types.Part(text=prompt)])
+
+
+async def _run_one(runner: Runner, index: int, prompt: Union[str, types.Content], user_id: str, keep_sessions: bool) -> BatchResult:
+    message = _as_content(prompt)
+    result = BatchResult(index=index, prompt="".join(part.text or "" for part in message.parts or []))
+    started = time.perf_counter()
+    session = None
+    try:
+        session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+        result.session_id = session.id
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+            usage = event.usage_metadata
+            if usage and not event.partial:
+                result.model_calls += 1
+                result.prompt_tokens += usage.prompt_token_count or 0
+                result.response_tokens += usage.candidates_token_count or 0
+                result.total_tokens += usage.total_token_count or 0
+            if event.is_final_response() and event.content and event.content.parts:
+                text = "".join(part.text for part in event.content.parts if part.text)
+                result.text = text or result.text
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    finally:
+        if session is not None and not keep_sessions:
+            try:
+                await runner.session_service.delete_session(app_name=runner.app_name, user_id=user_id, session_id=session.id)
+            except Exception as e:
+                logger.warning("Could not delete batch session %s: %s", session.id, e)
+                result.cleanup_error = f"{type(e).__name__}: {e}"
+    result.latency_s = time.perf_counter() - started
+    return result
+
+
+async def run_batch(
+    runner: Runner,
+    prompts: Iterable[Union[str, types.Content]],
+    concurrency: int = 8,
+    user_id: str = "batch_user",
+    keep_sessions: bool = False,
+    stats: Optional[BatchStats] = None,
+) -> AsyncGenerator[BatchResult, None]:
+    """Runs every prompt in its own session, `concurrency` at a time, yielding results as they complete.
+
+    Args:
+        runner: Any Runner (InMemoryRunner, or a Runner with a database session service).
+        prompts: Strings or Content; can be a lazy iterable, it is consumed as workers free up.
+        concurrency: Max invocations in flight.
+        user_id: The user the batch sessions are created for.
+        keep_sessions: Sessions are deleted after their result is read unless this is True.
+        stats: Optional BatchStats to update.
+
+    A failing prompt does not stop the batch: its result has `error` set (or `cleanup_error`, when only deleting its
+    session failed). An exception raised by the prompts iterable itself is re-raised. Stopping the iteration early
+    (break, or an exception in the caller) cancels the invocations still running.
+    """
+    stats = stats if stats is not None else BatchStats()
+    pending = iter(enumerate(prompts))  # Shared by the workers: each prompt is taken by exactly one of them
+    finished: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+    async def worker():
+        while True:
+            try:
+                index, prompt = next(pending)
+            except StopIteration:
+                break
+            except Exception as e:  # The prompts iterable itself failed
+                await finished.put(e)
+                break
+            stats.started += 1
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                result = await _run_one(runner, index, prompt, user_id, keep_sessions)
+            finally:
+                stats.in_flight -= 1
+            stats.completed += 1
+            stats.failed += 0 if result.ok else 1
+            stats.cleanup_failed += 0 if result.cleanup_error is None else 1
+            await finished.put(result)  # Blocks while the caller is behind
+        await finished.put(_DONE)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        running = len(workers)
+        while running:
+            item = await finished.get()
+            if item is _DONE:
+                running -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def demo(num_prompts: int = 64, concurrency: int = 16, latency: float = 0.05):
+    """Runs the same prompts through one-at-a-time run_async and through run_batch."""
+    import os
+    import statistics
+
+    from google.adk.agents import Agent
+    from google.adk.models.google_llm import Gemini
+    from google.adk.runners import InMemoryRunner
+    from local_gemini_server import LocalGeminiServer
+
+    prompts = [f"Question #{i}: what is a Runner?" for i in range(num_prompts)]
+    with LocalGeminiServer(latency=latency) as server:
+        os.environ["GOOGLE_GEMINI_BASE_URL"] = server.url
+        agent = Agent(name="helpful_assistant", model=Gemini(model="gemini-2.5-flash-lite"), instruction="You are a helpful assistant.")
+        runner = InMemoryRunner(agent=agent)
+
+        report = {}
+        for label, width in (("one at a time", 1), (f"run_batch({concurrency})", concurrency)):
+            stats = BatchStats()
+            started = time.perf_counter()
+            results = [r async for r in run_batch(runner, prompts, concurrency=width, stats=stats)]
+            elapsed = time.perf_counter() - started
+            latencies = sorted(r.latency_s for r in results)
+            report[label] = {
+                "wall_clock_s": round(elapsed, 3),
+                "prompts_per_s": round(num_prompts / elapsed, 1),
+                "p50_latency_s": round(statistics.median(latencies), 4),
+                "p95_latency_s": round(latencies[int(0.95 * (len(latencies) - 1))], 4),
+                "total_tokens": sum(r.total_tokens for r in results),
+                "errors": stats.failed,
+                "max_in_flight": stats.max_in_flight,
+            }
+
+    print(f"\n📊 {num_prompts} prompts, {latency}s per model call")
+    for label, r in report.items():
+        print(f"   {label:<14} {r}")
+    return report
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault("GOOGLE_API_KEY", "local-stand-in")
+    os.environ.pop("GOOGLE_GENAI_USE_VERTEXAI", None)
+    asyncio.run(demo())
@@ -0,0 +1,251 @@
+# Streaming event pipeline: typed handlers called as each event of runner.run_async arrives.
+#
+# The samples used to wait for run_debug to return the whole event list and then scan it with nested loops
+# (show_python_code_and_result, the image loop of agent_with_mcp.main, show_image and check_for_approval in the
+# bulk-image notebook). Here every event is looked at once, as it is yielded, and turned into typed payloads:
+#
+#   CodeResult       code written and/or its output (code execution parts, or the reply of a code agent tool)
+#   ImagePayload     an image in an MCP tool response ({"type": "image", "data": <base64>, "mimeType": ...}), or a
+#                    reference to a stored one ({"images": [{"path": ..., "mime_type": ...}]})
+#   ApprovalRequest  an adk_request_confirmation call (a tool asked for human approval)
+#   FinalText        the text of a final response
+#
+#   pipeline = EventPipeline()
+#   pipeline.on_image(save_image)               # sync handlers run inline, async ones as background tasks
+#   pipeline.on_final_text(lambda t: print(f"Agent > {t.text}"))
+#   summary = await pipeline.run(runner, user_id="user", session_id=session.id, new_message="Provide 3 tiny images")
+#   if summary.approvals: ...
+#
+# Async handlers run concurrently with the rest of the run (so decoding and writing images overlaps with generation),
+# at most `max_pending` at a time; run() waits for them before returning. Events are not kept, only the summary.
+
+import asyncio
+import base64
+import inspect
+import logging
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Callable, Iterator, Optional, Sequence, Union
+
+from google.adk.events.event import Event
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+REQUEST_CONFIRMATION = "adk_request_confirmation"  # Name of the function call ADK emits for tool confirmations
+
+
+@dataclass
+class CodeResult:
+    code: Optional[str]
+    output: Optional[str]
+    author: str
+    event: Event = field(repr=False)
+
+
+@dataclass
+class ImagePayload:
+    data: Optional[str]  # base64, or None for a reference to an image already stored at `path`
+    mime_type: str
+    tool_name: str
+    author: str
+    event: Event = field(repr=False)
+    path: Optional[str] = None
+
+    def decode(self) -> bytes:
+        if self.data is None:
+            with open(self.path, "rb") as f:
+                return f.read()
+        return base64.b64decode(self.data)
+
+
+@dataclass
+class ApprovalRequest:
+    approval_id: str
+    invocation_id: str
+    tool_name: Optional[str]  # The tool waiting for the approval
+    hint: Optional[str]
+    payload: Any
+    event: Event = field(repr=False)
+
+    def response(self, approved: bool) -> types.Content:
+        """The user message that approves or rejects this request (pass it with invocation_id to resume)."""
+        return types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            id=self.approval_id, name=REQUEST_CONFIRMATION, response={"confirmed": approved},
+        ))])
+
+
+@dataclass
+class FinalText:
+    text: str
+    author: str
+    event: Event = field(repr=False)
+
+
+Payload = Union[CodeResult, ImagePayload, ApprovalRequest, FinalText]
+
+
+def payloads(event: Event, code_tools: Sequence[str] = ()) -> Iterator[Payload]:
+    """The typed payloads of one event. `code_tools`: tools whose {"result": ...} reply is code or its output."""
+    if not event.content or not event.content.parts:
+        return
+    for part in event.content.parts:
+        if part.executable_code:
+            yield CodeResult(code=part.executable_code.code, output=None, author=event.author, event=event)
+        if part.code_execution_result:
+            yield CodeResult(code=None, output=part.code_execution_result.output, author=event.author, event=event)
+
+        call = part.function_call
+        if call and call.name == REQUEST_CONFIRMATION:
+            args = call.args or {}
+            confirmation = args.get("toolConfirmation") or {}
+            yield ApprovalRequest(
+                approval_id=call.id,
+                invocation_id=event.invocation_id,
+                tool_name=(args.get("originalFunctionCall") or {}).get("name"),
+                hint=confirmation.get("hint"),
+                payload=confirmation.get("payload"),
+                event=event,
+            )
+
+        response = part.function_response
+        if response and isinstance(response.response, dict):
+            for item in response.response.get("content") or []:
+                if isinstance(item, dict) and item.get("type") == "image":
+                    yield ImagePayload(
+                        data=item["data"], mime_type=item.get("mimeType", "image/png"), tool_name=response.name,
+                        author=event.author, event=event,
+                    )
+            # Tools that store images themselves return references: {"images": [{"path": ..., "mime_type": ...}]}
+            for item in response.response.get("images") or []:
+                if isinstance(item, dict) and item.get("path"):
+                    yield ImagePayload(
+                        data=None, mime_type=item.get("mime_type", "image/png"), tool_name=response.name,
+                        author=event.author, event=event, path=item["path"],
+                    )
+            result = response.response.get("result")
+            if response.name in code_tools and isinstance(result, str) and result != "```":
+                if "tool_code" in result:
+                    yield CodeResult(code=result.replace("tool_code", ""), output=None, author=event.author, event=event)
+                else:
+                    yield CodeResult(code=None, output=result, author=event.author, event=event)
+
+    if event.is_final_response():
+        text = "".join(part.text for part in event.content.parts if part.text and not part.thought)
+        if text:
+            yield FinalText(text=text, author=event.author, event=event)
+
+
+@dataclass
+class RunSummary:
+    """What is left of a run once the pipeline has consumed it: counts, approvals and the final texts."""
+    events: int = 0
+    payloads: Counter = field(default_factory=Counter)  # Payload class name -> count
+    approvals: list = field(default_factory=list)
+    final_texts: list = field(default_factory=list)
+
+    @property
+    def approval(self) -> Optional[ApprovalRequest]:
+        return self.approvals[0] if self.approvals else None
+
+    @property
+    def final_text(self) -> Optional[str]:
+        return self.final_texts[-1] if self.final_texts else None
+
+
+async def _drain(tasks: set, raise_errors: bool = True):
+    if not tasks:
+        return
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for error in errors[1 if raise_errors else 0:]:
+        logger.error("Event handler failed: %r", error)
+    if errors and raise_errors:
+        raise errors[0]
+
+
+class EventPipeline:
+    """Dispatches the payloads of each event to the handlers subscribed to their type.
+
+    Args:
+        code_tools: Names of agent tools whose replies are code or code output (e.g. "CalculationAgent").
+        max_pending: Max async handler calls in flight; when reached, the run waits (backpressure).
+    """
+
+    def __init__(self, code_tools: Sequence[str] = (), max_pending: int = 8):
+        self.code_tools = tuple(code_tools)
+        self.max_pending = max_pending
+        self._handlers: dict[type, list[Callable]] = defaultdict(list)
+
+    def on(self, kind: type, handler: Optional[Callable] = None):
+        """Subscribes `handler` (sync or async, called with the payload) to payloads of `kind`. Usable as decorator."""
+        if handler is None:
+            return lambda h: self.on(kind, h)
+        self._handlers[kind].append(handler)
+        return handler
+
+    def on_code_result(self, handler: Optional[Callable] = None):
+        return self.on(CodeResult, handler)
+
+    def on_image(self, handler: Optional[Callable] = None):
+        return self.on(ImagePayload, handler)
+
+    def on_approval(self, handler: Optional[Callable] = None):
+        return self.on(ApprovalRequest, handler)
+
+    def on_final_text(self, handler: Optional[Callable] = None):
+        return self.on(FinalText, handler)
+
+    async def consume(self, events: AsyncIterable[Event], summary: Optional[RunSummary] = None) -> RunSummary:
+        """Feeds an event stream through the handlers; returns once the stream and every async handler are done."""
+        summary = summary or RunSummary()
+        slots = asyncio.Semaphore(self.max_pending)
+        pending: set[asyncio.Task] = set()
+
+        async def run_handler(handler_call):
+            try:
+                await handler_call
+            finally:
+                slots.release()
+
+        try:
+            async for event in events:
+                summary.events += 1
+                for payload in payloads(event, self.code_tools):
+                    summary.payloads[type(payload).__name__] += 1
+                    if isinstance(payload, ApprovalRequest):
+                        summary.approvals.append(payload)
+                    elif isinstance(payload, FinalText):
+                        summary.final_texts.append(payload.text)
+                    for handler in self._handlers.get(type(payload), ()):
+                        result = handler(payload)
+                        if inspect.isawaitable(result):
+                            await slots.acquire()
+                            task = asyncio.ensure_future(run_handler(result))
+                            pending.add(task)
+                            task.add_done_callback(pending.discard)
+        except BaseException:
+            await _drain(pending, raise_errors=False)
+            raise
+        # Failures of async handlers surface here, after the run, instead of cutting it short
+        await _drain(pending)
+        return summary
+
+    async def run(
+        self,
+        runner,
+        *,
+        user_id: str,
+        session_id: str,
+        new_message: Union[str, types.Content],
+        invocation_id: Optional[str] = None,
+        **run_async_kwargs,
+    ) -> RunSummary:
+        """runner.run_async(...) streamed through the handlers. The session must exist."""
+        if isinstance(new_message, str):
+            new_message = types.Content(role="user", parts=[types.Part(text=new_message)])
+        events = runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=new_message, invocation_id=invocation_id,
+            **run_async_kwargs,
+        )
+        return await self.consume(events)
@@ -0,0 +1,293 @@
+# Background, content-addressed store for images returned by MCP tools.
+#
+# Saving images inside the event loop (base64 decode + file write per image) stalls every other session of the runner,
+# and naming files by second-resolution timestamp makes images of the same second overwrite each other. ImageSink:
+#   - takes base64 payloads from a bounded queue and decodes/hashes/writes them on one worker thread
+#   - names each file by the SHA-256 of its bytes, so the same image is stored once however often it is returned
+#   - appends one line per stored image to a manifest (manifest.jsonl: hash, file, type, size, source, time), which
+#     is also what it reads at start-up to recognise images stored by earlier runs
+#
+#   sink = ImageSink("generated_images", on_stored=lambda stored: print(f"Saved image to: {stored.path}"))
+#   pipeline.on_image(sink.handler)   # adk_utils/event_pipeline.py: returns once the image is queued
+#   ...
+#   sink.close()                      # waits for the queue to drain
+#
+#   python adk_utils/image_sink.py   # 500 images (half duplicates) through the sink vs writing inline
+
+import asyncio
+import base64
+import binascii
+import concurrent.futures
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.jsonl"
+HASH_PREFIX = 16  # Hex digits of the SHA-256 used in file names; the manifest keeps the full hash
+
+
+@dataclass
+class StoredImage:
+    sha256: str
+    path: str
+    mime_type: str
+    size: int
+    duplicate: bool  # Already stored before: nothing was written
+
+
+@dataclass
+class ImageSinkStats:
+    submitted: int = 0
+    stored: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    bytes_written: int = 0
+    queue_full_waits: int = 0  # Submissions that had to wait for room in the queue
+    max_queue_depth: int = 0
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class _Item:
+    def __init__(self, data: str, mime_type: str, source: dict):
+        self.data = data
+        self.mime_type = mime_type
+        self.source = source
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+_STOP = object()
+
+
+def extension_for(mime_type: str) -> str:
+    return mimetypes.guess_extension(mime_type or "") or ".bin"
+
+
+class ImageSink:
+    """Decodes and stores base64 images on a worker thread, one file per distinct image (by content hash).
+
+    Args:
+        directory: Where images and the manifest go (created if missing).
+        max_queue: Images waiting to be written; when full, put() waits (aput() without blocking the event loop).
+        on_stored: Called on the worker thread with a StoredImage for every image handled (duplicates included).
+    """
+
+    def __init__(self, directory: str, max_queue: int = 64, on_stored: Optional[Callable[[StoredImage], None]] = None):
+        self.directory = os.path.abspath(directory)
+        self.manifest_path = os.path.join(self.directory, MANIFEST)
+        self.on_stored = on_stored
+        self.stats = ImageSinkStats()
+        os.makedirs(self.directory, exist_ok=True)
+        self._index = self._load_manifest()  # sha256 -> manifest entry
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stats_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="image-sink", daemon=True)
+        self._worker.start()
+
+    def _load_manifest(self) -> dict:
+        index = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by a crash
+                    if os.path.exists(os.path.join(self.directory, entry["file"])):
+                        index[entry["sha256"]] = entry
+        return index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, sha256: str) -> Optional[dict]:
+        return self._index.get(sha256)
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+            self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queue.qsize())
+
+    def put(self, data: str, mime_type: str = "image/png", timeout: Optional[float] = None, **source) -> concurrent.futures.Future:
+        """Queues a base64 image (waiting for room if the queue is full). The future resolves to a StoredImage.
+
+        `source` (tool, author, invocation_id, ...) is recorded in the manifest.
+        """
+        item = _Item(data, mime_type, source)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count(queue_full_waits=1)
+            self._queue.put(item, timeout=timeout)
+        self._count(submitted=1)
+        return item.future
+
+    async def aput(self, data: str, mime_type: str = "image/png", **source) -> concurrent.futures.Future:
+        """put() for the event loop: a full queue is waited for in a worker thread, not on the loop."""
+        item = _Item(data, mime_type, source)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count(queue_full_waits=1)
+            await asyncio.to_thread(self._queue.put, item)
+        self._count(submitted=1)
+        return item.future
+
+    async def handler(self, image) -> Optional[concurrent.futures.Future]:
+        """Event pipeline handler for ImagePayload: queues the image and returns without waiting for the write."""
+        if image.data is None:
+            return None  # A reference to an image that is already stored
+        event = image.event
+        return await self.aput(
+            image.data, image.mime_type, tool=image.tool_name, author=image.author,
+            invocation_id=getattr(event, "invocation_id", None),
+        )
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                try:
+                    stored = self._store(item)
+                except Exception as e:
+                    self._count(errors=1)
+                    logger.warning("Could not store image: %r", e)
+                    item.future.set_exception(e)
+                    continue
+                item.future.set_result(stored)
+                if self.on_stored:
+                    try:
+                        self.on_stored(stored)
+                    except Exception:
+                        logger.exception("on_stored callback failed")
+            finally:
+                self._queue.task_done()
+
+    def _store(self, item: _Item) -> StoredImage:
+        try:
+            data = base64.b64decode(item.data, validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"Not base64 image data: {e}") from None
+        sha256 = hashlib.sha256(data).hexdigest()
+        entry = self._index.get(sha256)
+        if entry is not None:
+            self._count(duplicates=1)
+            return StoredImage(sha256, os.path.join(self.directory, entry["file"]), entry["mime_type"], entry["size"], True)
+
+        file_name = sha256[:HASH_PREFIX] + extension_for(item.mime_type)
+        path = os.path.join(self.directory, file_name)
+        if not os.path.exists(path):
+            temporary = path + ".part"
+            with open(temporary, "wb") as f:
+                f.write(data)
+            os.replace(temporary, path)  # Readers never see a half-written image
+            self._count(bytes_written=len(data))
+        entry = {
+            "sha256": sha256, "file": file_name, "mime_type": item.mime_type, "size": len(data),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "source": item.source,
+        }
+        with open(self.manifest_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._index[sha256] = entry
+        self._count(stored=1)
+        return StoredImage(sha256, path, item.mime_type, len(data), False)
+
+    def flush(self):
+        """Blocks until every queued image is handled."""
+        self._queue.join()
+
+    def close(self):
+        """Writes what is queued, then stops the worker thread."""
+        if self._worker.is_alive():
+            self._queue.put(_STOP)
+            self._worker.join()
+
+    def metrics(self) -> dict:
+        return {**self.stats.as_dict(), "images": len(self._index), "queued": self._queue.qsize()}
+
+    def __enter__(self) -> "ImageSink":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def demo(images: int = 200, distinct: int = 100, size_kb: int = 512, arrival_s: float = 0.005, max_queue: int = 64):
+    """Event-loop lag while images arrive every `arrival_s` seconds: writing each inline vs handing it to the sink.
+
+    A probe task sleeps 1ms in a loop and records how late it wakes up; that is the delay every other session sees.
+    """
+    import shutil
+    import statistics
+    import tempfile
+
+    # Photo-sized (incompressible) payloads, like the generateImage results of the Pollinations server
+    blobs = [b"\x89PNG\r\n\x1a\n" + os.urandom(size_kb * 1024) for _ in range(distinct)]
+    payloads = [base64.b64encode(blobs[i % distinct]).decode() for i in range(images)]
+
+    async def arrive(handle) -> list:
+        lags, done = [], asyncio.Event()
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lags.append(time.perf_counter() - started - 0.001)
+
+        probe_task = asyncio.ensure_future(probe())
+        for data in payloads:
+            await handle(data)
+            await asyncio.sleep(arrival_s)  # The next tool response
+        done.set()
+        await probe_task
+        return lags
+
+    def lag_summary(lags: list) -> str:
+        p99 = statistics.quantiles(lags, n=100)[98]
+        return f"loop lag p99 {p99 * 1000:.2f}ms, max {max(lags) * 1000:.2f}ms"
+
+    directory = tempfile.mkdtemp(prefix="image_sink_")
+    try:
+        inline_dir = os.path.join(directory, "inline")
+        os.makedirs(inline_dir)
+
+        async def write_inline(data: str):
+            # What agent_with_mcp.main used to do for every image
+            img_bytes = base64.b64decode(data)
+            file_path = os.path.join(inline_dir, f"image_{time.strftime('%Y%m%d_%H%M%S')}.png")
+            with open(file_path, "wb") as f:
+                f.write(img_bytes)
+
+        inline_lags = await arrive(write_inline)
+        inline_files = len(os.listdir(inline_dir))
+
+        sink = ImageSink(os.path.join(directory, "sink"), max_queue=max_queue)
+        sink_lags = await arrive(lambda data: sink.aput(data, "image/png", tool="demo"))
+        started = time.perf_counter()
+        sink.close()
+        drained = time.perf_counter() - started
+
+        print(f"\n📊 {images} images ({distinct} distinct) of {size_kb} KB, one every {arrival_s * 1000:.0f}ms")
+        print(f"   inline writes: {lag_summary(inline_lags)}, {inline_files} file(s) left (timestamp names collide)")
+        print(f"   image sink:    {lag_summary(sink_lags)}, {len(sink)} file(s) + manifest, "
+              f"drained {drained:.3f}s after the run")
+        print(f"   Sink: {sink.metrics()}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
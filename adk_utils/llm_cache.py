@@ -0,0 +1,235 @@
+# Response cache shared by every Gemini model instance in the process.
+#
+# Every agent builds its own Gemini(model=..., retry_options=retry_config) and the same prompts (fixed researcher
+# instructions, eval cases, ...) are re-sent on every run. When enabled, Gemini.generate_content_async first looks
+# the request up in a two-tier cache: an in-process LRU and an on-disk SQLite file that survives restarts.
+#
+# Opt in with one line in .env:
+#   ADK_LLM_CACHE=1
+# Optional knobs:
+#   ADK_LLM_CACHE_PATH=.llm_cache.sqlite3   ADK_LLM_CACHE_TTL=86400 (seconds, 0 = never expire)
+#   ADK_LLM_CACHE_MAX_MB=100                ADK_LLM_CACHE_MEMORY_ITEMS=256
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PATH = os.path.join(REPO_ROOT, ".llm_cache.sqlite3")
+
+
+def cache_key(llm_request: LlmRequest) -> str:
+    """Hash of everything that decides the answer: model, system instruction, contents, tool declarations
+    and the rest of the generation config (temperature, response schema, ...).
+
+    HTTP options (retry settings, tracking headers) are left out, and so are the ADK-generated function call ids,
+    which are random per run and would otherwise make every multi-turn tool conversation a miss.
+    """
+    config = llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"http_options"}) if llm_request.config else {}
+    contents = [content.model_dump(mode="json", exclude_none=True) for content in llm_request.contents]
+    for content in contents:
+        for part in content.get("parts", []):
+            for key in ("function_call", "function_response"):
+                if key in part:
+                    part[key].pop("id", None)
+    payload = json.dumps({"model": llm_request.model, "config": config, "contents": contents}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    expired: int = 0
+    evicted: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            **self.__dict__,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LlmResponseCache:
+    """In-process LRU in front of a SQLite table, both with TTL; the disk tier is also capped in bytes."""
+
+    def __init__(self, path: str = DEFAULT_PATH, ttl: float = 86400, max_bytes: int = 100 * 1024 * 1024, memory_items: int = 256):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()  # key -> (created_at, response json)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """create table if not exists llm_cache (
+                key text primary key,
+                model text,
+                response text not null,
+                size integer not null,
+                created_at real not null,
+                last_access real not null
+            )"""
+        )
+        self._db.execute("create index if not exists llm_cache_last_access on llm_cache (last_access)")
+        self._db.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[LlmResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and not self._expired(entry[0], now):
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return LlmResponse.model_validate_json(entry[1])
+            if entry:
+                del self._memory[key]
+
+            row = self._db.execute("select created_at, response from llm_cache where key = ?", (key,)).fetchone()
+            if row and self._expired(row[0], now):
+                self._db.execute("delete from llm_cache where key = ?", (key,))
+                self._db.commit()
+                self.stats.expired += 1
+                row = None
+            if not row:
+                self.stats.misses += 1
+                return None
+            self._db.execute("update llm_cache set last_access = ? where key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            self.stats.disk_hits += 1
+            return LlmResponse.model_validate_json(row[1])
+
+    def put(self, key: str, model: str, response: LlmResponse):
+        now = time.time()
+        value = response.model_dump_json(exclude_none=True)
+        with self._lock:
+            self._remember(key, now, value)
+            self._db.execute(
+                "insert or replace into llm_cache values (?, ?, ?, ?, ?, ?)",
+                (key, model, value, len(value), now, now),
+            )
+            self._evict_disk()
+            self._db.commit()
+            self.stats.stores += 1
+
+    def _remember(self, key: str, created_at: float, value: str):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Drops expired rows, then least recently used rows until the table fits in max_bytes."""
+        if self.ttl:
+            deleted = self._db.execute("delete from llm_cache where created_at < ?", (time.time() - self.ttl,)).rowcount
+            self.stats.expired += deleted
+        total = self._db.execute("select coalesce(sum(size), 0) from llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._db.execute("select key, size from llm_cache order by last_access"):
+            victims.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._db.executemany("delete from llm_cache where key = ?", victims)
+        for (key,) in victims:
+            self._memory.pop(key, None)
+        self.stats.evicted += len(victims)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("delete from llm_cache")
+            self._db.commit()
+
+
+_cache: Optional[LlmResponseCache] = None
+_original_generate_content_async = Gemini.generate_content_async
+
+
+def _cacheable(response: LlmResponse) -> bool:
+    return bool(response.content and response.content.parts) and not response.partial and not response.error_code
+
+
+@functools.wraps(_original_generate_content_async)
+async def _cached_generate_content_async(self, llm_request: LlmRequest, stream: bool = False):
+    if _cache is None or stream:
+        # Streaming yields partial chunks that are not worth replaying, so it always goes to the model
+        async for response in _original_generate_content_async(self, llm_request, stream):
+            yield response
+        return
+
+    key = cache_key(llm_request)
+    cached = _cache.get(key)
+    if cached is not None:
+        logger.debug("LLM cache hit for %s (%s)", llm_request.model, key[:12])
+        yield cached
+        return
+
+    async for response in _original_generate_content_async(self, llm_request, stream):
+        if _cacheable(response):
+            stored = response.model_copy(deep=True)
+            for part in stored.content.parts:
+                if part.function_call:
+                    part.function_call.id = None  # ADK hands out fresh ids when the response is replayed
+            _cache.put(key, llm_request.model, stored)
+        yield response
+
+
+def enable(path: str = DEFAULT_PATH, ttl: float = 86400, max_bytes: int = 100 * 1024 * 1024, memory_items: int = 256) -> LlmResponseCache:
+    """Turns the cache on for every Gemini instance in this process (existing and future ones)."""
+    global _cache
+    _cache = LlmResponseCache(path=path, ttl=ttl, max_bytes=max_bytes, memory_items=memory_items)
+    Gemini.generate_content_async = _cached_generate_content_async
+    print(f"✅ LLM response cache enabled: {path}")
+    return _cache
+
+
+def disable():
+    global _cache
+    _cache = None
+    Gemini.generate_content_async = _original_generate_content_async
+
+
+def enable_from_env() -> Optional[LlmResponseCache]:
+    """Enables the cache if ADK_LLM_CACHE is set to a true value (call after load_dotenv())."""
+    if _cache is not None:  # Several sample modules can be imported into one process
+        return _cache
+    if os.getenv("ADK_LLM_CACHE", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    return enable(
+        path=os.getenv("ADK_LLM_CACHE_PATH", DEFAULT_PATH),
+        ttl=float(os.getenv("ADK_LLM_CACHE_TTL", "86400")),
+        max_bytes=int(float(os.getenv("ADK_LLM_CACHE_MAX_MB", "100")) * 1024 * 1024),
+        memory_items=int(os.getenv("ADK_LLM_CACHE_MEMORY_ITEMS", "256")),
+    )
+
+
+def stats() -> dict:
+    """Hit/miss counters of the active cache (empty if the cache is off)."""
+    return _cache.stats.as_dict() if _cache else {}
@@ -0,0 +1,115 @@
+# Local HTTP stand-in for the Gemini API (generateContent only), for trying out networking changes without a key.
+#
+# It answers POST /v1beta/models/{model}:generateContent with a canned text reply, can fail the first N requests
+# with 429 to exercise retries, and counts the TCP connections it accepts so connection reuse can be checked.
+#
+#   with LocalGeminiServer(latency=0.05, fail_first=3) as server:
+#       client = genai.Client(api_key="local", http_options=types.HttpOptions(base_url=server.url))
+#       ...
+#       print(server.stats())
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+GENERATE_CONTENT = re.compile(r"^/(?P<version>[^/]+)/models/(?P<model>[^:]+):generateContent$")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        match = GENERATE_CONTENT.match(self.path.split("?")[0])
+        if not match:
+            self._reply(404, {"error": {"code": 404, "message": f"Unknown path {self.path}", "status": "NOT_FOUND"}})
+            return
+
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            throttle = server.requests <= server.fail_first
+            if throttle:
+                server.throttled += 1
+        if server.latency:
+            time.sleep(server.latency)
+        if throttle:
+            self._reply(429, {"error": {"code": 429, "message": "Resource exhausted (local stand-in)", "status": "RESOURCE_EXHAUSTED"}})
+            return
+
+        prompt_tokens = len(json.dumps(request.get("contents", []))) // 4
+        self._reply(200, {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": server.reply.format(model=match["model"])}]},
+                "finishReason": "STOP",
+            }],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": 8, "totalTokenCount": prompt_tokens + 8},
+            "modelVersion": match["model"],
+        })
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # The default backlog of 5 drops connects under fan-out (1s SYN retry on the client)
+
+
+class LocalGeminiServer:
+    """Threaded HTTP server on 127.0.0.1 (random port) speaking just enough of the Gemini REST API."""
+
+    def __init__(self, latency: float = 0.0, fail_first: int = 0, reply: str = "Local reply from {model}."):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.lock = threading.Lock()
+        self._server.latency = latency
+        self._server.fail_first = fail_first
+        self._server.reply = reply
+        self._server.requests = 0
+        self._server.throttled = 0
+        self._server.connections = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalGeminiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self._server.requests,
+            "throttled": self._server.throttled,
+            "connections_accepted": self._server.connections,
+        }
+
+    def __enter__(self) -> "LocalGeminiServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
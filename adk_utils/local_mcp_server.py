@@ -0,0 +1,71 @@
+# Local stdio MCP server standing in for `npx -y @modelcontextprotocol/server-everything`, for trying the MCP tools
+# (and the server pool in mcp_pool.py) without Node or the network.
+#
+# Tools:
+#   getTinyImage(prompt="")  a small PNG whose colour depends on the prompt, like server-everything's tool of that name
+#   echo(message)            returns the message
+#   crash()                  exits the process, to exercise dead-server handling
+#
+# --startup-delay simulates the npx resolve + Node startup cost, --latency a slow tool:
+#
+#   StdioServerParameters(command=sys.executable, args=[LOCAL_MCP_SERVER, "--startup-delay", "1.5"])
+
+import argparse
+import hashlib
+import os
+import struct
+import time
+import zlib
+
+LOCAL_MCP_SERVER = os.path.abspath(__file__)  # Path to pass as the first argument of `python`
+
+
+def tiny_png(prompt: str, size: int = 8) -> bytes:
+    """A size x size PNG filled with a colour derived from the prompt (same prompt, same bytes)."""
+    red, green, blue = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+    row = b"\x00" + bytes([red, green, blue]) * size
+    pixels = zlib.compress(row * size)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)  # 8-bit RGB
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+
+def build_server(latency: float = 0.0):
+    from mcp.server.fastmcp import FastMCP, Image
+
+    server = FastMCP("local-everything", log_level="WARNING")
+
+    @server.tool()
+    def getTinyImage(prompt: str = "") -> list:
+        """Returns a tiny test image."""
+        if latency:
+            time.sleep(latency)
+        return ["This is a tiny image:", Image(data=tiny_png(prompt), format="png"), "The image above is the MCP tiny image."]
+
+    @server.tool()
+    def echo(message: str) -> str:
+        """Echoes back the input."""
+        return f"Echo: {message}"
+
+    @server.tool()
+    def crash() -> str:
+        """Exits the server process."""
+        os._exit(1)
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stdio MCP stand-in")
+    parser.add_argument("--startup-delay", type=float, default=0.0, help="Seconds to wait before serving")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per getTinyImage call")
+    args = parser.parse_args()
+    time.sleep(args.startup_delay)
+    build_server(args.latency).run(transport="stdio")
+
+
+if __name__ == "__main__":
+    main()
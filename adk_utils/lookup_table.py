@@ -0,0 +1,285 @@
+# Lookup table for the static data behind tools like get_fee_for_payment_method, get_product_info and set_device_status.
+#
+# Those tools rebuilt their dict literal on every call and matched only `query.lower()` exactly, so a near-miss
+# ("Bank-Transfer", "iphone15 pro") came back as an error and cost the model another turn to retry with the
+# right spelling. A LookupTable is built once, at import. The tools answer only its exact (normalized) matches; a
+# misspelling still costs a turn, but its error names the right key instead of leaving the model to guess:
+#   - a hash index on normalized keys (case, accents, spaces and punctuation ignored): "Bank-Transfer" == "bank transfer"
+#   - a trigram index for everything else: the keys sharing the most trigrams with the query are ranked by edit
+#     distance, and the best one is accepted if it is close enough, not tied, and differs from the query only by
+#     misspelled words: every number must be the same ("iphone 16 pro" is not the iPhone 15 Pro) and no word may be
+#     replaced by another ("gold credit card" is not the gold debit card). Otherwise the ranked candidates are
+#     returned as suggestions for the error message
+#
+#   FEE_TABLE = LookupTable(FEE_SCHEDULE)
+#   match = FEE_TABLE.lookup("platnum credit card")
+#   if match.exact: fee = match.value
+#   elif match: f"Did you mean '{match.key}'?"   # A misspelling: confirm it rather than use its value silently
+#   else: f"Did you mean: {', '.join(match.suggestions)}?"
+#
+#   python adk_utils/lookup_table.py   # misspelled-query corpus: exact lookups vs the table (hits, wrong hits, speed)
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Generic, Iterator, Mapping, Optional, TypeVar
+
+V = TypeVar("V")
+
+MIN_FUZZY_LENGTH = 4  # Shorter queries must match exactly ("no" is one edit from "on")
+
+
+def normalize(text: str) -> str:
+    """Case-folded letters and digits only: "Bank-Transfer" -> "banktransfer", "iPhone 15 Pro" -> "iphone15pro"."""
+    decomposed = unicodedata.normalize("NFKD", str(text)).casefold()
+    return "".join(c for c in decomposed if c.isalnum())
+
+
+def words(text: str) -> list[str]:
+    """normalize() split into words and numbers: "Sony WH-1000XM5" -> ["sony", "wh", "1000", "xm", "5"]."""
+    decomposed = unicodedata.normalize("NFKD", str(text)).casefold()
+    spaced = "".join(c if c.isalnum() else ("" if unicodedata.combining(c) else " ") for c in decomposed)
+    return re.findall(r"\d+|[^\d\s]+", spaced)
+
+
+def word_distance(query: list[str], key: list[str], max_distance: float, max_join: int = 3) -> Optional[int]:
+    """Edits needed to spell `key` from `query` word by word, or None if that takes more than misspellings.
+
+    Words may be joined or split ("creditcard" = "credit card"). A group containing a number must match exactly;
+    other groups may differ by `max_distance` edits per character (so words under 4 letters must match exactly).
+    """
+    best = {(0, 0): 0}
+    for i in range(len(query) + 1):
+        for j in range(len(key) + 1):
+            if (i, j) not in best:
+                continue
+            for a in range(1, max_join + 1):
+                for b in range(1, max_join + 1):
+                    if min(a, b) != 1 or i + a > len(query) or j + b > len(key):
+                        continue
+                    q, k = "".join(query[i:i + a]), "".join(key[j:j + b])
+                    if any(c.isdigit() for c in q + k):
+                        cost = 0 if q == k else None
+                    else:
+                        limit = int(max(len(q), len(k)) * max_distance)
+                        cost = edit_distance(q, k, limit)
+                        cost = cost if cost <= limit else None
+                    if cost is not None:
+                        total = best[(i, j)] + cost
+                        if total < best.get((i + a, j + b), total + 1):
+                            best[(i + a, j + b)] = total
+    return best.get((len(query), len(key)))
+
+
+def trigrams(normalized: str) -> set[str]:
+    padded = f"^{normalized}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """Levenshtein distance counting an adjacent transposition as one edit; stops early past `limit`."""
+    if limit is not None and abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if previous2 is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+@dataclass
+class Match(Generic[V]):
+    query: str
+    key: Optional[str] = None  # The matched key as given to the table, None when nothing matched
+    value: Optional[V] = None
+    exact: bool = False  # Matched on the normalized key, no spelling correction
+    distance: int = 0
+    suggestions: list = field(default_factory=list)  # Closest keys, best first (when nothing matched)
+
+    def __bool__(self) -> bool:
+        return self.key is not None
+
+
+class LookupTable(Generic[V]):
+    """Read-only mapping looked up by normalized key, with a ranked fuzzy fallback.
+
+    Args:
+        entries: key -> value. Keys that normalize to the same string are an error.
+        aliases: Other names of a key (alias -> key), e.g. {"amex": "american express"}.
+        max_distance: Edits allowed per character of the key (and of each of its words) for a fuzzy match to be
+            accepted (0.25: 1 in 4).
+        candidates: Keys (by shared trigrams) whose edit distance is computed for a query.
+    """
+
+    def __init__(
+        self,
+        entries: Mapping[str, V],
+        aliases: Optional[Mapping[str, str]] = None,
+        max_distance: float = 0.25,
+        candidates: int = 8,
+    ):
+        self.max_distance = max_distance
+        self.candidates = candidates
+        self._entries = dict(entries)
+        self._index: dict[str, str] = {}  # normalized name -> key
+        self._words: dict[str, list[str]] = {}  # normalized name -> its words
+        for name, key in [(key, key) for key in self._entries] + list((aliases or {}).items()):
+            if key not in self._entries:
+                raise KeyError(f"Alias {name!r} points to unknown key {key!r}")
+            normalized = normalize(name)
+            if self._index.get(normalized, key) != key:
+                raise ValueError(f"{name!r} and {self._index[normalized]!r} normalize to the same key {normalized!r}")
+            self._index[normalized] = key
+            self._words[normalized] = words(name)
+        self._grams: dict[str, list[str]] = defaultdict(list)  # trigram -> normalized names containing it
+        for normalized in self._index:
+            for gram in trigrams(normalized):
+                self._grams[gram].append(normalized)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __contains__(self, query: object) -> bool:
+        return isinstance(query, str) and normalize(query) in self._index
+
+    def get(self, query: str, default: Any = None) -> Any:
+        """Value of the key the query normalizes to (no spelling correction)."""
+        key = self._index.get(normalize(query))
+        return self._entries[key] if key is not None else default
+
+    def items(self):
+        return self._entries.items()
+
+    def lookup(self, query: str, suggestions: int = 3) -> Match[V]:
+        """Exact match on the normalized key, else the closest key if it is only a misspelling of it and unambiguous."""
+        normalized = normalize(query)
+        key = self._index.get(normalized)
+        if key is not None:
+            return Match(query, key, self._entries[key], exact=True)
+
+        ranked = self._rank(normalized)
+        if ranked and len(normalized) >= MIN_FUZZY_LENGTH:
+            query_words = words(query)
+            close = [(distance, name) for distance, name in ranked
+                     if distance <= max(1, int(len(name) * self.max_distance))
+                     and word_distance(query_words, self._words[name], self.max_distance) is not None]
+            if close:
+                (distance, name), runner_up = close[0], close[1] if len(close) > 1 else None
+                key = self._index[name]
+                tied = runner_up is not None and runner_up[0] == distance and self._index[runner_up[1]] != key
+                if not tied:
+                    return Match(query, key, self._entries[key], distance=distance)
+
+        names = []
+        for _, name in ranked:
+            if self._index[name] not in names:
+                names.append(self._index[name])
+        return Match(query, suggestions=names[:suggestions])
+
+    def _rank(self, normalized: str) -> list[tuple[int, str]]:
+        """(edit distance, normalized name) of the names sharing the most trigrams with the query, closest first."""
+        shared = Counter()
+        for gram in trigrams(normalized):
+            for name in self._grams.get(gram, ()):
+                shared[name] += 1
+        names = [name for name, _ in shared.most_common(self.candidates)]
+        return sorted((edit_distance(normalized, name), name) for name in names)
+
+    def suggest(self, query: str, n: int = 3) -> list[str]:
+        match = self.lookup(query, suggestions=n)
+        return [match.key] if match else match.suggestions
+
+    def not_found(self, query: str, what: str = "entry") -> str:
+        """Error message for a failed lookup, naming the closest keys (or all of them for a short table)."""
+        suggestions = self.lookup(query).suggestions or (list(self._entries) if len(self._entries) <= 10 else [])
+        message = f"No {what} named '{query}'."
+        return f"{message} Did you mean: {', '.join(suggestions)}?" if suggestions else message
+
+
+def demo(repeat: int = 2000):
+    """Misspelled queries against exact `.lower()` lookups and the table: answers, retry turns and lookup time.
+
+    The tools answer only exact matches (match.exact), so every other query that should have matched costs the agent
+    a model turn to retry; for a misspelling the table's "Did you mean" names the key to retry with.
+    """
+    import os
+    import sys
+    import time
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(os.path.join(here, "..", "Day2", "sample-agent"))
+    sys.path.append(os.path.join(here, "..", "Day5", "agent2agent-communication"))
+    from fee_schedule import FEE_SCHEDULE
+    from product_catalog import PRODUCT_CATALOG
+
+    # label -> (entries, {query: the key it means, None when nothing should match})
+    corpora = {
+        "payment methods": (FEE_SCHEDULE, {
+            "bank transfer": "bank transfer", "Bank Transfer": "bank transfer", "Bank-Transfer": "bank transfer",
+            "banktransfer": "bank transfer", "bank tranfer": "bank transfer", "bnak transfer": "bank transfer",
+            " bank transfer ": "bank transfer", "Platinum Credit Card": "platinum credit card",
+            "platnum credit card": "platinum credit card", "platinum creditcard": "platinum credit card",
+            "platinum credit crad": "platinum credit card", "gold debit card": "gold debit card",
+            "Gold Debit-Card": "gold debit card", "gold debt card": "gold debit card", "gld debit card": "gold debit card",
+            "credit card": None, "card": None, "paypal": None, "wire": None, "debit": None,
+            "gold credit card": None, "platinum debit card": None,
+        }),
+        "products": (PRODUCT_CATALOG, {
+            "iPhone 15 Pro": "iphone 15 pro", "iphone15 pro": "iphone 15 pro", "iphone 15pro": "iphone 15 pro",
+            "iphne 15 pro": "iphone 15 pro", "Samsung Galaxy S24": "samsung galaxy s24",
+            "samsung galaxy s-24": "samsung galaxy s24", "samsng galaxy s24": "samsung galaxy s24",
+            "Dell XPS-15": "dell xps 15", "dell xps15": "dell xps 15",
+            "MacBook Pro 14": "macbook pro 14", "mackbook pro 14": "macbook pro 14",
+            "Sony WH-1000XM5": "sony wh-1000xm5", "sony wh1000xm5": "sony wh-1000xm5", "sony wh-1000mx5": "sony wh-1000xm5",
+            "iPad Air": "ipad air", "ipadair": "ipad air", "ipad aire": "ipad air", "LG Ultrawide 34": "lg ultrawide 34",
+            "lg ultra wide 34": "lg ultrawide 34", "pixel 8": None, "iphone 14": None, "surface laptop": None,
+            # One number or word away from a product is another product, not a misspelling: suggestions only
+            "iphone 16 pro": None, "samsung galaxy s25": None, "macbook pro 16": None, "dell xps 13": None,
+            "iphone 15": None, "ipad": None, "ipad pro": None, "galaxy s24": None, "macbook pro": None,
+        }),
+    }
+
+    print(f"\n📊 Misspelled-query corpus (every query that should have matched but gets no answer is an extra model turn)")
+    for label, (entries, queries) in corpora.items():
+        table = LookupTable(entries)
+        exact = sum(entries.get(q.lower()) is not None and q.lower() == want for q, want in queries.items())
+        results = {q: table.lookup(q) for q in queries}
+        answered = sum(m.exact and m.key == want for q, m in results.items() if (want := queries[q]))
+        suggested = sum(bool(m) and not m.exact and m.key == want for q, m in results.items() if (want := queries[q]))
+        wrong = sum(bool(m) and m.key != queries[q] for q, m in results.items())  # Answers or "Did you mean"s
+        rejected = sum(not m for q, m in results.items() if queries[q] is None)
+        should = sum(want is not None for want in queries.values())
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for q in queries:
+                entries.get(q.lower())
+        exact_us = (time.perf_counter() - started) / (repeat * len(queries)) * 1e6
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for q in queries:
+                table.lookup(q)
+        table_us = (time.perf_counter() - started) / (repeat * len(queries)) * 1e6
+
+        print(f"   {label} ({len(queries)} queries, {should} should match):")
+        print(f"     exact .lower(): {exact}/{should} found, {should - exact} retry turn(s), {exact_us:.2f} µs/lookup")
+        print(f"     LookupTable:    {answered}/{should} answered, {should - answered} retry turn(s) ({suggested} with the right "
+              f"'Did you mean'), {wrong} wrong match(es), {rejected}/{len(queries) - should} unknown rejected, "
+              f"{table_us:.2f} µs/lookup")
+        for q, m in results.items():
+            if not m and queries[q] is None:
+                print(f"       {q!r}: {table.not_found(q)}")
+
+
+if __name__ == "__main__":
+    demo()
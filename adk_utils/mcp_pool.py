@@ -0,0 +1,544 @@
+# Warm, shared pool of stdio MCP server processes.
+#
+# McpToolset(StdioConnectionParams(npx ...)) starts its own server process for every toolset, paying the npx resolve
+# and Node startup (seconds) before the first tool call, and then asks the server for its tool list on every model
+# turn. PooledMcpToolset is a drop-in replacement whose toolsets share one McpServerPool per server command:
+#   - the pool keeps `size` serving processes plus `spares` warm processes that are already started and initialized
+#   - the tools/list handshake is done once per server command and cached
+#   - a process that dies is dropped, a spare takes over at once and a new spare is started in the background;
+#     a call that failed because its process died is retried once on the replacement
+#   - every process has a bounded request queue (`queue_size`) and at most `max_in_flight` calls on the wire; callers
+#     wait when the queue is full instead of piling requests onto a slow server
+#
+#   mcp_image_server = PooledMcpToolset(
+#       connection_params=StdioConnectionParams(server_params=StdioServerParameters(command="npx", args=[...]), timeout=30),
+#       tool_filter=["getTinyImage"],
+#   )
+#   await mcp_pool.warm_up(mcp_image_server)   # optional: start the processes before the first request
+#
+# Pools belong to the event loop that created them (MCP sessions cannot move between loops). Each toolset holds its
+# pool until `await toolset.close()` (Runner.close() does this); the last toolset to let go stops the processes.
+# `await mcp_pool.close_all()` stops every pool of the loop at once.
+#
+#   python adk_utils/mcp_pool.py   # cold vs warm tool-call latency against a local stdio stand-in (no Node needed)
+
+import asyncio
+import logging
+import sys
+import time
+import weakref
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, TextIO, Union
+
+import anyio
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.auth.auth_credential import AuthCredential
+from google.adk.auth.auth_schemes import AuthScheme
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset, ToolPredicate
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from google.adk.tools.mcp_tool.mcp_tool import McpTool
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.shared.exceptions import McpError
+from mcp.types import CallToolResult, ListToolsResult
+
+logger = logging.getLogger(__name__)
+
+# What a call raises when the server process has gone away
+CONNECTION_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError)
+
+
+def is_connection_error(error: BaseException) -> bool:
+    if isinstance(error, CONNECTION_ERRORS):
+        return True
+    return isinstance(error, McpError) and "connection closed" in str(error).lower()
+
+
+def server_key(params: StdioServerParameters) -> tuple:
+    """Identifies the server a set of parameters starts: same command, arguments, environment and directory."""
+    return (params.command, tuple(params.args), tuple(sorted((params.env or {}).items())), str(params.cwd or ""))
+
+
+@dataclass
+class McpPoolStats:
+    processes_started: int = 0
+    start_failures: int = 0
+    restarts: int = 0  # Dead processes replaced
+    calls: int = 0
+    call_errors: int = 0
+    retries: int = 0  # Calls repeated on a new process after theirs died
+    queue_waits: int = 0  # Calls that found their server's queue full
+    tool_list_fetches: int = 0
+    tool_list_hits: int = 0
+    cold_start_s: float = 0.0  # Start + initialize time of the last process started
+
+    def as_dict(self) -> dict:
+        return {**self.__dict__, "cold_start_s": round(self.cold_start_s, 3)}
+
+
+class _Request:
+    def __init__(self, name: str, arguments: Optional[dict]):
+        self.name = name
+        self.arguments = arguments
+        self.result: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class McpServerProcess:
+    """One long-lived stdio MCP server. A single owner task keeps the connection open and feeds it from the queue."""
+
+    def __init__(
+        self,
+        params: StdioServerParameters,
+        timeout: float = 30,
+        queue_size: int = 32,
+        max_in_flight: int = 4,
+        ping_interval: float = 15,
+        errlog: TextIO = sys.stderr,
+    ):
+        self.params = params
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.ping_interval = ping_interval
+        self.errlog = errlog
+        self.tools: Optional[ListToolsResult] = None
+        self.startup_s: Optional[float] = None
+        self.in_flight = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._ready: Optional[asyncio.Future] = None
+        self._broken = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._broken
+
+    @property
+    def load(self) -> int:
+        return self._queue.qsize() + self.in_flight
+
+    def queue_full(self) -> bool:
+        return self._queue.full()
+
+    async def start(self, list_tools: bool = True) -> "McpServerProcess":
+        """Starts the process and waits for the initialize handshake (ConnectionError on failure or timeout)."""
+        self._ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.ensure_future(self._serve(list_tools))
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready), timeout=self.timeout)
+        except Exception as e:
+            await self.stop()
+            raise ConnectionError(f"MCP server {self.params.command} did not start: {e!r}") from e
+        return self
+
+    async def _serve(self, list_tools: bool):
+        started = time.perf_counter()
+        pending: set[asyncio.Task] = set()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        try:
+            async with stdio_client(self.params, errlog=self.errlog) as (read, write):
+                async with ClientSession(read, write, read_timeout_seconds=timedelta(seconds=self.timeout)) as session:
+                    await session.initialize()
+                    if list_tools:
+                        self.tools = await session.list_tools()
+                    self.startup_s = time.perf_counter() - started
+                    self._ready.set_result(self)
+
+                    while not self._broken:
+                        try:
+                            request = await asyncio.wait_for(self._queue.get(), timeout=self.ping_interval)
+                        except asyncio.TimeoutError:
+                            await asyncio.wait_for(session.send_ping(), timeout=self.timeout)  # Idle: still there?
+                            continue
+                        if request is None:
+                            break
+                        await slots.acquire()
+                        task = asyncio.ensure_future(self._call(session, request, slots))
+                        pending.add(task)
+                        task.add_done_callback(pending.discard)
+                    if pending:
+                        await asyncio.gather(*pending, return_exceptions=True)
+        except BaseException as e:
+            if self._ready is not None and not self._ready.done():
+                self._ready.set_exception(e if isinstance(e, Exception) else ConnectionError(repr(e)))
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.info("MCP server %s stopped: %r", self.params.command, e)
+        finally:
+            self._broken = True
+            for task in pending:
+                task.cancel()
+            # Whatever is still queued never reached the server
+            while not self._queue.empty():
+                request = self._queue.get_nowait()
+                if request is not None and not request.result.done():
+                    request.result.set_exception(ConnectionError("MCP server process stopped"))
+
+    async def _call(self, session: ClientSession, request: _Request, slots: asyncio.Semaphore):
+        self.in_flight += 1
+        try:
+            result = await session.call_tool(request.name, arguments=request.arguments)
+            if not request.result.done():
+                request.result.set_result(result)
+        except BaseException as e:
+            if is_connection_error(e):
+                self._broken = True
+            if not request.result.done():
+                request.result.set_exception(e if isinstance(e, Exception) else ConnectionError(repr(e)))
+        finally:
+            self.in_flight -= 1
+            slots.release()
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None) -> CallToolResult:
+        if not self.alive:
+            raise ConnectionError("MCP server process is not running")
+        request = _Request(name, arguments)
+        await self._queue.put(request)  # Waits while the queue is full
+        return await request.result
+
+    async def stop(self):
+        if self._task is None or self._task.done():
+            return
+        try:
+            self._queue.put_nowait(None)
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=5)
+        except (asyncio.QueueFull, asyncio.TimeoutError):
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class McpServerPool:
+    """`size` serving processes and `spares` warm standbys for one server command, shared by every toolset using it."""
+
+    def __init__(
+        self,
+        params: StdioServerParameters,
+        size: int = 1,
+        spares: int = 1,
+        timeout: float = 30,
+        queue_size: int = 32,
+        max_in_flight: int = 4,
+        ping_interval: float = 15,
+        errlog: TextIO = sys.stderr,
+    ):
+        self.params = params
+        self.size = max(1, size)
+        self.spares = max(0, spares)
+        self.process_options = dict(
+            timeout=timeout, queue_size=queue_size, max_in_flight=max_in_flight, ping_interval=ping_interval,
+            errlog=errlog,
+        )
+        self.stats = McpPoolStats()
+        self._serving: list[McpServerProcess] = []
+        self._standby: list[McpServerProcess] = []
+        self._starting: set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.closed = False
+        self.holders = 0  # Toolsets using the pool (see acquire_pool / release_pool)
+
+    async def _start_process(self) -> McpServerProcess:
+        process = McpServerProcess(self.params, **self.process_options)
+        try:
+            # Only the first process lists the tools; the list is the same for every process of this command
+            await process.start(list_tools=_cached_tools.get(server_key(self.params)) is None)
+        except ConnectionError:
+            self.stats.start_failures += 1
+            raise
+        self.stats.processes_started += 1
+        self.stats.cold_start_s = process.startup_s
+        if process.tools is not None:
+            _cached_tools[server_key(self.params)] = process.tools
+        return process
+
+    def _replenish(self):
+        """Starts background processes until serving + standby + starting covers size + spares."""
+        missing = self.size + self.spares - len(self._serving) - len(self._standby) - len(self._starting)
+        for _ in range(max(0, missing)):
+            task = asyncio.ensure_future(self._start_spare())
+            self._starting.add(task)
+            task.add_done_callback(self._starting.discard)
+
+    async def _start_spare(self):
+        try:
+            process = await self._start_process()
+        except ConnectionError as e:
+            logger.warning("Could not start a spare MCP server: %s", e)
+            return
+        if self.closed:
+            await process.stop()
+        elif len(self._serving) < self.size:
+            self._serving.append(process)
+        else:
+            self._standby.append(process)
+
+    async def _prune(self):
+        dead = [p for p in self._serving + self._standby if not p.alive]
+        if not dead:
+            return
+        self._serving = [p for p in self._serving if p.alive]
+        self._standby = [p for p in self._standby if p.alive]
+        self.stats.restarts += len(dead)
+        for process in dead:
+            await process.stop()
+
+    async def start(self) -> "McpServerPool":
+        """Starts the serving processes (waiting for them) and the spares (in the background)."""
+        async with self._lock:
+            await self._prune()
+            while len(self._serving) < self.size:
+                self._serving.append(self._standby.pop() if self._standby else await self._start_process())
+            self._replenish()
+        return self
+
+    async def _checkout(self) -> McpServerProcess:
+        if any(not p.alive for p in self._serving) or not self._serving:
+            async with self._lock:
+                await self._prune()
+                while len(self._serving) < self.size and self._standby:
+                    self._serving.append(self._standby.pop())  # A warm spare takes over at once
+                if not self._serving:
+                    self._serving.append(await self._start_process())  # Nothing warm left: cold start
+                self._replenish()
+        return min(self._serving, key=lambda p: p.load)
+
+    async def tools(self) -> ListToolsResult:
+        """The server's tool list, from the cache after the first handshake."""
+        cached = _cached_tools.get(server_key(self.params))
+        if cached is not None:
+            self.stats.tool_list_hits += 1
+            return cached
+        self.stats.tool_list_fetches += 1
+        await self.start()
+        return _cached_tools[server_key(self.params)]
+
+    async def call_tool(self, name: str, arguments: Optional[dict] = None) -> CallToolResult:
+        self.stats.calls += 1
+        for attempt in range(2):
+            process = await self._checkout()
+            if process.queue_full():
+                self.stats.queue_waits += 1
+            try:
+                return await process.call_tool(name, arguments)
+            except Exception as e:
+                if attempt == 0 and is_connection_error(e):
+                    self.stats.retries += 1
+                    logger.info("MCP server died during %s, retrying on a new process", name)
+                    continue
+                self.stats.call_errors += 1
+                raise
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats.as_dict(),
+            "serving": len(self._serving),
+            "standby": len(self._standby),
+            "load": [p.load for p in self._serving],
+        }
+
+    async def aclose(self):
+        self.closed = True
+        for task in list(self._starting):
+            task.cancel()
+        await asyncio.gather(*self._starting, return_exceptions=True)
+        processes, self._serving, self._standby = self._serving + self._standby, [], []
+        await asyncio.gather(*(p.stop() for p in processes), return_exceptions=True)
+
+
+# Tool lists by server_key (the same for every process and every loop); pools by event loop, then server_key
+_cached_tools: dict[tuple, ListToolsResult] = {}
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, McpServerPool]]" = weakref.WeakKeyDictionary()
+
+
+def get_pool(params: StdioServerParameters, **options) -> McpServerPool:
+    """The pool of the running event loop for this server command (created with `options` on first use)."""
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    key = server_key(params)
+    if key not in pools:
+        pools[key] = McpServerPool(params, **options)
+    return pools[key]
+
+
+def acquire_pool(params: StdioServerParameters, **options) -> McpServerPool:
+    """get_pool, counting one more holder: the pool keeps running until every holder has called release_pool."""
+    pool = get_pool(params, **options)
+    pool.holders += 1
+    return pool
+
+
+async def release_pool(pool: McpServerPool):
+    """Drops one holder of `pool`; the last one stops its processes."""
+    pool.holders -= 1
+    if pool.holders > 0:
+        return
+    pools = _pools.get(asyncio.get_running_loop(), {})
+    if pools.get(server_key(pool.params)) is pool:
+        del pools[server_key(pool.params)]
+    await pool.aclose()
+
+
+async def close_all():
+    """Stops every pooled process of the running event loop."""
+    pools = _pools.pop(asyncio.get_running_loop(), {})
+    await asyncio.gather(*(pool.aclose() for pool in pools.values()), return_exceptions=True)
+
+
+def forget_tool_lists():
+    """Drops the cached tool lists (e.g. after upgrading a server)."""
+    _cached_tools.clear()
+
+
+class _PooledSession:
+    """The part of mcp.ClientSession that McpTool uses, routed through the pool."""
+
+    def __init__(self, pool: McpServerPool):
+        self._pool = pool
+
+    async def call_tool(self, name: str, arguments: Optional[dict[str, Any]] = None) -> CallToolResult:
+        return await self._pool.call_tool(name, arguments)
+
+
+class _PooledSessionManager:
+    """Stands in for MCPSessionManager in the McpTools of a PooledMcpToolset."""
+
+    def __init__(self, toolset: "PooledMcpToolset"):
+        self._toolset = toolset
+
+    async def create_session(self, headers: Optional[dict[str, str]] = None) -> _PooledSession:
+        return _PooledSession(self._toolset.pool())
+
+    async def close(self):
+        pass  # The processes belong to the pool, not to one toolset
+
+
+class PooledMcpToolset(BaseToolset):
+    """Toolset of a stdio MCP server whose processes come from the shared McpServerPool of their command.
+
+    Takes McpToolset's arguments (connection_params must be StdioConnectionParams) plus the pool options:
+    size, spares, queue_size, max_in_flight, ping_interval. The options of the first toolset of a command win.
+    """
+
+    def __init__(
+        self,
+        *,
+        connection_params: StdioConnectionParams,
+        tool_filter: Optional[Union[ToolPredicate, List[str]]] = None,
+        tool_name_prefix: Optional[str] = None,
+        errlog: TextIO = sys.stderr,
+        auth_scheme: Optional[AuthScheme] = None,
+        auth_credential: Optional[AuthCredential] = None,
+        require_confirmation: Union[bool, Callable[..., bool]] = False,
+        header_provider: Optional[Callable[[ReadonlyContext], Dict[str, str]]] = None,
+        size: int = 1,
+        spares: int = 1,
+        queue_size: int = 32,
+        max_in_flight: int = 4,
+        ping_interval: float = 15,
+    ):
+        if not isinstance(connection_params, StdioConnectionParams):
+            raise ValueError("PooledMcpToolset needs StdioConnectionParams")
+        super().__init__(tool_filter=tool_filter, tool_name_prefix=tool_name_prefix)
+        self.connection_params = connection_params
+        self.auth_scheme = auth_scheme
+        self.auth_credential = auth_credential
+        self.require_confirmation = require_confirmation
+        self.header_provider = header_provider
+        self.pool_options = dict(
+            size=size, spares=spares, timeout=connection_params.timeout, queue_size=queue_size,
+            max_in_flight=max_in_flight, ping_interval=ping_interval, errlog=errlog,
+        )
+        self.session_manager = _PooledSessionManager(self)
+        self._held: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, McpServerPool]" = weakref.WeakKeyDictionary()
+
+    def pool(self) -> McpServerPool:
+        """The pool of the running event loop, held by this toolset until close()."""
+        loop = asyncio.get_running_loop()
+        pool = self._held.get(loop)
+        if pool is None or pool.closed:  # Also after close_all()
+            pool = self._held[loop] = acquire_pool(self.connection_params.server_params, **self.pool_options)
+        return pool
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+        listed = await self.pool().tools()
+        tools = []
+        for tool in listed.tools:
+            mcp_tool = McpTool(
+                mcp_tool=tool,
+                mcp_session_manager=self.session_manager,
+                auth_scheme=self.auth_scheme,
+                auth_credential=self.auth_credential,
+                require_confirmation=self.require_confirmation,
+                header_provider=self.header_provider,
+            )
+            if self._is_tool_selected(mcp_tool, readonly_context):
+                tools.append(mcp_tool)
+        return tools
+
+    async def close(self) -> None:
+        """Releases this toolset's hold on the pool: the processes stop when no other toolset holds it."""
+        pool = self._held.pop(asyncio.get_running_loop(), None)
+        if pool is not None and not pool.closed:
+            await release_pool(pool)
+
+
+async def warm_up(*toolsets: PooledMcpToolset):
+    """Starts the serving processes (and spares) of the toolsets' pools before the first request."""
+    await asyncio.gather(*(toolset.pool().start() for toolset in toolsets))
+
+
+async def demo(calls: int = 20, startup_delay: float = 1.0):
+    """Per-toolset processes (McpToolset) vs the shared warm pool, calling getTinyImage on the local stand-in."""
+    from google.adk.tools.mcp_tool.mcp_toolset import McpToolset
+    from local_mcp_server import LOCAL_MCP_SERVER
+
+    params = StdioConnectionParams(
+        server_params=StdioServerParameters(
+            command=sys.executable, args=[LOCAL_MCP_SERVER, "--startup-delay", str(startup_delay)]
+        ),
+        timeout=30,
+    )
+
+    async def first_and_next_call(toolset) -> tuple[float, float]:
+        """Time to list tools and make a first call on a new toolset, then the mean of `calls` further calls."""
+        started = time.perf_counter()
+        tool = next(t for t in await toolset.get_tools() if t.name == "getTinyImage")
+        session = await tool._mcp_session_manager.create_session()
+        await session.call_tool("getTinyImage", {"prompt": "first"})
+        first = time.perf_counter() - started
+        started = time.perf_counter()
+        for i in range(calls):
+            await toolset.get_tools()  # ADK lists the tools on every model turn
+            await session.call_tool("getTinyImage", {"prompt": str(i)})
+        return first, (time.perf_counter() - started) / calls
+
+    print(f"\n📊 getTinyImage on a stdio MCP stand-in with {startup_delay}s startup")
+    for label in ("McpToolset #1", "McpToolset #2"):
+        toolset = McpToolset(connection_params=params)
+        first, warm = await first_and_next_call(toolset)
+        print(f"   {label:<20} first call {first:.3f}s, then {warm * 1000:.1f}ms/call (incl. tools/list)")
+        await toolset.close()
+
+    toolsets = []
+    for label in ("Pooled, cold", "Pooled, new toolset"):
+        toolsets.append(PooledMcpToolset(connection_params=params))
+        first, warm = await first_and_next_call(toolsets[-1])
+        print(f"   {label:<20} first call {first:.3f}s, then {warm * 1000:.1f}ms/call (tools/list cached)")
+
+    pool = get_pool(params.server_params)
+    await asyncio.sleep(startup_delay + 1)  # Let the spare finish starting
+    try:
+        await pool._serving[0].call_tool("crash")  # Straight to the process: the pool would retry it on the spare
+    except Exception:
+        pass
+    started = time.perf_counter()
+    await pool.call_tool("getTinyImage", {"prompt": "after crash"})
+    print(f"   {'Pooled, after crash':<20} next call {time.perf_counter() - started:.3f}s (a warm spare took over)")
+    await asyncio.sleep(startup_delay + 1)
+    print(f"   Pool: {pool.metrics()}")
+    for toolset in toolsets:
+        await toolset.close()  # The second close stops the processes
+    print(f"   After both toolsets closed: {pool.metrics()['serving']} serving, {pool.metrics()['standby']} standby")
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
@@ -0,0 +1,358 @@
+# One pooled model client per process, shared by every Gemini instance.
+#
+# Each agent builds its own Gemini(model=..., retry_options=retry_config), and each of those lazily creates its own
+# google.genai.Client with its own connection pool and its own retry loop. A multi-agent app therefore opens a fresh
+# TLS connection per agent and, when the API starts returning 429, every agent retries on its own schedule.
+# When enabled, Gemini.api_client returns a shared client instead (one per event loop and per client configuration:
+# retry_options, tracking headers and base_url are each Gemini's own, as in Gemini.api_client):
+#   - one httpx connection pool (keep-alive, HTTP/2 when the `h2` package is installed)
+#   - one retry loop, in the transport, with that Gemini's own retry_options (attempts, backoff, status codes);
+#     google.genai's own retry loop is turned off, so a call makes at most `attempts` HTTP requests
+#   - every retry paced by a global retry budget (retries per second across all agents): a retry that finds the
+#     budget spent waits for it, so a burst of 429s cannot turn into a retry storm, and no call gives up earlier
+#     than it would without the pool
+#   - one set of connection metrics (requests, status codes, retries, connections opened, latency)
+#
+# Opt in with one line in .env:
+#   ADK_MODEL_POOL=1
+# Optional knobs:
+#   ADK_MODEL_POOL_MAX_CONNECTIONS=20   ADK_MODEL_POOL_RETRIES_PER_S=1   ADK_MODEL_POOL_RETRY_BURST=5
+#
+#   python adk_utils/model_pool.py   # per-agent clients vs the pool against a local HTTP stand-in (no API key needed)
+
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+from google.adk.models.google_llm import Gemini
+from google.genai import Client, types
+
+logger = logging.getLogger(__name__)
+
+# Same policy as the retry_config used by the sample agents
+DEFAULT_RETRY = types.HttpRetryOptions(attempts=5, exp_base=7, initial_delay=1, http_status_codes=[429, 500, 503, 504])
+DEFAULT_MAX_DELAY = 60.0
+
+
+class RetryBudget:
+    """Token bucket of retries shared by every request: `per_second` refill, at most `burst` saved up.
+
+    A retry that finds the bucket empty waits for a token, so retries never exceed burst + per_second * seconds.
+    """
+
+    def __init__(self, per_second: float = 1.0, burst: int = 5):
+        self.rate = per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            return 0.0
+
+    async def acquire(self) -> float:
+        """Waits for a token. Returns the seconds waited (0 if one was available)."""
+        started = time.monotonic()
+        waited = False
+        while (delay := self._take()) > 0:
+            await asyncio.sleep(delay)
+            waited = True
+        return time.monotonic() - started if waited else 0.0
+
+
+@dataclass
+class PoolMetrics:
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    retries: int = 0
+    retries_paced: int = 0  # Retries that waited for the budget
+    budget_wait_s: float = 0.0
+    transport_errors: int = 0
+    connections_opened: int = 0
+    total_latency_s: float = 0.0
+    status_codes: dict = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            **{k: v for k, v in self.__dict__.items() if k not in ("total_latency_s", "status_codes", "budget_wait_s")},
+            "budget_wait_s": round(self.budget_wait_s, 3),
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "mean_latency_s": round(self.total_latency_s / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+class RetryBudgetTransport(httpx.AsyncBaseTransport):
+    """httpx transport that retries retryable responses and connection errors, each retry paced by the shared budget.
+
+    Backoff follows the HttpRetryOptions (initial_delay * exp_base ** attempt, with jitter, capped at max_delay);
+    after it, the retry also waits for a token of the budget. These are the only retries: the client above has none.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, retry: types.HttpRetryOptions, budget: RetryBudget, metrics: PoolMetrics):
+        self.inner = inner
+        self.retry = retry
+        self.budget = budget
+        self.metrics = metrics
+
+    def _delay(self, attempt: int) -> float:
+        delay = (self.retry.initial_delay or 1.0) * (self.retry.exp_base or 2.0) ** attempt
+        delay = min(delay, self.retry.max_delay or DEFAULT_MAX_DELAY)
+        return delay + random.uniform(0, self.retry.jitter or 0.0)
+
+    def _may_retry(self, attempt: int) -> bool:
+        return attempt + 1 < (self.retry.attempts or 1)
+
+    async def _wait_for_retry(self, attempt: int):
+        await asyncio.sleep(self._delay(attempt))
+        waited = await self.budget.acquire()
+        self.metrics.retries += 1
+        if waited:
+            self.metrics.retries_paced += 1
+            self.metrics.budget_wait_s += waited
+
+    async def _trace(self, event: str, info: dict):
+        if event == "connection.connect_tcp.complete":
+            self.metrics.connections_opened += 1
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()  # Buffer the body so it can be sent again
+        request.extensions["trace"] = self._trace
+        metrics = self.metrics
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.max_in_flight = max(metrics.max_in_flight, metrics.in_flight)
+        started = time.perf_counter()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self.inner.handle_async_request(request)
+                except (httpx.ConnectError, httpx.TimeoutException) as e:
+                    metrics.transport_errors += 1
+                    if not self._may_retry(attempt):
+                        raise
+                    logger.info("Model pool: retrying after %s", type(e).__name__)
+                else:
+                    metrics.status_codes[response.status_code] = metrics.status_codes.get(response.status_code, 0) + 1
+                    if response.status_code not in (self.retry.http_status_codes or ()) or not self._may_retry(attempt):
+                        return response
+                    await response.aclose()
+                    logger.info("Model pool: retrying after HTTP %d", response.status_code)
+                await self._wait_for_retry(attempt)
+                attempt += 1
+        finally:
+            metrics.in_flight -= 1
+            metrics.total_latency_s += time.perf_counter() - started
+
+    async def aclose(self):
+        await self.inner.aclose()
+
+
+class ModelClientPool:
+    """The process-wide google.genai.Client used by every Gemini instance while the pool is enabled.
+
+    httpx clients are bound to the event loop they first ran on, so the pool keeps one client per running loop
+    (in practice: one per asyncio.run()) and per client configuration (retry_options, tracking headers, base_url),
+    so each Gemini keeps its own options. All of them share the retry budget and the metrics.
+
+    Args:
+        api_key: Defaults to GOOGLE_API_KEY, like google.genai.Client.
+        max_connections / max_keepalive_connections / keepalive_expiry: httpx.Limits of the shared pool
+            (connections above max_keepalive_connections are closed after each response; defaults to max_connections).
+        http2: Use HTTP/2 (one multiplexed connection per host). Defaults to on when `h2` is installed.
+        retry: Attempts, backoff and retryable status codes for a Gemini without retry_options (the sample agents'
+               retry_config by default); a Gemini's own retry_options win.
+        retries_per_second / retry_burst: The global retry budget across all agents.
+        timeout: Per-request timeout in seconds (None = httpx default for connect, no read limit).
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_connections: int = 20,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: float = 30.0,
+        http2: Optional[bool] = None,
+        retry: types.HttpRetryOptions = DEFAULT_RETRY,
+        retries_per_second: float = 1.0,
+        retry_burst: int = 5,
+        timeout: Optional[float] = None,
+    ):
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections or max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = importlib.util.find_spec("h2") is not None if http2 is None else http2
+        self.retry = retry
+        self.budget = RetryBudget(retries_per_second, retry_burst)
+        self.timeout = timeout
+        self._metrics = PoolMetrics()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+        self._unbound_clients: dict = {}
+        self._lock = threading.Lock()
+
+    def _new_client(self, retry_options: Optional[types.HttpRetryOptions], headers: dict, base_url: Optional[str]) -> Client:
+        transport = RetryBudgetTransport(
+            httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2),
+            retry=retry_options or self.retry,
+            budget=self.budget,
+            metrics=self._metrics,
+        )
+        timeout = httpx.Timeout(self.timeout) if self.timeout else httpx.Timeout(None, connect=10.0)
+        return Client(
+            api_key=self.api_key,
+            http_options=types.HttpOptions(
+                httpx_async_client=httpx.AsyncClient(transport=transport, timeout=timeout),
+                headers=headers,
+                base_url=base_url,
+                retry_options=None,  # No retry loop around the transport's: it would multiply the attempts
+            ),
+        )
+
+    def client(self, model: Optional[Gemini] = None) -> Client:
+        """The shared client for this event loop and `model`'s retry_options, tracking headers and base_url."""
+        retry_options = model.retry_options if model else None
+        headers = dict(model._tracking_headers) if model else {}
+        base_url = getattr(model, "base_url", None)  # A Gemini field in newer ADK versions
+        key = (retry_options.model_dump_json() if retry_options else None, tuple(sorted(headers.items())), base_url)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        with self._lock:
+            # Outside a loop (e.g. building agents, reading api_client.vertexai) the client is shared too, but it is
+            # not the one requests run on: its connections would be tied to the first loop that used them
+            clients = self._unbound_clients if loop is None else self._clients.setdefault(loop, {})
+            if key not in clients:
+                clients[key] = self._new_client(retry_options, headers, base_url)
+            return clients[key]
+
+    def metrics(self) -> dict:
+        """Counters for every request made through the pool, across all agents and event loops."""
+        clients = sum(len(per_loop) for per_loop in self._clients.values())
+        return {**self._metrics.as_dict(), "clients": clients, "http2": self.http2}
+
+    async def aclose(self):
+        """Closes the connections of the current event loop's clients."""
+        for client in self._clients.pop(asyncio.get_running_loop(), {}).values():
+            await client.aio.aclose()
+
+
+_pool: Optional[ModelClientPool] = None
+_original_api_client = Gemini.__dict__["api_client"]
+
+
+def _pooled_api_client(self: Gemini) -> Client:
+    return _pool.client(self)
+
+
+def enable(**kwargs) -> ModelClientPool:
+    """Makes every Gemini instance in this process (existing and future ones) use one ModelClientPool."""
+    global _pool
+    _pool = ModelClientPool(**kwargs)
+    # A property wins over the value functools.cached_property may already have stored on an instance
+    Gemini.api_client = property(_pooled_api_client, doc=_original_api_client.__doc__)
+    print(f"✅ Model client pool enabled: {_pool.limits.max_connections} connections, "
+          f"{_pool.budget.rate:g} retries/s (burst {_pool.budget.capacity})")
+    return _pool
+
+
+def disable():
+    global _pool
+    _pool = None
+    Gemini.api_client = _original_api_client
+
+
+def enable_from_env() -> Optional[ModelClientPool]:
+    """Enables the pool if ADK_MODEL_POOL is set to a true value (call after load_dotenv())."""
+    if _pool is not None:  # Several sample modules can be imported into one process
+        return _pool
+    if os.getenv("ADK_MODEL_POOL", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    return enable(
+        max_connections=int(os.getenv("ADK_MODEL_POOL_MAX_CONNECTIONS", "20")),
+        retries_per_second=float(os.getenv("ADK_MODEL_POOL_RETRIES_PER_S", "1")),
+        retry_burst=int(os.getenv("ADK_MODEL_POOL_RETRY_BURST", "5")),
+    )
+
+
+def metrics() -> dict:
+    """Metrics of the active pool (empty if the pool is off)."""
+    return _pool.metrics() if _pool else {}
+
+
+async def demo(runs: int = 3, agents: int = 8, calls_per_agent: int = 5, latency: float = 0.05, throttled: int = 6):
+    """Sends the same traffic with and without the pool: `runs` rounds, each building `agents` fresh Gemini
+    instances (as every sample does when it builds its agents) that make `calls_per_agent` concurrent calls."""
+    from google.adk.models.llm_request import LlmRequest
+    from local_gemini_server import LocalGeminiServer
+
+    fast_retry = types.HttpRetryOptions(attempts=5, exp_base=2, initial_delay=0.05, http_status_codes=[429, 500, 503, 504])
+    request = LlmRequest(
+        model="gemini-2.5-flash-lite",
+        contents=[types.Content(role="user", parts=[types.Part(text="Say hi")])],
+    )
+
+    async def call(model: Gemini) -> bool:
+        try:
+            async for _ in model.generate_content_async(request.model_copy(deep=True)):
+                pass
+            return True
+        except Exception as e:
+            logger.info("Call failed: %s", e)
+            return False
+
+    results = {}
+    for pooled in (False, True):
+        with LocalGeminiServer(latency=latency, fail_first=throttled) as server:
+            os.environ["GOOGLE_GEMINI_BASE_URL"] = server.url
+            if pooled:
+                enable(retry=fast_retry, retries_per_second=2, retry_burst=3)
+            started = time.perf_counter()
+            succeeded = 0
+            for _ in range(runs):
+                models = [Gemini(model="gemini-2.5-flash-lite", retry_options=fast_retry) for _ in range(agents)]
+                succeeded += sum(await asyncio.gather(*(call(m) for m in models for _ in range(calls_per_agent))))
+            results["pooled" if pooled else "per_agent"] = {
+                "succeeded": succeeded, "wall_clock_s": round(time.perf_counter() - started, 3), **server.stats(),
+            }
+            if pooled:
+                results["pool_metrics"] = metrics()
+                disable()
+
+    total = runs * agents * calls_per_agent
+    print(f"\n📊 {runs} runs x {agents} agents x {calls_per_agent} concurrent calls, first {throttled} requests throttled (429)")
+    for name in ("per_agent", "pooled"):
+        r = results[name]
+        print(f"   {name:<9} {r['succeeded']}/{total} ok, {total - r['succeeded']} failed in {r['wall_clock_s']}s, "
+              f"{r['requests']} HTTP requests, {r['connections_accepted']} TCP connections")
+    print(f"   Pool: {results['pool_metrics']}")
+    return results
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault("GOOGLE_API_KEY", "local-stand-in")
+    os.environ.pop("GOOGLE_GENAI_USE_VERTEXAI", None)
+    asyncio.run(demo())
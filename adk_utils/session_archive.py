@@ -0,0 +1,599 @@
+# Session archive: moves the events of finished sessions out of the events table, into a compact binary encoding.
+#
+# DatabaseSessionService stores every event as a row of JSON text (content, metadata) and a pickled EventActions
+# (a ~390-byte BLOB even when it holds nothing), with author, app, user and session names repeated on every row.
+# An archived event is instead one payload in `events_archive`:
+#   - a binary serializer (type tags and varints) for the event's fields - None and default values are left out,
+#     EventActions is stored as its non-default fields instead of a pickle
+#   - dictionary encoding: app/user/session names, dict keys and short repeated values (author, role, function
+#     names, ...) are stored once in `events_archive_strings` and written as a small integer reference
+#   - per-row compression with a dictionary trained on the database's own events (so a single row compresses too):
+#     zstd when the optional `zstandard` package is installed, zlib (preset dictionary) otherwise
+#   - rows clustered by (app, user, session, timestamp): one session is a range read, without a separate index
+#
+# It is an archive, not a storage format for live sessions: DatabaseSessionService, session_window's open_window,
+# session_db.query_events and check_data_in_db read `events` only, and open an archived session (its row and state
+# stay) with no events. archive_sessions() moves the events of a database - or of one app / user / session - into the
+# archive in one transaction; read_archive() streams them like session_db.query_events; restore_sessions() moves them
+# back, and ADK sees the sessions whole again.
+# The gain is for large stores: every table takes whole pages, so a database of a few dozen events (like the Day3
+# samples) does not get smaller; 18,000 events of my_agent_data.db shrink 9.5x.
+#
+#   archive_sessions("Day3/sample-agent/research_agent_data.db", session_id="compaction_demo")   # pip install zstandard
+#   for row in read_archive("Day3/sample-agent/research_agent_data.db", session_id="compaction_demo"): ...
+#   restore_sessions("Day3/sample-agent/research_agent_data.db", session_id="compaction_demo")
+#
+#   python adk_utils/session_archive.py                                 # benchmark on copies of the Day3 databases
+#   python adk_utils/session_archive.py archive DB... [--session-id ID]  # archive in place (restore DB... moves back)
+
+import json
+import logging
+import os
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Optional
+
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.database_session_service import StorageEvent
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, delete, inspect, select, tuple_
+from sqlalchemy.engine import Connection
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))  # Repo root, for adk_utils
+from adk_utils.session_db import DEFAULT_CHUNK_SIZE, engine_for, migrate
+
+try:
+    import zstandard
+except ImportError:  # Optional: zlib is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+COMPRESSIONS = {"none": 0, "zlib": 1, "zstd": 2}  # Low 4 bits of a payload's first byte
+KEY_COLUMNS = ("id", "app_name", "user_id", "session_id", "timestamp")  # Stored as columns, not in the payload
+INTERNED_FIELDS = {"author", "role", "branch", "name", "mime_type", "app_name", "user_id", "session_id", "agent_name"}
+MAX_INTERNED_LENGTH = 64
+MAX_STRINGS = 1 << 20
+DICTIONARY_SIZE = 16 * 1024
+DICTIONARY_SAMPLES = 1000  # Rows the compression dictionary is trained on
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _REF, _BYTES, _LIST, _DICT = range(10)
+_DOUBLE = struct.Struct("<d")
+
+_metadata = MetaData()
+archived_events = Table(
+    "events_archive", _metadata,
+    Column("app_ref", Integer, primary_key=True), Column("user_ref", Integer, primary_key=True),
+    Column("session_ref", Integer, primary_key=True), Column("timestamp", Float, primary_key=True),
+    Column("id", String(128), primary_key=True), Column("payload", LargeBinary, nullable=False),
+    sqlite_with_rowid=False,
+)
+archive_strings = Table(
+    "events_archive_strings", _metadata,
+    Column("id", Integer, primary_key=True, autoincrement=False), Column("value", String, nullable=False),
+)
+archive_meta = Table(
+    "events_archive_meta", _metadata,
+    Column("name", String(64), primary_key=True), Column("value", LargeBinary, nullable=False),
+)
+
+
+class StringTable:
+    """Strings written as references: index i stands for strings[i]."""
+
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings = list(strings)
+        self._index = {value: i for i, value in enumerate(self.strings)}
+        self.saved = len(self.strings)  # Strings before this index are already in event_strings
+
+    def ref(self, value: str, add: bool = True) -> Optional[int]:
+        i = self._index.get(value)
+        if i is None and add and len(value) <= MAX_INTERNED_LENGTH and len(self.strings) < MAX_STRINGS:
+            i = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+
+def _write_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def serialize(value: Any, strings: StringTable) -> bytes:
+    """Binary form of a JSON-like value (None, bool, int, float, str, bytes, list, dict with str keys)."""
+    out = bytearray()
+
+    def write(value: Any, intern: bool):
+        if value is None:
+            out.append(_NONE)
+        elif value is True or value is False:
+            out.append(_TRUE if value else _FALSE)
+        elif isinstance(value, int):
+            out.append(_INT)
+            _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)  # Zigzag
+        elif isinstance(value, float):
+            out.append(_FLOAT)
+            out.extend(_DOUBLE.pack(value))
+        elif isinstance(value, str):
+            ref = strings.ref(value, add=intern)
+            if ref is not None:
+                out.append(_REF)
+                _write_varint(out, ref)
+            else:
+                encoded = value.encode()
+                out.append(_STR)
+                _write_varint(out, len(encoded))
+                out.extend(encoded)
+        elif isinstance(value, (bytes, bytearray)):
+            out.append(_BYTES)
+            _write_varint(out, len(value))
+            out.extend(value)
+        elif isinstance(value, (list, tuple, set)):
+            out.append(_LIST)
+            _write_varint(out, len(value))
+            for item in value:
+                write(item, intern)
+        elif isinstance(value, dict):
+            out.append(_DICT)
+            _write_varint(out, len(value))
+            for key, item in value.items():
+                write(key, True)
+                write(item, key in INTERNED_FIELDS)
+        else:
+            raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+    write(value, False)
+    return bytes(out)
+
+
+def deserialize(data: bytes, strings: StringTable) -> Any:
+    def read(pos: int) -> tuple[Any, int]:
+        tag = data[pos]
+        pos += 1
+        if tag == _STR:
+            length, pos = _read_varint(data, pos)
+            return data[pos:pos + length].decode(), pos + length
+        if tag == _REF:
+            ref, pos = _read_varint(data, pos)
+            return strings.strings[ref], pos
+        if tag == _DICT:
+            length, pos = _read_varint(data, pos)
+            result = {}
+            for _ in range(length):
+                key, pos = read(pos)
+                result[key], pos = read(pos)
+            return result, pos
+        if tag == _LIST:
+            length, pos = _read_varint(data, pos)
+            result = []
+            for _ in range(length):
+                item, pos = read(pos)
+                result.append(item)
+            return result, pos
+        if tag == _INT:
+            n, pos = _read_varint(data, pos)
+            return (n >> 1) if not n & 1 else -((n + 1) >> 1), pos
+        if tag == _FLOAT:
+            return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+        if tag == _BYTES:
+            length, pos = _read_varint(data, pos)
+            return bytes(data[pos:pos + length]), pos + length
+        if tag in (_NONE, _FALSE, _TRUE):
+            return (None, False, True)[tag], pos
+        raise ValueError(f"Unknown type tag {tag} at byte {pos - 1}")
+
+    return read(0)[0]
+
+
+def event_record(row: dict) -> dict:
+    """The payload fields of an events row (as read with StorageEvent's column types), without None/defaults."""
+    record = {}
+    for name, value in row.items():
+        if name in KEY_COLUMNS or value is None:
+            continue
+        if name == "actions":
+            value = value.model_dump(mode="json", exclude_defaults=True)
+        elif name == "long_running_tool_ids_json":
+            value = json.loads(value)
+        record[name] = value
+    return record
+
+
+def event_row(record: dict) -> dict:
+    """The events column values of a payload record (the inverse of event_record)."""
+    row = dict.fromkeys(c for c in StorageEvent.__table__.columns.keys() if c not in KEY_COLUMNS)  # One shape per row
+    row.update(record)
+    row["actions"] = EventActions.model_validate(row.get("actions", {}))
+    if row["long_running_tool_ids_json"] is not None:
+        row["long_running_tool_ids_json"] = json.dumps(row["long_running_tool_ids_json"])
+    return row
+
+
+class EventCodec:
+    """Serializes, compresses and restores event payloads.
+
+    Args:
+        strings: The string table references resolve against (grows as new strings are encoded).
+        compression: "zstd", "zlib", "none", or "auto" (zstd if `zstandard` is installed, else zlib).
+        dictionary: Compression dictionary (see train); without one, each row is compressed on its own.
+        level: Compression level (default: 3 for zstd, 6 for zlib).
+    """
+
+    def __init__(self, strings: Optional[StringTable] = None, compression: str = "auto",
+                 dictionary: Optional[bytes] = None, level: Optional[int] = None):
+        if compression == "auto":
+            compression = "zstd" if zstandard is not None else "zlib"
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}: one of {', '.join(COMPRESSIONS)} or 'auto'")
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package: pip install zstandard")
+        self.strings = strings or StringTable()
+        self.compression = compression
+        self.level = level
+        self.dictionary = dictionary
+        self._zstd: dict = {}  # "compress" / "decompress" -> zstandard objects for the current dictionary
+
+    def train(self, records: Iterable[dict], size: int = DICTIONARY_SIZE) -> bytes:
+        """Builds the compression dictionary from sample records (zstd: a trained one; zlib: their serialized bytes)."""
+        samples = [serialize(record, self.strings) for record in records]
+        if self.compression == "zstd" and len(samples) >= 10:
+            try:
+                self.dictionary = zstandard.train_dictionary(size, samples).as_bytes()
+            except zstandard.ZstdError:  # Too few or too similar samples: a raw content dictionary instead
+                self.dictionary = None
+        if self.compression != "zstd" or self.dictionary is None:
+            # zlib's preset dictionary is raw content; matches closer to the end of it are cheaper
+            self.dictionary = b"".join(samples)[-min(size, 32 * 1024):] or None
+        self._zstd.clear()
+        return self.dictionary or b""
+
+    def _zstd_dict(self):
+        if self.dictionary is None:
+            return None
+        return zstandard.ZstdCompressionDict(self.dictionary, dict_type=zstandard.DICT_TYPE_AUTO)
+
+    def encode(self, record: dict) -> bytes:
+        data = serialize(record, self.strings)
+        if self.compression == "zlib":
+            level = self.level if self.level is not None else 6
+            dictionary = {"zdict": self.dictionary} if self.dictionary else {}
+            compressor = zlib.compressobj(level, zlib.DEFLATED, -15, **dictionary)  # Raw deflate: no header
+            data = compressor.compress(data) + compressor.flush()
+        elif self.compression == "zstd":
+            if "compress" not in self._zstd:
+                self._zstd["compress"] = zstandard.ZstdCompressor(
+                    level=self.level if self.level is not None else 3, dict_data=self._zstd_dict())
+            data = self._zstd["compress"].compress(data)
+        return bytes([(FORMAT_VERSION << 4) | COMPRESSIONS[self.compression]]) + data
+
+    def decode(self, payload: bytes) -> dict:
+        version, compression = payload[0] >> 4, payload[0] & 0x0F
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Payload format {version} is not supported (this module reads {FORMAT_VERSION})")
+        data = payload[1:]
+        if compression == COMPRESSIONS["zlib"]:
+            decompressor = zlib.decompressobj(-15, **({"zdict": self.dictionary} if self.dictionary else {}))
+            data = decompressor.decompress(data) + decompressor.flush()
+        elif compression == COMPRESSIONS["zstd"]:
+            if zstandard is None:
+                raise ImportError("This archive was written with zstd: pip install zstandard to read it")
+            if "decompress" not in self._zstd:
+                self._zstd["decompress"] = zstandard.ZstdDecompressor(dict_data=self._zstd_dict())
+            data = self._zstd["decompress"].decompress(data)
+        return deserialize(data, self.strings)
+
+
+# Archived sessions
+
+def _load_codec(connection: Connection) -> Optional[EventCodec]:
+    """The codec the database's archive was written with, or None if it has no archive."""
+    if not inspect(connection).has_table(archive_meta.name):
+        return None
+    meta = dict(connection.execute(select(archive_meta.c.name, archive_meta.c.value)).all())
+    if not meta:
+        return None
+    strings = connection.execute(select(archive_strings.c.value).order_by(archive_strings.c.id)).scalars()
+    return EventCodec(StringTable(strings), compression=meta["compression"].decode(), dictionary=meta.get("dictionary"))
+
+
+def _save_strings(connection: Connection, codec: EventCodec):
+    new = codec.strings.strings[codec.strings.saved:]
+    if new:
+        first = codec.strings.saved
+        connection.execute(archive_strings.insert(), [{"id": first + i, "value": value} for i, value in enumerate(new)])
+        codec.strings.saved += len(new)
+
+
+def _sqlite_only(db: str):
+    if engine_for(db).dialect.name != "sqlite":
+        raise ValueError("The session archive is a SQLite storage format")
+
+
+def _event_columns(connection: Connection) -> list:
+    present = {column["name"] for column in inspect(connection).get_columns("events")}
+    return [column for column in StorageEvent.__table__.columns if column.name in present]
+
+
+def _event_filters(app_name: Optional[str], user_id: Optional[str], session_id: Optional[str]) -> list:
+    """Conditions on the events rows of an app / user / session."""
+    events = StorageEvent.__table__
+    return [column == value for column, value in ((events.c.app_name, app_name), (events.c.user_id, user_id),
+                                                  (events.c.session_id, session_id)) if value is not None]
+
+
+@dataclass
+class ArchiveReport:
+    rows: int = 0
+    bytes_before: int = 0  # Database file size
+    bytes_after: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        ratio = round(self.bytes_before / self.bytes_after, 2) if self.bytes_after else 0.0
+        return {**self.__dict__, "seconds": round(self.seconds, 3), "ratio": ratio}
+
+
+def _file_size(db: str) -> int:
+    path = engine_for(db).url.database
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def archive_sessions(db: str, *, app_name: Optional[str] = None, user_id: Optional[str] = None,
+                     session_id: Optional[str] = None, compression: str = "auto",
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, vacuum: bool = True) -> ArchiveReport:
+    """Moves the events of every session (or of an app / user / session) into the archive, in one transaction.
+
+    ADK opens those sessions with no events until restore_sessions(). A database archived before keeps its codec;
+    the file is VACUUMed afterwards unless `vacuum` is False.
+    """
+    _sqlite_only(db)
+    migrate(db)  # The events columns of the current ADK version, so every field is read
+    report = ArchiveReport(bytes_before=_file_size(db))
+    started = time.perf_counter()
+    engine = engine_for(db)
+    events = StorageEvent.__table__
+    with engine.begin() as connection:
+        _metadata.create_all(connection)
+        codec = _load_codec(connection)
+        columns = _event_columns(connection)
+        filters = _event_filters(app_name, user_id, session_id)
+        if codec is None:
+            codec = EventCodec(compression=compression)
+            samples = connection.execute(select(*columns).where(*filters).limit(DICTIONARY_SAMPLES)).all()
+            codec.train(event_record(row._asdict()) for row in samples)  # Also fills the string table
+            connection.execute(archive_meta.insert(), [
+                {"name": "format", "value": str(FORMAT_VERSION).encode()},
+                {"name": "compression", "value": codec.compression.encode()},
+            ] + ([{"name": "dictionary", "value": codec.dictionary}] if codec.dictionary else []))
+
+        keys = []
+        result = connection.execution_options(yield_per=chunk_size).execute(select(*columns).where(*filters))
+        for rows in result.partitions():
+            archived = []
+            for row in rows:
+                row = row._asdict()
+                archived.append({
+                    "app_ref": codec.strings.ref(row["app_name"]),
+                    "user_ref": codec.strings.ref(row["user_id"]),
+                    "session_ref": codec.strings.ref(row["session_id"]),
+                    "timestamp": row["timestamp"].timestamp(),
+                    "id": row["id"],
+                    "payload": codec.encode(event_record(row)),
+                })
+                keys.append(tuple(row[column.name] for column in events.primary_key.columns))
+            _save_strings(connection, codec)
+            connection.execute(archived_events.insert(), archived)
+            report.rows += len(archived)
+        # The rows archived, not whatever matches the filters by now: an event appended meanwhile stays in `events`
+        primary_key = tuple_(*events.primary_key.columns)
+        for start in range(0, len(keys), chunk_size):
+            connection.execute(delete(events).where(primary_key.in_(keys[start:start + chunk_size])))
+    if vacuum:
+        with engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+    report.seconds = time.perf_counter() - started
+    report.bytes_after = _file_size(db)
+    return report
+
+
+def _archive_filters(codec: EventCodec, app_name: Optional[str], user_id: Optional[str],
+                     session_id: Optional[str]) -> list:
+    """Conditions on the archived rows of an app / user / session (a name not in the string table matches none)."""
+    filters = []
+    for column, value in ((archived_events.c.app_ref, app_name), (archived_events.c.user_ref, user_id),
+                          (archived_events.c.session_ref, session_id)):
+        if value is not None:
+            filters.append(column == codec.strings.ref(value, add=False))
+    return filters
+
+
+def _restored(codec: EventCodec, archived) -> dict:
+    row = event_row(codec.decode(archived.payload))
+    strings = codec.strings.strings
+    row.update(id=archived.id, app_name=strings[archived.app_ref], user_id=strings[archived.user_ref],
+               session_id=strings[archived.session_ref], timestamp=datetime.fromtimestamp(archived.timestamp))
+    return row
+
+
+def read_archive(db: str, *, app_name: Optional[str] = None, user_id: Optional[str] = None,
+                 session_id: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[dict]:
+    """The archived events as events rows (column name -> value, actions as EventActions), session by session."""
+    with engine_for(db).connect() as connection:
+        codec = _load_codec(connection)
+        if codec is None:
+            return
+        filters = _archive_filters(codec, app_name, user_id, session_id)
+        query = select(archived_events).where(*filters).order_by(*archived_events.primary_key.columns)
+        result = connection.execution_options(yield_per=chunk_size).execute(query)
+        for archived in result:
+            yield _restored(codec, archived)
+
+
+def restore_sessions(db: str, *, app_name: Optional[str] = None, user_id: Optional[str] = None,
+                     session_id: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Moves archived events (all, or those of an app / user / session) back into `events`. Returns how many."""
+    _sqlite_only(db)
+    migrate(db)
+    moved = 0
+    with engine_for(db).begin() as connection:
+        codec = _load_codec(connection)
+        if codec is None:
+            return 0
+        filters = _archive_filters(codec, app_name, user_id, session_id)
+        result = connection.execution_options(yield_per=chunk_size).execute(select(archived_events).where(*filters))
+        for chunk in result.partitions():
+            connection.execute(StorageEvent.__table__.insert(), [_restored(codec, archived) for archived in chunk])
+            moved += len(chunk)
+        connection.execute(delete(archived_events).where(*filters))
+    return moved
+
+
+def benchmark(scale: int = 1000, seconds: float = 0.5):
+    """Bytes on disk and encode/decode throughput on copies of the Day3 databases, as they are and `scale` times over."""
+    import random
+    import shutil
+    import tempfile
+
+    from sqlalchemy import func
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    directory = tempfile.mkdtemp(prefix="session_archive_")
+    compressions = ["none", "zlib"] + (["zstd"] if zstandard is not None else [])
+    stored = [StorageEvent.__table__.c[name] for name in ("content", "actions", "grounding_metadata", "custom_metadata",
+                                                          "usage_metadata", "citation_metadata", "error_message")]
+
+    def shuffled(content: Optional[dict], seed: int) -> Optional[dict]:
+        """The content with the words of each text part in another order: same vocabulary, other sentences."""
+        if not content:
+            return content
+        parts = []
+        for part in content.get("parts", []):
+            if "text" in part:
+                words = part["text"].split(" ")
+                random.Random(seed).shuffle(words)
+                part = {**part, "text": " ".join(words)}
+            parts.append(part)
+        return {**content, "parts": parts}
+
+    def copy(name: str, copies: int) -> str:
+        path = os.path.join(directory, f"{copies}x_{name}")
+        shutil.copy(os.path.join(here, "..", "Day3", "sample-agent", name), path)
+        migrate(path)
+        with engine_for(path).begin() as connection:
+            rows = [row._asdict() for row in connection.execute(select(*_event_columns(connection)))]
+            for n in range(1, copies):  # More sessions like the recorded ones, without repeating their text verbatim
+                connection.execute(StorageEvent.__table__.insert(), [{
+                    **row, "id": f"{row['id'][:-6]}{n:06d}", "session_id": f"{row['session_id']}-{n}",
+                    "content": shuffled(row["content"], n),
+                } for row in rows])
+        with engine_for(path).connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+        return path
+
+    def rate(action, items: list) -> float:
+        """Items per second, over at least `seconds`."""
+        done, started = 0, time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            for item in items:
+                action(item)
+            done += len(items)
+        return done / (time.perf_counter() - started)
+
+    def records_of(path: str) -> tuple[list[dict], float]:
+        """The events of a database as payload records, and their stored bytes per row."""
+        with engine_for(path).connect() as connection:
+            rows = [row._asdict() for row in connection.execute(select(*_event_columns(connection)))]
+            raw_bytes = connection.execute(select(*(func.sum(func.length(c)) for c in stored))).one()
+        return [event_record(row) for row in rows], sum(n or 0 for n in raw_bytes) / len(rows)
+
+    try:
+        names = ("my_agent_data.db", "research_agent_data.db")
+        for name, other in zip(names, reversed(names)):
+            path = copy(name, 1)
+            records, raw = records_of(path)
+            # Trained on the other database: a dictionary trained on the measured rows would contain them verbatim
+            training, _ = records_of(copy(other, 1))
+            print(f"\n📊 {name}: {len(records)} events, {raw:.0f} bytes of content/actions/metadata per row as stored")
+            print(f"   {'encoding':<26}{'bytes/row':>10}{'encode rows/s':>15}{'decode rows/s':>15}{'encode MB/s':>13}")
+            for compression in compressions:
+                for label, trained in ((compression, False), (f"{compression} + dict of {other[:-8]}", True)):
+                    if compression == "none" and trained:
+                        continue
+                    codec = EventCodec(compression=compression)
+                    if trained:
+                        codec.train(training)
+                    payloads = [codec.encode(record) for record in records]
+                    assert all(codec.decode(p) == r for p, r in zip(payloads, records))
+                    size = sum(map(len, payloads)) / len(payloads)
+                    encode = rate(codec.encode, records)
+                    decode = rate(codec.decode, payloads)
+                    print(f"   {label:<26}{size:>10.0f}{encode:>15,.0f}{decode:>15,.0f}{encode * raw / 1e6:>13.1f}")
+            if zstandard is None:
+                print("   (zstd: pip install zstandard)")
+
+            for copies in (1, scale):
+                path = copy(name, copies) if copies > 1 else path
+                before = None
+                if copies == 1:
+                    with engine_for(path).connect() as connection:
+                        before = {r.id: r._asdict() for r in connection.execute(select(*_event_columns(connection)))}
+                report = archive_sessions(path)
+                print(f"   archive_sessions, {report.rows:>6,} events: {report.bytes_before:>10,} -> "
+                      f"{report.bytes_after:>10,} bytes on disk ({report.as_dict()['ratio']}x) in {report.seconds:.2f}s")
+                if before is not None:
+                    archived = {row["id"]: row for row in read_archive(path)}
+                    moved = restore_sessions(path)
+                    with engine_for(path).connect() as connection:
+                        after = {r.id: r._asdict() for r in connection.execute(select(*_event_columns(connection)))}
+                    # Compared field by field, as the current EventActions model dumps them (an older ADK's pickle
+                    # can carry attributes the current models no longer have)
+                    same = all(event_record(archived[i]) == event_record(after[i]) == event_record(before[i])
+                               and [after[i][c] for c in KEY_COLUMNS] == [before[i][c] for c in KEY_COLUMNS]
+                               for i in before)
+                    print(f"   read_archive + restore_sessions: {moved} events back, identical to originals: {same}")
+                engine_for(path).dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Archive the sessions of session databases in the compact event encoding, or restore them.",
+        epilog="Archived events are read by read_archive() only: DatabaseSessionService, open_window, query_events and "
+               "check_data_in_db open archived sessions with no events until `restore`. Small databases (a few dozen "
+               "events, like the Day3 samples) do not get smaller.")
+    parser.add_argument("command", nargs="?", choices=("archive", "restore", "benchmark"), default="benchmark")
+    parser.add_argument("databases", nargs="*")
+    parser.add_argument("--app-name", help="only this app's sessions")
+    parser.add_argument("--user-id", help="only this user's sessions")
+    parser.add_argument("--session-id", help="only this session")
+    parser.add_argument("--compression", default="auto", choices=("auto", *COMPRESSIONS))
+    args = parser.parse_intermixed_args()  # Options before or after the databases
+    if args.command == "benchmark":
+        benchmark()
+    scope = {"app_name": args.app_name, "user_id": args.user_id, "session_id": args.session_id}
+    for database in args.databases:
+        if args.command == "archive":
+            report = archive_sessions(database, compression=args.compression, **scope)
+            print(f"✅ {database}: {report.as_dict()}")
+        elif args.command == "restore":
+            print(f"✅ {database}: {restore_sessions(database, **scope)} events moved back to the events table")
@@ -0,0 +1,263 @@
+# get_or_create_session and a write-through cache of hot sessions, in front of any ADK session service.
+#
+# The Day3 run_session helpers called create_session and, for an existing session, fell back to get_session through
+# a bare `except:`. Against DatabaseSessionService every turn of an existing session then cost a failed insert
+# (AlreadyExistsError), a second query that loads all its events, and - inside runner.run_async - a third load.
+#
+#   - get_or_create_session(service, app_name=..., user_id=..., session_id=...) is one call without the exception:
+#     an existing session is read once; a missing one is created on a database by a single, race-free
+#     `INSERT ... ON CONFLICT DO NOTHING` transaction (session + app/user state rows), elsewhere by create_session.
+#     On its own it is not faster: a turn still reads the whole session twice (here and in runner.run_async), which
+#     costs far more than the failed insert it replaces - the demo measures both within noise of each other
+#   - CachedSessionService(service) keeps the most recently used sessions in memory; get_session (also the one
+#     runner.run_async does on every turn) returns the cached Session, and append_event writes the event through
+#     to the wrapped service and into the cached copy, so repeat turns skip the database reads entirely: this is
+#     where the gain is
+#
+#   session_service = CachedSessionService(DatabaseSessionService(db_url="sqlite+aiosqlite:///my_agent_data.db"))
+#   runner = Runner(agent=agent, app_name=APP_NAME, session_service=session_service)
+#   session = await get_or_create_session(session_service, app_name=APP_NAME, user_id=USER_ID, session_id="s1")
+#
+# The cache assumes this process is the only writer of the sessions it holds (app:/user: state written through one
+# session is applied to the other cached sessions of the same app/user).
+#
+#   python adk_utils/session_cache.py   # repeat turns on a SQLite session: create/except/get vs the cached upsert
+
+import copy
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from google.adk.errors.already_exists_error import AlreadyExistsError
+from google.adk.events.event import Event
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.session import Session
+from google.adk.sessions.state import State
+
+logger = logging.getLogger(__name__)
+
+SessionKey = tuple[str, str, str]  # (app_name, user_id, session_id)
+
+
+@dataclass
+class SessionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    created: int = 0
+    evicted: int = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {**self.__dict__, "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+def _upsert_statement(dialect: str):
+    """The dialect's INSERT that ignores an existing row, or None if there is none."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return lambda table, **values: insert(table).values(**values).on_conflict_do_nothing()
+
+
+async def _database_upsert(service, app_name: str, user_id: str, session_id: str, state: dict) -> bool:
+    """Creates the session rows if missing, in one transaction. False if the database has no suitable upsert."""
+    from google.adk.sessions.database_session_service import StorageAppState, StorageSession, StorageUserState
+
+    await service._ensure_tables_created()
+    async with service.database_session_factory() as sql_session:
+        upsert = _upsert_statement(sql_session.bind.dialect.name)
+        if upsert is None:
+            return False
+        await sql_session.execute(upsert(StorageAppState, app_name=app_name, state={}))
+        await sql_session.execute(upsert(StorageUserState, app_name=app_name, user_id=user_id, state={}))
+        await sql_session.execute(upsert(StorageSession, app_name=app_name, user_id=user_id, id=session_id, state=state))
+        await sql_session.commit()
+    return True
+
+
+async def get_or_create_session(
+    service: BaseSessionService,
+    *,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    state: Optional[dict[str, Any]] = None,
+) -> Session:
+    """The session with this id, created (with `state`) if it does not exist yet. Safe against concurrent creators."""
+    if isinstance(service, CachedSessionService):
+        return await service.get_or_create_session(app_name=app_name, user_id=user_id, session_id=session_id, state=state)
+
+    session = await service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is not None:
+        return session  # The usual case: a read, no write transaction
+
+    # app:/user: keys of the initial state go through create_session, which merges them into the shared state rows
+    session_only = not any(key.startswith((State.APP_PREFIX, State.USER_PREFIX)) for key in state or {})
+    if hasattr(service, "database_session_factory") and session_only:
+        if await _database_upsert(service, app_name, user_id, session_id, dict(state or {})):
+            return await service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    try:
+        return await service.create_session(app_name=app_name, user_id=user_id, session_id=session_id, state=state)
+    except AlreadyExistsError:  # Created by someone else since the get
+        return await service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+
+class CachedSessionService(BaseSessionService):
+    """Session service wrapper with an LRU cache of up to `max_sessions` sessions, written through on append_event.
+
+    get_session calls with a GetSessionConfig (recent events only, ...) are not cached and go to the wrapped service.
+    """
+
+    def __init__(self, service: BaseSessionService, max_sessions: int = 256):
+        self.service = service
+        self.max_sessions = max_sessions
+        self.stats = SessionCacheStats()
+        self._sessions: OrderedDict[SessionKey, Session] = OrderedDict()
+
+    def _remember(self, session: Session) -> Session:
+        key = (session.app_name, session.user_id, session.id)
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats.evicted += 1
+        return session
+
+    def _cached(self, app_name: str, user_id: str, session_id: str) -> Optional[Session]:
+        session = self._sessions.get((app_name, user_id, session_id))
+        if session is not None:
+            self._sessions.move_to_end((app_name, user_id, session_id))
+            self.stats.hits += 1
+        else:
+            self.stats.misses += 1
+        return session
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[dict[str, Any]] = None,
+                             session_id: Optional[str] = None) -> Session:
+        session = await self.service.create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        self.stats.created += 1
+        return self._remember(session)
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        if config is not None:
+            return await self.service.get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+        session = self._cached(app_name, user_id, session_id)
+        if session is None:
+            session = await self.service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+            if session is not None:
+                self._remember(session)
+        return session
+
+    async def get_or_create_session(self, *, app_name: str, user_id: str, session_id: str,
+                                    state: Optional[dict[str, Any]] = None) -> Session:
+        session = self._cached(app_name, user_id, session_id)
+        if session is None:
+            session = self._remember(await get_or_create_session(
+                self.service, app_name=app_name, user_id=user_id, session_id=session_id, state=state,
+            ))
+        return session
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        return await self.service.list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        self._sessions.pop((app_name, user_id, session_id), None)
+        await self.service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        try:
+            event = await self.service.append_event(session, event)
+        except Exception:
+            self._sessions.pop(key, None)  # Reloaded from the service next time
+            raise
+        cached = self._sessions.get(key)
+        if cached is not None and cached is not session:
+            # The caller appended to a copy: bring the cached session up to date with it
+            self._sessions[key] = session
+        if event.actions and event.actions.state_delta:
+            self._share_state(session, event.actions.state_delta)
+        return event
+
+    def _share_state(self, session: Session, state_delta: dict):
+        """Applies app:/user: state changes to the other cached sessions of the same app / user."""
+        shared = {k: v for k, v in state_delta.items() if k.startswith((State.APP_PREFIX, State.USER_PREFIX))}
+        if not shared:
+            return
+        for (app_name, user_id, session_id), other in self._sessions.items():
+            if other is session or app_name != session.app_name:
+                continue
+            for key, value in shared.items():
+                if key.startswith(State.APP_PREFIX) or user_id == session.user_id:
+                    other.state[key] = copy.deepcopy(value)
+
+    def metrics(self) -> dict:
+        return {**self.stats.as_dict(), "sessions": len(self._sessions)}
+
+
+async def demo(turns: int = 200, history: int = 40):
+    """Session lookups for `turns` turns of an existing SQLite session with `history` events:
+    create_session/except/get_session (+ the runner's get_session) vs get_or_create_session on the cache."""
+    import os
+    import tempfile
+    import time
+
+    from google.adk.sessions import DatabaseSessionService
+    from google.genai import types
+
+    directory = tempfile.mkdtemp(prefix="session_cache_")
+    db_url = f"sqlite+aiosqlite:///{os.path.join(directory, 'sessions.db')}"
+    database = DatabaseSessionService(db_url=db_url)
+    session = await database.create_session(app_name="app", user_id="user", session_id="chat")
+    for i in range(history):
+        await database.append_event(session, Event(
+            author="user" if i % 2 == 0 else "bot", invocation_id=f"inv-{i // 2}",
+            content=types.Content(role="user", parts=[types.Part(text=f"message {i} " + "lorem ipsum " * 20)]),
+        ))
+
+    async def before():
+        # What run_session did, then what runner.run_async does with the session id
+        try:
+            session = await database.create_session(app_name="app", user_id="user", session_id="chat")
+        except Exception:
+            session = await database.get_session(app_name="app", user_id="user", session_id="chat")
+        await database.get_session(app_name="app", user_id="user", session_id=session.id)
+
+    async def upsert():
+        session = await get_or_create_session(database, app_name="app", user_id="user", session_id="chat")
+        await database.get_session(app_name="app", user_id="user", session_id=session.id)
+
+    cached = CachedSessionService(database)
+
+    async def after():
+        session = await get_or_create_session(cached, app_name="app", user_id="user", session_id="chat")
+        await cached.get_session(app_name="app", user_id="user", session_id=session.id)
+
+    print(f"\n📊 Session lookups per turn, SQLite session with {history} events, {turns} turns")
+    for label, turn in (
+        ("create/except/get + runner get", before),
+        ("get_or_create_session, no cache", upsert),
+        ("get_or_create_session, cached", after),
+    ):
+        started = time.perf_counter()
+        for _ in range(turns):
+            await turn()
+        elapsed = time.perf_counter() - started
+        print(f"   {label:<32} {elapsed / turns * 1000:7.3f} ms/turn")
+
+    fresh = await get_or_create_session(database, app_name="app", user_id="user", session_id="new-chat", state={"topic": "x"})
+    again = await get_or_create_session(database, app_name="app", user_id="user", session_id="new-chat")
+    print(f"   Upsert: created {fresh.id!r} with state {fresh.state}, second call found it ({len(again.events)} events)")
+    print(f"   Cache: {cached.metrics()}")
+    await database.db_engine.dispose()
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(demo())
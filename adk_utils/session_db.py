@@ -0,0 +1,273 @@
+# Migrations and a streaming query API for the session database written by DatabaseSessionService.
+#
+# ADK creates the `events` table with only its primary key (id, app_name, user_id, session_id): every query by
+# session and time, and every report by author, scans the whole table - and check_data_in_db read that whole table
+# into memory with fetchall(). This module adds:
+#   - migrate(db): applies, once per database, the migrations in MIGRATIONS and records them in adk_utils_migrations:
+#       0001 the events columns that newer ADK versions read (input/output_transcription) - without them
+#            DatabaseSessionService 1.19 cannot read databases created by older versions, like the Day3 ones
+#       0002 index ix_events_session_time_id on (app_name, user_id, session_id, timestamp, id): a session's events
+#            in (timestamp, id) order without a sort (get_session, session_window.py's pages, query_events)
+#       0003 index ix_events_author_time on (author, timestamp): one author's events over a time range
+#   - query_events(db, app_name=..., user_id=..., author=..., since=..., until=...): the matching rows, as lists of at
+#     most `chunk_size` dicts, read from one streaming cursor - memory is bounded by the chunk, not the table
+#
+#   migrate("Day3/sample-agent/my_agent_data.db")
+#   for chunk in query_events("Day3/sample-agent/my_agent_data.db", author="user", since=datetime(2025, 11, 1)):
+#       for row in chunk: ...
+#
+# `db` is a SQLite file path or any SQLAlchemy URL (async driver URLs as given to DatabaseSessionService included).
+#
+#   python adk_utils/session_db.py   # query plans before/after on the Day3 databases, then timings over 200,000 events
+
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Union
+
+from google.adk.sessions.database_session_service import StorageEvent
+from sqlalchemy import Column, DateTime, Index, MetaData, String, Table, create_engine, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+TimeBound = Union[datetime, float, None]  # A datetime as stored by ADK (naive local time), or a Unix timestamp
+
+REPORT_COLUMNS = ("app_name", "user_id", "session_id", "invocation_id", "author", "timestamp", "content")
+DEFAULT_CHUNK_SIZE = 1000
+
+# The migrations own their metadata: the indexes are not added to ADK's StorageEvent table definition
+_metadata = MetaData()
+_events = Table(
+    "events", _metadata,
+    Column("id", String), Column("app_name", String), Column("user_id", String), Column("session_id", String),
+    Column("timestamp", DateTime), Column("author", String),
+)
+_migrations_table = Table(
+    "adk_utils_migrations", _metadata,
+    Column("name", String(128), primary_key=True), Column("applied_at", DateTime, nullable=False),
+)
+SESSION_TIME_INDEX = Index("ix_events_session_time_id", _events.c.app_name, _events.c.user_id, _events.c.session_id,
+                           _events.c.timestamp, _events.c.id)
+AUTHOR_INDEX = Index("ix_events_author_time", _events.c.author, _events.c.timestamp)
+
+
+def _add_missing_event_columns(connection: Connection):
+    present = {column["name"] for column in inspect(connection).get_columns("events")}
+    for column in StorageEvent.__table__.columns:
+        if column.name not in present:
+            if not column.nullable:
+                raise RuntimeError(f"events.{column.name} is required by ADK and cannot be added to existing rows")
+            logger.info("Adding column events.%s", column.name)
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE events ADD COLUMN {column.name} {column_type}"))
+
+
+MIGRATIONS = (
+    ("0001_events_newer_adk_columns", _add_missing_event_columns),
+    ("0002_events_session_time_index", lambda connection: SESSION_TIME_INDEX.create(connection, checkfirst=True)),
+    ("0003_events_author_index", lambda connection: AUTHOR_INDEX.create(connection, checkfirst=True)),
+)
+
+
+def sync_url(db: str) -> str:
+    """A synchronous SQLAlchemy URL for a SQLite path or a (possibly async-driver) database URL."""
+    if "://" not in db:
+        return f"sqlite:///{db}"
+    for async_driver, driver in (("+aiosqlite", ""), ("+asyncpg", "+psycopg2"), ("+aiomysql", "+pymysql")):
+        scheme, rest = db.split("://", 1)
+        if scheme.endswith(async_driver):
+            return f"{scheme[:-len(async_driver)]}{driver}://{rest}"
+    return db
+
+
+@lru_cache(maxsize=None)
+def engine_for(db: str) -> Engine:
+    return create_engine(sync_url(db))
+
+
+def migrate(db: str) -> list[str]:
+    """Applies the migrations this database has not had yet, each in its own transaction. Returns their names."""
+    engine = engine_for(db)
+    with engine.begin() as connection:
+        if not inspect(connection).has_table("events"):
+            raise RuntimeError(f"{db} has no events table: create it with DatabaseSessionService first")
+        _migrations_table.create(connection, checkfirst=True)
+        done = set(connection.execute(select(_migrations_table.c.name)).scalars())
+    applied = []
+    for name, apply in MIGRATIONS:
+        if name in done:
+            continue
+        with engine.begin() as connection:
+            apply(connection)
+            connection.execute(_migrations_table.insert().values(name=name, applied_at=datetime.now()))
+        applied.append(name)
+        logger.info("%s: applied %s", db, name)
+    return applied
+
+
+def _as_datetime(bound: TimeBound) -> Optional[datetime]:
+    # DatabaseSessionService stores datetime.fromtimestamp(event.timestamp)
+    return datetime.fromtimestamp(bound) if isinstance(bound, (int, float)) else bound
+
+
+def events_query(
+    *,
+    app_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    author: Union[str, Iterable[str], None] = None,
+    since: TimeBound = None,
+    until: TimeBound = None,
+    columns: Iterable[str] = REPORT_COLUMNS,
+    ordered: bool = True,
+):
+    """The SELECT of query_events: rows with since <= timestamp < until, in timestamp order if `ordered`."""
+    table = StorageEvent.__table__
+    query = select(*(table.c[name] for name in columns))
+    for name, value in (("app_name", app_name), ("user_id", user_id), ("session_id", session_id)):
+        if value is not None:
+            query = query.where(table.c[name] == value)
+    if author is not None:
+        query = query.where(table.c.author == author if isinstance(author, str) else table.c.author.in_(list(author)))
+    if since is not None:
+        query = query.where(table.c.timestamp >= _as_datetime(since))
+    if until is not None:
+        query = query.where(table.c.timestamp < _as_datetime(until))
+    return query.order_by(table.c.timestamp, table.c.id) if ordered else query
+
+
+def query_events(
+    db: str,
+    *,
+    app_name: Optional[str] = None,
+    user_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    author: Union[str, Iterable[str], None] = None,
+    since: TimeBound = None,
+    until: TimeBound = None,
+    columns: Iterable[str] = REPORT_COLUMNS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+) -> Iterator[list[dict]]:
+    """The matching events, `chunk_size` rows at a time, as dicts of `columns` (content decoded from JSON).
+
+    All chunks come from one cursor, inside one read transaction: a consistent snapshot of the table.
+    Unordered queries are cheaper when no index serves the filter (no sort of the matching rows).
+    """
+    query = events_query(app_name=app_name, user_id=user_id, session_id=session_id, author=author,
+                         since=since, until=until, columns=columns, ordered=ordered)
+    with engine_for(db).connect() as connection:
+        result = connection.execution_options(yield_per=chunk_size).execute(query)
+        for rows in result.partitions():
+            yield [row._asdict() for row in rows]
+
+
+def iter_events(db: str, **filters) -> Iterator[dict]:
+    """query_events, one row at a time."""
+    for chunk in query_events(db, **filters):
+        yield from chunk
+
+
+def query_plan(db: str, **filters) -> list[str]:
+    """SQLite's plan for query_events with these filters (SCAN = every row read, SEARCH ... USING INDEX = not)."""
+    compiled = events_query(**filters).compile(engine_for(db), compile_kwargs={"literal_binds": True})
+    with engine_for(db).connect() as connection:
+        return [row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))]
+
+
+def demo(events: int = 200_000, sessions: int = 200):
+    """Query plans on copies of the Day3 databases before and after migrate(), then timings over `events` rows."""
+    import os
+    import shutil
+    import tempfile
+    import time
+    import tracemalloc
+    from collections import Counter
+
+    from google.adk.events.event_actions import EventActions
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    directory = tempfile.mkdtemp(prefix="session_db_")
+    try:
+        plans = {
+            "a session's events in order": dict(app_name="default", user_id="default", session_id="test-db-session-01"),
+            "one author, one day": dict(author="user", since=datetime(2025, 11, 21), until=datetime(2025, 11, 22)),
+        }
+        for name in ("my_agent_data.db", "research_agent_data.db"):
+            path = os.path.join(directory, name)
+            shutil.copy(os.path.join(here, "..", "Day3", "sample-agent", name), path)
+            before = {label: query_plan(path, **filters) for label, filters in plans.items()}
+            applied = migrate(path)
+            print(f"\n📊 {name}: applied {applied}; migrate() again applies {migrate(path)}")
+            for label, filters in plans.items():
+                print(f"   {label:<30} {' / '.join(before[label])}  ->  {' / '.join(query_plan(path, **filters))}")
+            rows = sum(len(chunk) for chunk in query_events(path, author="user", chunk_size=4))
+            print(f"   {rows} user events streamed in chunks of 4")
+            engine_for(path).dispose()
+
+        # A larger store: `events` rows over `sessions` sessions and 10 days, 4 authors
+        path = os.path.join(directory, "large.db")
+        engine = engine_for(path)
+        StorageEvent.metadata.create_all(engine)
+        start = datetime(2025, 11, 1).timestamp()
+        authors = ("user", "text_chat_bot", "research_agent", "summarizer")
+        with engine.begin() as connection:
+            connection.execute(StorageEvent.__table__.insert(), [{
+                "id": f"e{i}", "app_name": "app", "user_id": f"user_{i % sessions % 20}", "session_id": f"s{i % sessions}",
+                "invocation_id": f"inv{i // 4}", "author": authors[i % 4], "actions": EventActions(),
+                "timestamp": datetime.fromtimestamp(start + i * 864_000 / events),
+                "content": {"role": "user", "parts": [{"text": f"message {i} " + "lorem ipsum " * 20}]},
+            } for i in range(events)])
+
+        def report(fetch_all: bool) -> tuple[Counter, float, float]:
+            """Events per author of user_7 on Nov 3 to Nov 5."""
+            filters = dict(app_name="app", user_id="user_7", since=datetime(2025, 11, 3), until=datetime(2025, 11, 6))
+            tracemalloc.start()
+            started = time.perf_counter()
+            per_author = Counter()
+            if fetch_all:  # What check_data_in_db did: the whole table, filtered in Python
+                with engine.connect() as connection:
+                    rows = connection.execute(select(*(StorageEvent.__table__.c[c] for c in REPORT_COLUMNS))).fetchall()
+                per_author.update(r.author for r in rows if r.user_id == "user_7" and filters["since"] <= r.timestamp < filters["until"])
+            else:
+                for row in iter_events(path, **filters):
+                    per_author[row["author"]] += 1
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return per_author, elapsed, peak
+
+        print(f"\n📊 Report over {events:,} events: events per author of one user over 3 days")
+        for label, fetch_all in (("fetchall + Python filter", True), ("query_events", False)):
+            per_author, elapsed, peak = report(fetch_all)
+            print(f"   {label:<26} {elapsed * 1000:8.1f} ms, peak {peak / 2**20:7.1f} MiB, {sum(per_author.values())} events")
+
+        def timed(filters: dict, runs: int = 5) -> tuple[float, int]:
+            """Best of `runs` full reads of query_events, and the row count."""
+            best = float("inf")
+            for _ in range(runs):
+                started = time.perf_counter()
+                rows = sum(len(chunk) for chunk in query_events(path, **filters))
+                best = min(best, time.perf_counter() - started)
+            return best, rows
+
+        # What the indexes are for: s7 belongs to user_7
+        indexed = {
+            "a session's events in order": dict(app_name="app", user_id="user_7", session_id="s7"),
+            "one author, one day": dict(author="user", since=datetime(2025, 11, 3), until=datetime(2025, 11, 4)),
+        }
+        before = {label: timed(filters) for label, filters in indexed.items()}
+        migrate(path)
+        print(f"\n📊 Indexed queries over {events:,} events, before -> after migrate()")
+        for label, filters in indexed.items():
+            (slow, rows), (fast, _) = before[label], timed(filters)
+            print(f"   {label:<30} {slow * 1000:7.1f} ms -> {fast * 1000:6.1f} ms ({slow / fast:5.1f}x), {rows} events"
+                  f"  [{' / '.join(query_plan(path, **filters))}]")
+        engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    demo()
@@ -0,0 +1,369 @@
+# Windowed view of a long session: the latest compaction summary, the last N events, older history on demand.
+#
+# session_service.get_session() reads every event row of the session and converts each one to an Event, and the Day3
+# helpers then walk the whole `session.events` list (checkForCompactionEvent looking for the compaction summary,
+# MemorySavingAgent printing the conversation). A session that has been running for months is slow to open and
+# is held in memory in full, although the model only ever sees the latest summary and what came after it.
+#
+#   - open_window(service, app_name=..., user_id=..., session_id=..., last_n=20) reads the session row and state, the
+#     last `last_n` events and the latest compaction event (found by a backwards scan over the few rows that can be
+#     one: author "user" and no content), and nothing else
+#   - window.load_older(n) pages the previous n events in, in front of window.events
+#   - window.stream() / stream_events(...) iterate the whole history through a keyset cursor on (timestamp, id):
+#     one short query per page of `page_size` events, so memory stays bounded by the page, not the session
+#
+#   window = await open_window(session_service, app_name=APP_NAME, user_id=USER_ID, session_id="compaction_demo")
+#   if window.summary: print(window.summary.actions.compaction.compacted_content)
+#   async for event in window.stream(): ...
+#
+# Database services (DatabaseSessionService, FastSqliteSessionService - whose buffered events are flushed first -,
+# or either behind CachedSessionService) are read with these queries; any other service (InMemorySessionService)
+# already holds its sessions in memory, and the window is cut from get_session.
+# Pages are read through the (app_name, user_id, session_id, timestamp, id) index that session_db.migrate() adds;
+# without it, every page sorts the session's rows again.
+#
+#   python adk_utils/session_window.py   # research_agent_data.db, then a 20,000-event session: full load vs window
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions.base_session_service import BaseSessionService
+from google.adk.sessions.database_session_service import (
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+    _merge_state,
+)
+from google.adk.sessions.session import Session
+from pydantic import ValidationError
+from sqlalchemy import and_, inspect, or_, select
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAST_N = 20
+DEFAULT_PAGE_SIZE = 200
+
+
+def is_compaction(event: Event) -> bool:
+    return bool(event.actions and event.actions.compaction)
+
+
+class _DatabasePager:
+    """Pages of a session's event rows, ordered by (timestamp, id), read with the service's engine."""
+
+    def __init__(self, service, app_name: str, user_id: str, session_id: str):
+        self.service = service
+        self.key = (app_name, user_id, session_id)
+        self._columns: Optional[list] = None
+
+    async def columns(self) -> list:
+        """The event columns present in the table (databases made by older ADK versions lack the newest ones)."""
+        if self._columns is None:
+            async with self.service.db_engine.connect() as connection:
+                present = await connection.run_sync(lambda c: {col["name"] for col in inspect(c).get_columns("events")})
+            self._columns = [column for column in StorageEvent.__table__.columns if column.name in present]
+        return self._columns
+
+    def _select(self, columns: list):
+        table = StorageEvent.__table__
+        app_name, user_id, session_id = self.key
+        return select(*columns).where(
+            table.c.app_name == app_name, table.c.user_id == user_id, table.c.session_id == session_id
+        )
+
+    async def page(self, after: Optional[tuple] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   newest_first: bool = False) -> list[tuple[tuple, Event]]:
+        """Up to `limit` (key, event) pairs past `after` (a key from a previous page), in the requested order."""
+        table = StorageEvent.__table__
+        query = self._select(await self.columns())
+        if after is not None:
+            timestamp, event_id = after
+            past = (table.c.timestamp < timestamp) if newest_first else (table.c.timestamp > timestamp)
+            tie = (table.c.id < event_id) if newest_first else (table.c.id > event_id)
+            query = query.where(or_(past, and_(table.c.timestamp == timestamp, tie)))
+        order = (table.c.timestamp.desc(), table.c.id.desc()) if newest_first else (table.c.timestamp, table.c.id)
+        async with self.service.database_session_factory() as sql_session:
+            rows = (await sql_session.execute(query.order_by(*order).limit(limit))).all()
+        return [((row.timestamp, row.id), _to_event(row)) for row in rows]
+
+    async def latest_compaction(self, scan: int = DEFAULT_PAGE_SIZE) -> Optional[Event]:
+        """The newest compaction event. Only rows shaped like one (author "user", no content) have actions decoded."""
+        table = StorageEvent.__table__
+        candidates = self._select([table.c.timestamp, table.c.id, table.c.actions]).where(
+            table.c.author == "user", table.c.content.is_(None)
+        ).order_by(table.c.timestamp.desc(), table.c.id.desc())
+        async with self.service.database_session_factory() as sql_session:
+            offset = 0
+            while True:
+                rows = (await sql_session.execute(candidates.offset(offset).limit(scan))).all()
+                for row in rows:
+                    if getattr(row.actions, "compaction", None):
+                        full = self._select(await self.columns()).where(table.c.id == row.id)
+                        return _to_event((await sql_session.execute(full)).one())
+                if len(rows) < scan:
+                    return None
+                offset += scan
+
+    async def session(self) -> Optional[tuple[dict[str, Any], float]]:
+        """The merged app/user/session state and the last update time, or None if there is no such session."""
+        app_name, user_id, _ = self.key
+        async with self.service.database_session_factory() as sql_session:
+            storage_session = await sql_session.get(StorageSession, self.key)
+            if storage_session is None:
+                return None
+            app_state = await sql_session.get(StorageAppState, app_name)
+            user_state = await sql_session.get(StorageUserState, (app_name, user_id))
+            state = _merge_state(app_state.state if app_state else {}, user_state.state if user_state else {},
+                                 storage_session.state)
+            return state, storage_session.update_timestamp_tz
+
+
+class _LoadedPager:
+    """The same pages, cut from a session that get_session returned in full (services that keep sessions in memory)."""
+
+    def __init__(self, session: Session):
+        self.events = session.events
+
+    async def page(self, after: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+                   newest_first: bool = False) -> list[tuple[int, Event]]:
+        if newest_first:
+            end = len(self.events) if after is None else after
+            indexes = range(end - 1, max(-1, end - 1 - limit), -1)
+        else:
+            start = 0 if after is None else after + 1
+            indexes = range(start, min(len(self.events), start + limit))
+        return [(i, self.events[i]) for i in indexes]
+
+    async def latest_compaction(self) -> Optional[Event]:
+        return next((event for event in reversed(self.events) if is_compaction(event)), None)
+
+
+class _EventRow:
+    """The attributes StorageEvent.to_event reads, without the cost of building an ORM-instrumented StorageEvent."""
+
+    long_running_tool_ids = StorageEvent.long_running_tool_ids
+    to_event = StorageEvent.to_event
+
+    def __init__(self, mapping):
+        self.__dict__.update(dict.fromkeys(StorageEvent.__table__.columns.keys()))  # Absent columns stay None
+        self.__dict__.update(mapping)
+
+
+def _to_event(row) -> Event:
+    # Converted exactly as DatabaseSessionService converts its rows
+    event = _EventRow(row._mapping).to_event()
+    try:
+        # to_event copies the actions through model_dump, which leaves `compaction` a plain dict: validate it back
+        event.actions = EventActions.model_validate(row.actions.model_dump())
+    except ValidationError:
+        pass  # Pickled by an ADK version with other fields: as DatabaseSessionService returns it
+    return event
+
+
+def _database_service(service: BaseSessionService):
+    """The DatabaseSessionService under a CachedSessionService, or None for services that keep sessions in memory."""
+    service = getattr(service, "service", service)  # CachedSessionService
+    return service if hasattr(service, "database_session_factory") else None
+
+
+def is_database_backed(service: BaseSessionService) -> bool:
+    """Whether stream_events / open_window page through the service's tables (False: they cut from get_session)."""
+    return _database_service(service) is not None
+
+
+async def _pager(service: BaseSessionService, app_name: str, user_id: str, session_id: str):
+    """(pager, state, last_update_time) for the session, or None if it does not exist."""
+    database = _database_service(service)
+    if database is None:
+        session = await service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        return None if session is None else (_LoadedPager(session), session.state, session.last_update_time)
+    if hasattr(database, "flush"):
+        await database.flush()  # FastSqliteSessionService: the buffered events first
+    await database._ensure_tables_created()
+    pager = _DatabasePager(database, app_name, user_id, session_id)
+    found = await pager.session()
+    return None if found is None else (pager, *found)
+
+
+async def _stream(pager, page_size: int, newest_first: bool) -> AsyncIterator[Event]:
+    after = None
+    while True:
+        page = await pager.page(after, page_size, newest_first)
+        for key, event in page:
+            yield event
+        if len(page) < page_size:
+            return
+        after = page[-1][0]
+
+
+async def stream_events(
+    service: BaseSessionService,
+    *,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+) -> AsyncIterator[Event]:
+    """Every event of the session, oldest first (or newest first), read `page_size` events at a time."""
+    found = await _pager(service, app_name, user_id, session_id)
+    if found is None:
+        return
+    async for event in _stream(found[0], page_size, newest_first):
+        yield event
+
+
+@dataclass
+class SessionWindow:
+    """The tail of a session: state, the latest compaction summary and the last events loaded so far."""
+
+    app_name: str
+    user_id: str
+    id: str
+    state: dict[str, Any]
+    last_update_time: float
+    summary: Optional[Event]  # The latest compaction event, wherever it is in the history
+    events: list[Event]  # Loaded events, oldest first: the last N, then whatever load_older paged in
+    has_older: bool  # Older events remain in the store
+    _pager: Any = field(repr=False, default=None)
+    _oldest: Any = field(repr=False, default=None)  # Pager key of events[0]
+
+    async def load_older(self, limit: int = DEFAULT_PAGE_SIZE) -> list[Event]:
+        """Pages in the `limit` events before the oldest loaded one (oldest first) and prepends them to `events`."""
+        if not self.has_older:
+            return []
+        page = await self._pager.page(self._oldest, limit, newest_first=True)
+        older = [event for _, event in reversed(page)]
+        if page:
+            self._oldest = page[-1][0]
+        self.has_older = len(page) == limit
+        self.events[:0] = older
+        return older
+
+    def stream(self, page_size: int = DEFAULT_PAGE_SIZE, newest_first: bool = False) -> AsyncIterator[Event]:
+        """The whole history through a cursor, without keeping it: loaded events are not reused or extended."""
+        return _stream(self._pager, page_size, newest_first)
+
+    def context_events(self) -> list[Event]:
+        """What the model works from: the summary and the loaded events after the range it compacts."""
+        if self.summary is None:
+            return list(self.events)
+        end = self.summary.actions.compaction.end_timestamp
+        return [self.summary] + [e for e in self.events if e.timestamp > end and e.id != self.summary.id]
+
+    def to_session(self) -> Session:
+        """A Session holding only the window (summary first if it is older than the loaded events)."""
+        events = list(self.events)
+        if self.summary is not None and all(e.id != self.summary.id for e in events):
+            events.insert(0, self.summary)
+        return Session(id=self.id, app_name=self.app_name, user_id=self.user_id, state=dict(self.state),
+                       events=events, last_update_time=self.last_update_time)
+
+
+async def open_window(
+    service: BaseSessionService,
+    *,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    last_n: int = DEFAULT_LAST_N,
+) -> Optional[SessionWindow]:
+    """The window over the session's last `last_n` events, or None if the session does not exist."""
+    found = await _pager(service, app_name, user_id, session_id)
+    if found is None:
+        return None
+    pager, state, last_update_time = found
+    page = await pager.page(None, last_n, newest_first=True) if last_n > 0 else []
+    summary = next((event for _, event in page if is_compaction(event)), None) or await pager.latest_compaction()
+    return SessionWindow(
+        app_name=app_name, user_id=user_id, id=session_id, state=state, last_update_time=last_update_time,
+        summary=summary, events=[event for _, event in reversed(page)], has_older=len(page) == last_n,
+        _pager=pager, _oldest=page[-1][0] if page else None,
+    )
+
+
+async def demo(history: int = 20000, compact_every: int = 50, last_n: int = DEFAULT_LAST_N):
+    """The repo's research_agent_data.db through a window, then a `history`-event session: get_session vs window."""
+    import os
+    import shutil
+    import tempfile
+    import time
+    import tracemalloc
+
+    from google.adk.events.event_actions import EventCompaction
+    from google.adk.sessions import DatabaseSessionService
+    from google.genai import types
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    directory = tempfile.mkdtemp(prefix="session_window_")
+    try:
+        # 1. The compaction demo database (a copy: the window only reads, but the engine may leave files behind)
+        path = os.path.join(directory, "research_agent_data.db")
+        shutil.copy(os.path.join(here, "..", "Day3", "sample-agent", "research_agent_data.db"), path)
+        service = DatabaseSessionService(db_url=f"sqlite+aiosqlite:///{path}")
+        window = await open_window(service, app_name="research_app_compacting", user_id="default",
+                                   session_id="compaction_demo", last_n=3)
+        print(f"\n📊 research_agent_data.db, session compaction_demo, last_n=3")
+        print(f"   Loaded {len(window.events)} events, older history: {window.has_older}")
+        if window.summary:
+            text = window.summary.actions.compaction.compacted_content.parts[0].text
+            print(f"   Summary event {window.summary.id}: {text[:100]!r}...")
+        streamed = [event.author async for event in window.stream(page_size=4)]
+        print(f"   Streamed {len(streamed)} events in pages of 4; context sent to the model: "
+              f"{len(window.context_events())} events (summary + what follows it)")
+        await service.db_engine.dispose()
+
+        # 2. A long session: one row per event, a compaction summary every `compact_every` events
+        service = DatabaseSessionService(db_url=f"sqlite+aiosqlite:///{os.path.join(directory, 'long.db')}")
+        session = await service.create_session(app_name="app", user_id="user", session_id="long")
+        rows, started = [], time.time() - history
+        for i in range(history):
+            if i % compact_every == compact_every - 1:
+                compaction = EventCompaction(start_timestamp=started + i - compact_every, end_timestamp=started + i - 1,
+                                             compacted_content=types.Content(role="model", parts=[types.Part(text=f"Summary up to {i}")]))
+                event = Event(author="user", invocation_id=f"c{i}", actions=EventActions(compaction=compaction))
+            else:
+                event = Event(author="user" if i % 2 == 0 else "bot", invocation_id=f"inv-{i // 2}",
+                              content=types.Content(role="user", parts=[types.Part(text=f"message {i} " + "lorem ipsum " * 20)]))
+            event.timestamp = started + i
+            rows.append(StorageEvent.from_event(session, event))
+        async with service.database_session_factory() as sql_session:
+            sql_session.add_all(rows)
+            await sql_session.commit()
+
+        async def measure(coroutine):
+            tracemalloc.start()
+            begun = time.perf_counter()
+            result = await coroutine
+            elapsed = time.perf_counter() - begun
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return result, elapsed, peak
+
+        async def count_streamed() -> int:
+            return sum([1 async for _ in stream_events(service, app_name="app", user_id="user", session_id="long")])
+
+        full, full_s, full_peak = await measure(service.get_session(app_name="app", user_id="user", session_id="long"))
+        window, window_s, window_peak = await measure(
+            open_window(service, app_name="app", user_id="user", session_id="long", last_n=last_n))
+        streamed, stream_s, stream_peak = await measure(count_streamed())
+        print(f"\n📊 Opening a session with {history:,} events (a summary every {compact_every})")
+        print(f"   get_session (all events)         {full_s * 1000:8.1f} ms, peak {full_peak / 2**20:6.1f} MiB, {len(full.events):,} events")
+        print(f"   open_window(last_n={last_n})           {window_s * 1000:8.1f} ms, peak {window_peak / 2**20:6.1f} MiB, "
+              f"{len(window.events)} events + summary {window.summary.invocation_id}")
+        print(f"   stream_events (pages of {DEFAULT_PAGE_SIZE})     {stream_s * 1000:8.1f} ms, peak {stream_peak / 2**20:6.1f} MiB, {streamed:,} events")
+        await window.load_older(100)
+        print(f"   load_older(100): {len(window.events)} events loaded, first {window.events[0].content.parts[0].text[:12]!r}")
+        await service.db_engine.dispose()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(demo())
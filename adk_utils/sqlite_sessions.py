@@ -0,0 +1,453 @@
+# High-throughput SQLite mode for DatabaseSessionService.
+#
+# With `DatabaseSessionService(db_url="sqlite:///...")` every event is its own transaction: read the session row,
+# check it is not stale, insert the event, commit - and with SQLite's default rollback journal and synchronous=FULL,
+# each commit waits for the disk, while concurrent sessions queue on the database lock. FastSqliteSessionService
+# keeps the same tables (existing databases keep working) and:
+#   - opens every pooled connection with journal_mode=WAL (readers no longer block the writer and vice versa),
+#     synchronous=NORMAL (a commit is a WAL append, synced at checkpoints) and a busy timeout
+#   - runs write transactions (create/delete_session, append_event, the writer task) one at a time, queued on an
+#     asyncio lock instead of pooled connections polling SQLite's lock, and begins them with BEGIN IMMEDIATE: they read
+#     the session row before writing, and a read transaction that upgrades to a write fails at once with SQLITE_BUSY
+#     when another connection committed meanwhile - taking the write lock up front waits out the busy timeout instead
+#   - keeps `pool_size` connections open instead of opening one per operation
+#   - applies append_event to the in-memory session at once and buffers the event per invocation; one writer task
+#     commits the buffered events - all events of an invocation, and of every other invocation ready by then - in a
+#     single transaction. Buffers are handed to the writer when the invocation ends (GroupCommitPlugin, or flush()),
+#     when a session is read back, or `max_delay` seconds after their first event. If a combined transaction fails,
+#     each invocation's events are retried in a transaction of their own, so one bad batch does not sink the others;
+#     a batch that still fails is raised by the next flush() or get_session() of its session.
+#
+#   session_service = FastSqliteSessionService("Day3/sample-agent/my_agent_data.db")
+#   app = App(name=..., root_agent=..., plugins=[GroupCommitPlugin(session_service)])
+#   ...
+#   await session_service.close()   # commits what is still buffered
+#
+# Like CachedSessionService (session_cache.py), this assumes one process writes the database: the stale-session check
+# of DatabaseSessionService.append_event is skipped, and up to `max_delay` seconds of events are only in memory.
+#
+#   python adk_utils/sqlite_sessions.py   # events/sec at 1, 16 and 128 concurrent sessions: default vs tuned
+
+import asyncio
+import contextlib
+import contextvars
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events.event import Event
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions.base_session_service import BaseSessionService, GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import (
+    DatabaseSessionService,
+    StorageAppState,
+    StorageEvent,
+    StorageSession,
+    StorageUserState,
+)
+from google.adk.sessions.session import Session
+from google.adk.sessions import _session_util
+from sqlalchemy import event as sqlalchemy_event
+from sqlalchemy import insert, inspect
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+)
+
+
+def sqlite_url(path_or_url: str) -> str:
+    """An async SQLAlchemy URL for a SQLite file path or URL.
+
+    ADK's DatabaseSessionService runs on an async engine, which rejects the sync `sqlite:///` driver.
+    """
+    if path_or_url.startswith("sqlite+aiosqlite://"):
+        return path_or_url
+    if path_or_url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + path_or_url[len("sqlite://"):]
+    return f"sqlite+aiosqlite:///{path_or_url}"
+
+
+def _tune_connection(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None  # The driver's implicit BEGIN is off; _begin() starts every transaction
+    cursor = dbapi_connection.cursor()
+    for pragma in PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def _begin(connection):
+    if connection.get_execution_options().get("sqlite_begin") == "IMMEDIATE":
+        connection.exec_driver_sql("BEGIN IMMEDIATE")  # Takes the write lock now, waiting up to busy_timeout for it
+    else:
+        connection.exec_driver_sql("BEGIN")
+
+
+_WRITING = contextvars.ContextVar("sqlite_sessions_writing", default=False)  # Set inside _write_transaction()
+
+
+SessionKey = tuple[str, str, str]  # (app_name, user_id, session_id)
+
+
+def _key(session: Session) -> SessionKey:
+    return (session.app_name, session.user_id, session.id)
+
+
+class _Batch:
+    def __init__(self, items: list):
+        self.items = items  # [(session, event)]
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()  # Done when written or failed
+
+
+class FastSqliteSessionService(DatabaseSessionService):
+    """DatabaseSessionService on a tuned SQLite connection pool, with group-committed events.
+
+    Args:
+        path_or_url: SQLite file path, or a sqlite:// / sqlite+aiosqlite:// URL.
+        pool_size: Connections kept open (readers run in parallel in WAL mode; writes run one at a time).
+        group_commit: False writes each event in its own transaction, as DatabaseSessionService does (tuned pool only).
+        max_delay: Seconds an invocation's events may wait in memory before they are committed anyway.
+        max_batch: Events after which an invocation's buffer is handed to the writer without waiting for its end.
+    """
+
+    def __init__(
+        self,
+        path_or_url: str,
+        pool_size: int = 8,
+        group_commit: bool = True,
+        max_delay: float = 0.5,
+        max_batch: int = 256,
+        **engine_kwargs: Any,
+    ):
+        super().__init__(sqlite_url(path_or_url), pool_size=pool_size, max_overflow=pool_size, **engine_kwargs)
+        sqlalchemy_event.listen(self.db_engine.sync_engine, "connect", _tune_connection)
+        sqlalchemy_event.listen(self.db_engine.sync_engine, "begin", _begin)
+        self._read_sessions = self.database_session_factory
+        self._write_sessions = async_sessionmaker(
+            bind=self.db_engine.execution_options(sqlite_begin="IMMEDIATE"), expire_on_commit=False
+        )
+        self.database_session_factory = self._open_session  # What the inherited methods call
+        self.group_commit = group_commit
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.transactions = 0  # Committed by the writer task
+        self.events_written = 0
+        self._buffers: dict[str, list] = {}  # invocation_id -> [(session, event)] not yet handed to the writer
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._in_flight: set[asyncio.Future] = set()
+        self._invocation_sessions: dict[str, SessionKey] = {}  # invocation_id -> its session, until flushed
+        self._errors: dict[SessionKey, BaseException] = {}  # Write failures not yet raised to a caller
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _open_session(self):
+        return (self._write_sessions if _WRITING.get() else self._read_sessions)()
+
+    def _write_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock, self._lock_loop = asyncio.Lock(), loop
+        return self._lock
+
+    @contextlib.asynccontextmanager
+    async def _write_transaction(self):
+        """Waits for the other writes; sessions the inherited methods open inside begin with BEGIN IMMEDIATE."""
+        async with self._write_lock():
+            token = _WRITING.set(True)
+            try:
+                yield
+            finally:
+                _WRITING.reset(token)
+
+    # Writes
+
+    async def create_session(self, **kwargs) -> Session:
+        async with self._write_transaction():
+            return await super().create_session(**kwargs)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if not self.group_commit:
+            async with self._write_transaction():
+                return await super().append_event(session, event)
+        if event.partial:
+            return event
+        event = self._trim_temp_delta_state(event)
+        await BaseSessionService.append_event(self, session=session, event=event)  # State and events, in memory
+
+        buffer = self._buffers.setdefault(event.invocation_id, [])
+        buffer.append((session, event))
+        self._invocation_sessions[event.invocation_id] = _key(session)
+        if len(buffer) >= self.max_batch:
+            self._submit(event.invocation_id)
+        elif len(buffer) == 1:
+            loop = asyncio.get_running_loop()
+            self._timers[event.invocation_id] = loop.call_later(self.max_delay, self._submit, event.invocation_id)
+        return event
+
+    def _submit(self, invocation_id: str) -> Optional[asyncio.Future]:
+        """Hands an invocation's buffered events to the writer task."""
+        timer = self._timers.pop(invocation_id, None)
+        if timer:
+            timer.cancel()
+        items = self._buffers.pop(invocation_id, None)
+        if not items:
+            return None
+        self._ensure_writer()
+        batch = _Batch(items)
+        self._in_flight.add(batch.future)
+        batch.future.add_done_callback(self._in_flight.discard)
+        self._queue.put_nowait(batch)
+        return batch.future
+
+    def _ensure_writer(self):
+        loop = asyncio.get_running_loop()
+        if self._writer is None or self._writer.done() or self._writer.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._writer = loop.create_task(self._write_loop(), name="sqlite-session-writer")
+
+    async def _write_loop(self):
+        while True:
+            batches = [await self._queue.get()]
+            while not self._queue.empty():  # Everything that is ready goes into the same transaction
+                batches.append(self._queue.get_nowait())
+            failed = []
+            try:
+                await self._write([item for batch in batches for item in batch.items])
+            except Exception as e:
+                if len(batches) == 1:
+                    failed = [(batches[0], e)]
+                else:
+                    logger.warning("Could not write %d session event batches together (%r); retrying each", len(batches), e)
+                    for batch in batches:  # One bad batch must not take the others down with it
+                        try:
+                            await self._write(batch.items)
+                        except Exception as e:
+                            failed.append((batch, e))
+            for batch, error in failed:
+                self._failed(batch, error)
+            for batch in batches:
+                if not any(batch is f for f, _ in failed):
+                    for invocation_id in {event.invocation_id for _, event in batch.items} - self._buffers.keys():
+                        self._invocation_sessions.pop(invocation_id, None)  # Written, nothing left to report
+                batch.future.set_result(None)
+
+    def _failed(self, batch: _Batch, error: Exception):
+        """Keeps the error for the next flush() / get_session() of the batch's sessions (a timer has no waiter)."""
+        sessions = {_key(session) for session, _ in batch.items}
+        logger.error("Could not write %d session event(s) of %s: %r", len(batch.items), sorted(sessions), error)
+        for key in sessions:
+            self._errors.setdefault(key, error)
+
+    async def _write(self, items: list):
+        await self._ensure_tables_created()
+        now = datetime.now(timezone.utc)
+        async with self._write_lock(), self._write_sessions() as sql_session:
+            storage_sessions, app_states, user_states, rows = {}, {}, {}, []
+            for session, event in items:
+                key = (session.app_name, session.user_id, session.id)
+                if key not in storage_sessions:
+                    storage_sessions[key] = await sql_session.get(StorageSession, key)
+                storage_session = storage_sessions[key]
+                if storage_session is None:
+                    logger.warning("Session %s was deleted; dropping event %s", key, event.id)
+                    continue
+                if event.actions and event.actions.state_delta:
+                    deltas = _session_util.extract_state_delta(event.actions.state_delta)
+                    if deltas["app"]:
+                        if session.app_name not in app_states:
+                            app_states[session.app_name] = await sql_session.get(StorageAppState, session.app_name)
+                        app_states[session.app_name].state = app_states[session.app_name].state | deltas["app"]
+                    if deltas["user"]:
+                        user_key = (session.app_name, session.user_id)
+                        if user_key not in user_states:
+                            user_states[user_key] = await sql_session.get(StorageUserState, user_key)
+                        user_states[user_key].state = user_states[user_key].state | deltas["user"]
+                    if deltas["session"]:
+                        storage_session.state = storage_session.state | deltas["session"]
+                rows.append(StorageEvent.from_event(session, event))
+            # One executemany for all events, instead of one ORM flush per object
+            columns = [attribute.key for attribute in inspect(StorageEvent).column_attrs]
+            if rows:
+                await sql_session.execute(insert(StorageEvent), [{c: getattr(row, c) for c in columns} for row in rows])
+            for storage_session in storage_sessions.values():
+                if storage_session is not None:
+                    storage_session.update_time = now.replace(tzinfo=None)  # SQLite stores naive UTC
+            await sql_session.commit()
+        for session, _ in items:
+            session.last_update_time = now.timestamp()
+        self.transactions += 1
+        self.events_written += len(items)
+
+    async def flush(self, invocation_id: Optional[str] = None):
+        """Commits the buffered events (of one invocation, or all) and waits for the writer.
+
+        Raises the first write error not yet raised, of the invocation's session (or of any session).
+        """
+        if invocation_id:
+            await self._drain([invocation_id])
+            key = self._invocation_sessions.pop(invocation_id, None)
+            self._raise_errors([key] if key else [])
+        else:
+            await self._drain(list(self._buffers))
+            self._invocation_sessions.clear()
+            self._raise_errors(list(self._errors))
+
+    async def _drain(self, invocation_ids: list):
+        for pending in invocation_ids:
+            self._submit(pending)
+        if self._in_flight:
+            await asyncio.gather(*list(self._in_flight))
+
+    def _raise_errors(self, keys: list):
+        raised = [key for key in keys if key in self._errors]
+        if raised:
+            for invocation_id in [i for i, key in self._invocation_sessions.items() if key in raised]:
+                del self._invocation_sessions[invocation_id]
+            errors = [self._errors.pop(key) for key in raised]
+            raise errors[0]
+
+    # Reads see every event appended so far
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str,
+                          config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        await self._drain(list(self._buffers))
+        self._raise_errors([(app_name, user_id, session_id)])
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        await self._drain(list(self._buffers))
+        return await super().list_sessions(app_name=app_name, user_id=user_id)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await self._drain(list(self._buffers))
+        self._errors.pop((app_name, user_id, session_id), None)  # Its unwritten events go with it
+        async with self._write_transaction():
+            await super().delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+
+    async def close(self):
+        """Commits what is buffered, stops the writer task and closes the pooled connections. Raises like flush()."""
+        try:
+            await self.flush()
+        finally:
+            if self._writer is not None and not self._writer.done():
+                self._writer.cancel()
+                try:
+                    await self._writer
+                except asyncio.CancelledError:
+                    pass
+            await self.db_engine.dispose()
+
+    def metrics(self) -> dict:
+        return {
+            "events_written": self.events_written,
+            "transactions": self.transactions,
+            "events_per_transaction": round(self.events_written / self.transactions, 2) if self.transactions else 0.0,
+            "buffered_invocations": len(self._buffers),
+            "unreported_errors": len(self._errors),
+        }
+
+
+class GroupCommitPlugin(BasePlugin):
+    """Commits each invocation's events as soon as the invocation ends."""
+
+    def __init__(self, service: FastSqliteSessionService, name: str = "group_commit"):
+        super().__init__(name=name)
+        self.service = service
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        await self.service.flush(invocation_context.invocation_id)
+
+
+async def demo(concurrency_levels: tuple = (1, 16, 128), events: int = 1536, events_per_invocation: int = 4):
+    """Appends `events` events, spread over N concurrent sessions, to a fresh database with each service.
+
+    Every invocation appends a user message, a tool call with a state change, its response and the final answer,
+    like one tool-using turn of the Day3 agents; the tuned service commits at the end of each invocation.
+    """
+    import shutil
+    import tempfile
+
+    from google.genai import types
+
+    def turn(invocation_id: str, i: int) -> list[Event]:
+        def event(author: str, text: str, **actions) -> Event:
+            return Event(author=author, invocation_id=invocation_id,
+                         content=types.Content(role="user" if author == "user" else "model", parts=[types.Part(text=text)]),
+                         **actions)
+        from google.adk.events.event_actions import EventActions
+        return [
+            event("user", f"Question {i}: what is the capital of country number {i}?"),
+            event("text_chat_bot", f"Looking up country {i}.", actions=EventActions(state_delta={"last_country": i})),
+            event("text_chat_bot", f"Tool result for country {i}: " + "details " * 30),
+            event("text_chat_bot", f"The capital of country {i} is City {i}."),
+        ][:events_per_invocation]
+
+    async def run(service: DatabaseSessionService, sessions: int) -> float:
+        created = [await service.create_session(app_name="bench", user_id=f"user_{i % 8}", session_id=f"s{i}")
+                   for i in range(sessions)]
+        invocations = events // (sessions * events_per_invocation)
+
+        async def converse(session: Session):
+            for n in range(max(1, invocations)):
+                invocation_id = f"{session.id}-inv{n}"
+                for item in turn(invocation_id, n):
+                    await service.append_event(session, item)
+                if isinstance(service, FastSqliteSessionService):
+                    await service.flush(invocation_id)  # What GroupCommitPlugin does when the run ends
+
+        started = time.perf_counter()
+        await asyncio.gather(*(converse(session) for session in created))
+        elapsed = time.perf_counter() - started
+        return max(1, invocations) * events_per_invocation * sessions / elapsed
+
+    directory = tempfile.mkdtemp(prefix="sqlite_sessions_")
+    try:
+        setups = {
+            "DatabaseSessionService (default)": lambda path: DatabaseSessionService(db_url=sqlite_url(path)),
+            "tuned pool, one commit per event": lambda path: FastSqliteSessionService(path, group_commit=False),
+            "tuned pool + group commit": lambda path: FastSqliteSessionService(path),
+        }
+        print(f"\n📊 Session events appended per second ({events} events, {events_per_invocation} per invocation)")
+        print(f"   {'':<34}" + "".join(f"{n:>7} sess." for n in concurrency_levels))
+        failures = []
+        for label, build in setups.items():
+            row = []
+            for sessions in concurrency_levels:
+                path = os.path.join(directory, f"{len(row)}_{abs(hash(label))}.db")
+                service = build(path)
+                try:
+                    row.append(f"{await run(service, sessions):12,.0f}")
+                except Exception as e:  # No rate for a run that did not finish
+                    row.append(f"{'failed':>12}")
+                    failures.append(f"{label}, {sessions} sessions: {type(e).__name__}: {str(e).splitlines()[0]}")
+                finally:
+                    if isinstance(service, FastSqliteSessionService):
+                        await service.close()
+                    else:
+                        await service.db_engine.dispose()
+            print(f"   {label:<34}" + "".join(row))
+        for failure in failures:
+            print(f"   ❌ {failure}")
+
+        service = FastSqliteSessionService(os.path.join(directory, "check.db"))
+        await run(service, 16)
+        stored = await service.get_session(app_name="bench", user_id="user_3", session_id="s3")
+        print(f"   Group commit check: s3 has {len(stored.events)} events, state {stored.state}; {service.metrics()}")
+        await service.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
@@ -0,0 +1,13 @@
+# The tutorial folders are not packages: their scripts import each other by module name (from multi_agent import ...)
+# and reach adk_utils through the repo root. Tests import them the same way.
+#
+#   python -m pytest -q tests
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("", os.path.join("Day1", "sample-agent"), os.path.join("Day2", "sample-agent")):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
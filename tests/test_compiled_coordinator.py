@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.adk.tools import AgentTool
+
+from benchmark_multi_agent import CANNED_REPLIES, run_once
+from compiled_coordinator import compile_coordinator
+from fake_gemini import FakeGeminiBackend
+from multi_agent import RESEARCH_SUMMARIZE_QUERY, build_research_summarize
+
+
+def run_research_summarize(compiled: bool) -> tuple[list[str], dict]:
+    """The agents whose model was called, in order, and the session state after one request."""
+    backend = FakeGeminiBackend(replies=CANNED_REPLIES)
+    runner = InMemoryRunner(agent=build_research_summarize(backend.model, compiled=compiled))
+
+    async def run() -> dict:
+        await run_once(runner, RESEARCH_SUMMARIZE_QUERY, backend)
+        sessions = await runner.session_service.list_sessions(app_name=runner.app_name, user_id="bench_user")
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id="bench_user", session_id=sessions.sessions[0].id
+        )
+        return session.state
+
+    state = asyncio.run(run())
+    return [call.agent for call in backend.calls], state
+
+
+def test_llm_driven_coordinator_decides_every_step():
+    agents, _ = run_research_summarize(compiled=False)
+    assert agents == ["ResearchCoordinator", "ResearchAgent", "ResearchCoordinator", "SummarizerAgent",
+                      "ResearchCoordinator"]
+
+
+def test_compiled_plan_calls_the_coordinator_model_once():
+    agents, _ = run_research_summarize(compiled=True)
+    assert agents == ["ResearchAgent", "SummarizerAgent", "ResearchCoordinatorAnswer"]
+
+
+def test_compiled_plan_produces_the_same_state():
+    _, llm_driven = run_research_summarize(compiled=False)
+    _, compiled = run_research_summarize(compiled=True)
+    assert {"research_findings", "final_summary"} <= set(llm_driven) <= set(compiled)
+    assert compiled["final_summary"] == llm_driven["final_summary"]
+
+
+def test_without_final_answer_the_coordinator_model_is_not_called():
+    backend = FakeGeminiBackend()
+    step = LlmAgent(name="StepAgent", model=backend.model("gemini-2.5-flash-lite"))
+    coordinator = LlmAgent(name="Coordinator", model=backend.model("gemini-2.5-flash-lite"), tools=[AgentTool(step)])
+    plan = compile_coordinator(coordinator, final_answer=False)
+    assert plan.name == "Coordinator"
+    assert [agent.name for agent in plan.sub_agents] == ["StepAgent"]
+
+
+def test_rejects_coordinators_it_cannot_compile():
+    backend = FakeGeminiBackend()
+    step = LlmAgent(name="StepAgent", model=backend.model("gemini-2.5-flash-lite"))
+
+    def plain_tool() -> dict:
+        """A tool only the coordinator model can decide to call."""
+        return {}
+
+    with pytest.raises(ValueError, match="not AgentTools"):
+        compile_coordinator(LlmAgent(name="Coordinator", tools=[AgentTool(step), plain_tool]))
+    with pytest.raises(ValueError, match="no AgentTool for: OtherAgent"):
+        compile_coordinator(LlmAgent(name="Coordinator", tools=[AgentTool(step)]), steps=["OtherAgent"])
@@ -0,0 +1,89 @@
+import asyncio
+import sys
+
+from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
+from mcp import StdioServerParameters
+
+from adk_utils import mcp_pool
+from adk_utils.local_mcp_server import LOCAL_MCP_SERVER
+
+PARAMS = StdioConnectionParams(
+    server_params=StdioServerParameters(command=sys.executable, args=[LOCAL_MCP_SERVER]), timeout=30
+)
+
+
+def toolset() -> mcp_pool.PooledMcpToolset:
+    return mcp_pool.PooledMcpToolset(connection_params=PARAMS, spares=0)
+
+
+def test_last_release_closes_the_pool():
+    async def run():
+        first = mcp_pool.acquire_pool(PARAMS.server_params)
+        second = mcp_pool.acquire_pool(PARAMS.server_params)
+        assert first is second and first.holders == 2
+
+        await mcp_pool.release_pool(first)
+        assert not first.closed
+        assert mcp_pool.get_pool(PARAMS.server_params) is first
+
+        await mcp_pool.release_pool(first)
+        assert first.closed
+        assert mcp_pool.get_pool(PARAMS.server_params) is not first
+
+    asyncio.run(run())
+
+
+def test_toolsets_share_the_processes_until_the_last_one_closes():
+    async def run():
+        toolsets = [toolset(), toolset()]
+        tools = [await t.get_tools() for t in toolsets]
+        assert [tool.name for tool in tools[0]] == [tool.name for tool in tools[1]]
+        pool = toolsets[0].pool()
+        assert toolsets[1].pool() is pool and pool.holders == 2
+
+        result = await pool.call_tool("echo", {"message": "hi"})
+        assert result.content[0].text == "Echo: hi"
+        assert pool.metrics()["processes_started"] == 1
+        serving = list(pool._serving)
+
+        await toolsets[0].close()
+        await toolsets[0].close()  # A second close does not release the pool again
+        assert pool.holders == 1 and all(process.alive for process in serving)
+
+        await toolsets[1].close()
+        assert pool.closed and pool.holders == 0
+        assert not any(process.alive for process in serving)
+
+    asyncio.run(run())
+
+
+def test_a_toolset_acquires_a_new_pool_after_close_all():
+    async def run():
+        pooled = toolset()
+        await pooled.get_tools()
+        old = pooled.pool()
+        await mcp_pool.close_all()
+        assert old.closed
+        new = pooled.pool()
+        assert new is not old and new.holders == 1
+        await pooled.close()
+        assert new.closed
+
+    asyncio.run(run())
+
+
+def test_a_call_is_retried_on_a_new_process_when_its_process_dies():
+    async def run():
+        pooled = toolset()
+        pool = pooled.pool()
+        await pool.start()
+        try:
+            await pool._serving[0].call_tool("crash")  # Straight to the process, so the pool does not retry it
+        except Exception:
+            pass
+        result = await pool.call_tool("echo", {"message": "after crash"})
+        assert result.content[0].text == "Echo: after crash"
+        assert pool.metrics()["restarts"] == 1
+        await pooled.close()
+
+    asyncio.run(run())
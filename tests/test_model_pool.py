@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+from google.adk.models.google_llm import Gemini
+from google.adk.models.llm_request import LlmRequest
+from google.genai import errors, types
+
+from adk_utils import model_pool
+from adk_utils.local_gemini_server import LocalGeminiServer
+
+RETRY = types.HttpRetryOptions(attempts=3, exp_base=2, initial_delay=0.01, http_status_codes=[429])
+REQUEST = LlmRequest(model="gemini-2.5-flash-lite", contents=[types.Content(role="user", parts=[types.Part(text="Hi")])])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """A local stand-in for the Gemini API; set `server.fail_first` to throttle its first requests with 429."""
+    monkeypatch.setenv("GOOGLE_API_KEY", "local-stand-in")
+    monkeypatch.delenv("GOOGLE_GENAI_USE_VERTEXAI", raising=False)
+    with LocalGeminiServer() as server:
+        monkeypatch.setenv("GOOGLE_GEMINI_BASE_URL", server.url)
+        yield server
+
+
+@pytest.fixture
+def pool():
+    yield model_pool.enable(retries_per_second=100, retry_burst=100)
+    model_pool.disable()
+
+
+def throttle(server: LocalGeminiServer, requests: int):
+    server._server.fail_first = requests
+
+
+async def call(model: Gemini) -> str:
+    async for response in model.generate_content_async(REQUEST.model_copy(deep=True)):
+        return response.content.parts[0].text
+
+
+def test_budget_allows_the_burst_then_paces_retries():
+    budget = model_pool.RetryBudget(per_second=20, burst=2)
+
+    async def acquire_all(n: int) -> list[float]:
+        return [await budget.acquire() for _ in range(n)]
+
+    started = time.monotonic()
+    waits = asyncio.run(acquire_all(6))
+    assert waits[:2] == [0.0, 0.0]
+    assert all(wait > 0 for wait in waits[2:])
+    assert time.monotonic() - started >= 4 / 20 * 0.9  # 4 tokens past the burst, at 20 per second
+
+
+def test_a_call_makes_at_most_attempts_requests(server, pool):
+    throttle(server, 10**9)
+    with pytest.raises(errors.ClientError):
+        asyncio.run(call(Gemini(model="gemini-2.5-flash-lite", retry_options=RETRY)))
+    assert server.stats()["requests"] == RETRY.attempts
+    assert pool.metrics()["retries"] == RETRY.attempts - 1
+
+
+def test_throttled_call_succeeds_after_retries(server, pool):
+    throttle(server, 2)
+    assert asyncio.run(call(Gemini(model="gemini-2.5-flash-lite", retry_options=RETRY)))
+    assert server.stats()["requests"] == 3
+    assert pool.metrics()["status_codes"] == {200: 1, 429: 2}
+
+
+def test_retries_across_calls_stay_within_the_budget(server):
+    throttle(server, 10**9)
+    pool = model_pool.enable(retries_per_second=20, retry_burst=2)
+    try:
+        async def calls(n: int) -> list:
+            models = [Gemini(model="gemini-2.5-flash-lite", retry_options=RETRY) for _ in range(n)]
+            return await asyncio.gather(*(call(m) for m in models), return_exceptions=True)
+
+        started = time.monotonic()
+        results = asyncio.run(calls(5))
+        elapsed = time.monotonic() - started
+    finally:
+        model_pool.disable()
+    assert all(isinstance(result, errors.ClientError) for result in results)
+    retries = pool.metrics()["retries"]
+    assert retries == 5 * (RETRY.attempts - 1)
+    assert retries <= 2 + 20 * elapsed
+    assert server.stats()["requests"] == 5 * RETRY.attempts
+
+
+def test_geminis_with_the_same_options_share_one_client(server, pool):
+    async def clients() -> tuple:
+        same = [Gemini(model="gemini-2.5-flash-lite", retry_options=RETRY).api_client for _ in range(2)]
+        other = Gemini(model="gemini-2.5-flash-lite").api_client
+        return same, other
+
+    (first, second), other = asyncio.run(clients())
+    assert first is second
+    assert other is not first
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from rate_cache import RateTableCache
+
+USD = {"USD": 1.0, "EUR": 0.9, "INR": 83.0}
+
+
+class SlowFetch:
+    """Counts fetches; each one takes `latency` seconds, then returns USD or raises `error`."""
+
+    def __init__(self, latency: float = 0.1, error: Exception = None):
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _result(self) -> dict:
+        with self._lock:
+            self.calls += 1
+        if self.error:
+            raise self.error
+        return dict(USD)
+
+    def __call__(self, base: str) -> dict:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def fetch_async(self, base: str) -> dict:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+
+def test_concurrent_threads_share_one_fetch():
+    fetch = SlowFetch()
+    cache = RateTableCache(fetch=fetch)
+    with ThreadPoolExecutor(max_workers=50) as pool:
+        tables = list(pool.map(lambda _: cache.get("usd"), range(50)))
+    assert fetch.calls == 1
+    assert all(table == USD for table in tables)
+    stats = cache.metrics()
+    assert stats["fetches"] == 1
+    assert stats["misses"] + stats["hits"] == 50
+    assert stats["coalesced"] == stats["misses"] - 1
+
+
+def test_concurrent_tasks_share_one_fetch():
+    fetch = SlowFetch()
+    cache = RateTableCache(afetch=fetch.fetch_async)
+
+    async def lookups() -> list:
+        return await asyncio.gather(*(cache.get_async("USD") for _ in range(50)))
+
+    assert all(table == USD for table in asyncio.run(lookups()))
+    assert fetch.calls == 1
+    assert cache.metrics()["coalesced"] == 49
+
+
+def test_a_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    fetch = SlowFetch(error=ConnectionError("upstream down"))
+    cache = RateTableCache(afetch=fetch.fetch_async)
+
+    async def lookups() -> list:
+        return await asyncio.gather(*(cache.get_async("USD") for _ in range(10)), return_exceptions=True)
+
+    assert all(isinstance(result, ConnectionError) for result in asyncio.run(lookups()))
+    assert fetch.calls == 1
+    fetch.error = None
+    assert asyncio.run(cache.get_async("USD")) == USD
+    assert fetch.calls == 2
+
+
+def test_a_cancelled_waiter_does_not_cancel_the_shared_fetch():
+    fetch = SlowFetch()
+    cache = RateTableCache(afetch=fetch.fetch_async)
+
+    async def lookups():
+        first = asyncio.create_task(cache.get_async("USD"))
+        second = asyncio.create_task(cache.get_async("USD"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(lookups()) == USD
+    assert fetch.calls == 1
+
+
+def test_a_stale_table_is_served_while_one_refresh_runs():
+    fetch = SlowFetch(latency=0.05)
+    cache = RateTableCache(fetch=fetch, ttl=0.05, stale_ttl=10)
+    cache.get("USD")
+    time.sleep(0.06)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=20) as pool:
+        assert all(table == USD for table in pool.map(lambda _: cache.get("USD"), range(20)))
+    assert time.perf_counter() - started < fetch.latency  # Nobody waited for the refresh
+    time.sleep(0.1)
+    stats = cache.metrics()
+    assert stats["stale_hits"] == 20
+    assert stats["refreshes"] == 1
+    assert fetch.calls == 2